@@ -5,24 +5,31 @@ from api.v1.config import Config
 from flask_cors import CORS
 from os import getenv
 from dotenv import load_dotenv
-from api.v1.auth import load_user_from_jwt, init_supabase_clients, public_supabase_client, service_supabase_client
-import logging
+from api.v1.auth import load_user_from_jwt, init_supabase_clients, init_jwks, public_supabase_client, service_supabase_client
+from api.v1.utils.metrics import init_metrics
+from api.v1.utils.compression import init_compression
+from api.v1.utils.json_provider import FastJSONProvider
+from api.v1.utils.logging_config import configure_logging
 
 
 load_dotenv()  # Load environment variables from .env file
 
-logging.basicConfig(filename='app.log', level=logging.DEBUG, format='%(asctime)s - %(levelname)s %(name)s %(threadName)s - %(message)s')
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
+configure_logging(app)
 app.config.from_object(Config)
 CORS(app, supports_credentials=True)
 app.url_map.strict_slashes = False 
 app.register_blueprint(app_views)
+init_metrics(app)
+init_compression(app)
 app.before_request(load_user_from_jwt)
 
 
 # Initialize Supabase clients (will be done via init_supabase_clients)
 with app.app_context():
     init_supabase_clients(app)
+    init_jwks(app)
 
 
 # --- Health Check Route ---
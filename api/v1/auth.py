@@ -4,8 +4,13 @@ from flask import request, g, current_app, jsonify
 from functools import wraps
 from supabase import create_client, Client
 import jwt
-from jwt import PyJWKClient
+from api.v1.utils.cache import TTLCache
+from api.v1.utils.jwks import JWKSKeyManager
+from api.v1.utils.metrics import instrument_supabase_client
+import hashlib
+import logging
 import os
+import time
 import certifi
 import ssl
 
@@ -15,15 +20,22 @@ ssl._create_default_https_context = ssl._create_unverified_context
 default_context = ssl.create_default_context(cafile=certifi.where())
 ssl._create_default_https_context = lambda: default_context
 
+logger = logging.getLogger(__name__)
+
 # Global Supabase clients (initialized once via init_supabase_clients)
 public_supabase_client: Client | None = None
 service_supabase_client: Client | None = None
 
-# Supabase JWKS URL — replace with your actual project ref if different
+# Supabase JWKS URL — overridden by SUPABASE_JWKS_URL in init_jwks (may be a local file)
 JWKS_URL = "https://dxijucrxupbqfvqdttwi.supabase.co/auth/v1/.well-known/jwks.json"
 
-# Create a single shared JWK client for efficiency
-jwk_client = PyJWKClient(JWKS_URL, cache_keys=True, lifespan=3600)
+# Single shared key manager; keys are kept in memory and refreshed in the background
+jwk_client = JWKSKeyManager(JWKS_URL, lifespan=3600)
+
+# Verified token payloads, keyed by sha256 of the raw token and kept until the token's exp.
+# Lets clients that poll with the same token skip the ES256 signature check.
+JWT_CACHE_SIZE = int(os.getenv("JWT_CACHE_SIZE", 4096))
+_verified_tokens = TTLCache(maxsize=JWT_CACHE_SIZE)
 
 
 def init_supabase_clients(app):
@@ -34,31 +46,93 @@ def init_supabase_clients(app):
     global public_supabase_client, service_supabase_client
 
     if public_supabase_client is None or service_supabase_client is None:
-        print("Initializing Supabase clients...")
+        logger.info("Initializing Supabase clients...")
         public_supabase_client = create_client(
             app.config["SUPABASE_URL"], app.config["SUPABASE_KEY"]
         )
         service_supabase_client = create_client(
             app.config["SUPABASE_URL"], app.config["SUPABASE_SERVICE_KEY"]
         )
-        print("Supabase clients initialized successfully.")
+        instrument_supabase_client(public_supabase_client)
+        instrument_supabase_client(service_supabase_client)
+        logger.info("Supabase clients initialized successfully.")
+
+
+def init_jwks(app):
+    """
+    Configure the JWKS key manager from the Flask config and prefetch the
+    signing keys, starting the background refresher for this worker.
+    """
+    jwk_client.url = app.config.get("SUPABASE_JWKS_URL") or JWKS_URL
+    jwk_client.lifespan = app.config.get("JWKS_LIFESPAN", jwk_client.lifespan)
+    jwk_client.start(prefetch=True)
+
+
+def verify_token(token: str) -> dict:
+    """
+    Verify a Supabase access token and return its decoded payload.
+    ES256 tokens are checked against the JWKS keys held by jwk_client; legacy
+    HS256 tokens are verified locally with SUPABASE_JWT_SECRET.
+    Successful verifications are cached by token hash until the token expires,
+    so only the first request with a given token pays for the signature check.
+    Raises the usual jwt exceptions on failure.
+    """
+    token_hash = hashlib.sha256(token.encode()).hexdigest()
+    decoded_token = _verified_tokens.get(token_hash)
+    if decoded_token is not None:
+        return decoded_token
+
+    if jwt.get_unverified_header(token).get("alg") == "HS256":
+        secret = current_app.config.get("SUPABASE_JWT_SECRET")
+        if not secret:
+            raise jwt.InvalidKeyError("HS256 token received but SUPABASE_JWT_SECRET is not set")
+        key, algorithms = secret, ["HS256"]
+    else:
+        # Signing key comes from the in-memory JWKS, never fetched on the request path
+        key, algorithms = jwk_client.get_signing_key_from_jwt(token).key, ["ES256"]
+
+    # Decode and verify the JWT
+    decoded_token = jwt.decode(
+        token,
+        key,
+        algorithms=algorithms,
+        audience="authenticated",
+        options={
+            "verify_signature": True,
+            "verify_exp": True,
+            "verify_aud": True,
+        },
+    )
+
+    exp = decoded_token.get("exp")
+    if exp:
+        _verified_tokens.set(token_hash, decoded_token, ttl=exp - time.time())
+    return decoded_token
 
 
 def load_user_from_jwt():
     """
     Middleware function to validate the Supabase JWT from the Authorization header.
+    Runs once per request: the result is memoised on g, so the login_required and
+    role_required decorators reuse it instead of verifying the token again.
     On success:
         - Sets g.current_user = user ID (sub)
         - Sets g.user_role = role from app_metadata (e.g., 'hr_manager', 'admin')
         - Sets g.supabase_user_client = public client (for potential RLS use)
+        - Sets g.service_supabase_client = service-role client (bypasses RLS)
     On failure:
         - Sets g.jwt_error with reason
     """
+    if g.get("jwt_loaded"):
+        return
+    g.jwt_loaded = True
+
     auth_header = request.headers.get("Authorization")
     g.current_user = None
     g.user_role = None
     g.jwt_error = None
     g.supabase_user_client = public_supabase_client  # fallback
+    g.service_supabase_client = service_supabase_client
 
     if not auth_header or not auth_header.startswith("Bearer "):
         g.jwt_error = "Missing or invalid Authorization header"
@@ -67,21 +141,7 @@ def load_user_from_jwt():
     token = auth_header.split(" ")[1]
 
     try:
-        # Fetch the correct signing key from Supabase JWKS based on the token
-        signing_key = jwk_client.get_signing_key_from_jwt(token)
-
-        # Decode and verify the JWT
-        decoded_token = jwt.decode(
-            token,
-            signing_key.key,
-            algorithms=["ES256"],
-            audience="authenticated",
-            options={
-                "verify_signature": True,
-                "verify_exp": True,
-                "verify_aud": True,
-            },
-        )
+        decoded_token = verify_token(token)
 
         # Extract user info
         g.current_user = decoded_token.get("sub")
@@ -91,7 +151,7 @@ def load_user_from_jwt():
         # Optional: you can also store the full token or decoded payload if needed
         g.jwt_payload = decoded_token
 
-        print(f"Authenticated user: {g.current_user} | Role: {g.user_role}")
+        logger.debug("Authenticated user: %s | Role: %s", g.current_user, g.user_role)
 
     except jwt.ExpiredSignatureError:
         g.jwt_error = "Token has expired"
@@ -105,7 +165,7 @@ def load_user_from_jwt():
         g.jwt_error = "Token decode error"
     except Exception as e:
         g.jwt_error = f"JWT verification failed: {str(e)}"
-        print(f"JWT Error: {e}")
+        logger.warning("JWT Error: %s", e)
 
 
 def login_required(f):
@@ -114,7 +174,7 @@ def login_required(f):
     """
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        load_user_from_jwt()  # Ensure JWT is processed
+        load_user_from_jwt()  # No-op if already processed for this request
 
         if not g.current_user:
             error_msg = g.jwt_error or "Authentication required"
@@ -139,7 +199,7 @@ def role_required(allowed_roles: list[str]):
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            load_user_from_jwt()
+            load_user_from_jwt()  # No-op if already processed for this request
 
             if not g.current_user:
                 error_msg = g.jwt_error or "Authentication required"
@@ -11,6 +11,11 @@ class Config:
     SUPABASE_KEY = getenv('SUPABASE_KEY')
     SUPABASE_SERVICE_KEY = getenv('SUPABASE_SERVICE_KEY')
     SUPABASE_JWT_SECRET = getenv('SUPABASE_JWT_SECRET')
+    # JWKS endpoint (or a local JWKS file for tests); derived from SUPABASE_URL by default
+    SUPABASE_JWKS_URL = getenv('SUPABASE_JWKS_URL') or f"{SUPABASE_URL}/auth/v1/.well-known/jwks.json"
+    JWKS_LIFESPAN = int(getenv('JWKS_LIFESPAN', 3600))
+    # Signs list pagination cursors; falls back to SUPABASE_JWT_SECRET
+    PAGINATION_SECRET = getenv('PAGINATION_SECRET')
 
     # Ensure all required Supabase variables are set
     if not all([SUPABASE_URL, SUPABASE_KEY, SUPABASE_SERVICE_KEY, SUPABASE_JWT_SECRET]):
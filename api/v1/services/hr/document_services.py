@@ -1,4 +1,5 @@
 from flask import g, current_app, jsonify
+from api.v1.utils.caller_context import get_caller_employee_id
 from pydantic import BaseModel, Field
 from typing import Literal, Optional
 from uuid import UUID
@@ -57,29 +58,26 @@ class TaskDocumentUpdateSchema(BaseModel):
 def create_employee_document(documents: list[EmployeeDocumentCreateSchema], employee_id: str) -> list[EmployeeDocumentCreateSchema]:
     """create a document record"""
     
-    creator_response = g.supabase_user_client.from_('employees').select('id').eq('user_id', g.current_user).is_('deleted_at', 'null').execute()
-    if not creator_response.data:
+    creator_id = get_caller_employee_id(active_only=True)
+    if not creator_id:
         raise ValueError("Creator not found or deleted")
     processed_documents = []
-    print(documents)
     for document in documents:
-        print("Document: ", document)
+        current_app.logger.debug("Document: %s", document)
         document_data = EmployeeDocumentCreateSchema(**document, employee_id=str(employee_id))
-        document_data.created_by = creator_response.data[0]['id']
+        document_data.created_by = creator_id
         document_data.employee_id = str(employee_id)
 
         # Check for duplicate name and URL
         existing = g.supabase_user_client.from_('employee_documents').select('id').eq('name', document_data.name).eq('url', document_data.url).eq('employee_id', document_data.created_by).execute()
-        print(existing)
         if existing.data:
             continue
         response = g.supabase_user_client.from_('employee_documents').insert(document_data.model_dump()).execute()
         if not response.data:
             raise ValueError("Failed to create document")
 
-        print(response)
 
         processed_documents.append(response.data[0])
-    print("Processed Documents: ", processed_documents)
+    current_app.logger.debug("Processed %d documents for employee %s", len(processed_documents), employee_id)
 
     return processed_documents
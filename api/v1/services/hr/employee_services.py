@@ -4,6 +4,7 @@ from typing import Optional, List
 from datetime import date
 from typing import Literal, Optional, List
 from uuid import UUID
+from api.v1.utils.projections import Embed, Projection
 
 ALLOWED_ROLES = ['super_admin', 'hr_manager', 'manager', 'user']
 
@@ -81,3 +82,29 @@ class EmployeeUpdateSchema(BaseModel):
             raise ValueError(f"Invalid role: '{v}'. Must be one of {', '.join(ALLOWED_ROLES)}")
         return v
     
+
+
+EMPLOYEE_PROJECTION = Projection(
+    columns=(
+        'id', 'user_id', 'first_name', 'last_name', 'email', 'phone_number', 'address', 'city', 'state',
+        'zip_code', 'country', 'date_of_birth', 'hire_date', 'employment_status', 'position',
+        'department_id', 'location_id', 'shift_id', 'guarantor_name', 'guarantor_phone_number',
+        'guarantor_name_2', 'guarantor_phone_number_2', 'marital_status', 'gender', 'avatar_url',
+        'signature_url', 'leave_balance', 'bank_account_number', 'bank_name', 'account_name', 'created_at',
+    ),
+    embeds={
+        'departments': Embed('departments', ['name']),
+        'shift_types': Embed('shift_types', ['name', 'start_time', 'end_time']),
+        'employee_documents': Embed(
+            'employee_documents!employee_documents_employee_id_fkey',
+            ['id', 'name', 'url', 'type', 'category', 'created_at'],
+        ),
+    },
+    list='id, first_name, last_name, email, avatar_url, position, employment_status, department_id, created_at, departments(name)',
+    detail='*, departments(name), shift_types(name, start_time, end_time), '
+           'employee_documents!employee_documents_employee_id_fkey(id, name, url, type, category, created_at)',
+    required=('id', 'created_at'),
+    # default of /employees/<id>: the record without its documents, which are
+    # returned only when asked for (?view=detail or ?fields=employee_documents)
+    views={'record': '*, departments(name), shift_types(name, start_time, end_time)'},
+)
@@ -202,7 +202,7 @@ def generate_employee_payment(employee_id: str, period: str, created_by: str, ne
             }).in_('id', deduction_ids).execute()
         
         # Update next_due_date (first day of next month)
-        print(f"Updating next_due_date for employee {employee_id} to the 25th of next month.")
+        current_app.logger.debug("Updating next_due_date for employee %s to the 25th of next month.", employee_id)
         next_due_date = next_due_date + relativedelta(months=1) if next_due_date else datetime.now() + relativedelta(months=1)
         next_due_date = next_due_date.replace(day=25)  # Set to the 25th
         update_employee = g.supabase_user_client.from_("employees").update({
@@ -213,11 +213,9 @@ def generate_employee_payment(employee_id: str, period: str, created_by: str, ne
         return payment_data
     
     except Exception as e:
-        traceback.print_exc()
-        print(e)
         if payment_response and payment_response.data:
             # Rollback payment creation
-            print(f"Rolling back payment creation for employee {employee_id}.")
+            current_app.logger.warning("Rolling back payment creation for employee %s.", employee_id)
             g.supabase_user_client.from_('payment_history').delete().eq('id', payment_response.data[0]['id']).execute()
         if deduction_ids:
             g.supabase_user_client.from_('deductions').update({
@@ -225,7 +223,7 @@ def generate_employee_payment(employee_id: str, period: str, created_by: str, ne
                 "status": "pending"
             }).in_('id', deduction_ids).execute()
         
-        current_app.logger.error(f"Error generating payment for employee {employee_id}: {str(e)}")
+        current_app.logger.exception("Error generating payment for employee %s: %s", employee_id, e)
         raise e
 
 
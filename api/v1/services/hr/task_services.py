@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field, EmailStr, field_validator
 from typing import Optional, Literal, List
 from datetime import date
+from api.v1.utils.projections import Embed, Projection
 
 class TaskCreateSchema(BaseModel):
     title: str
@@ -21,4 +22,21 @@ class TaskUpdateSchema(BaseModel):
     priority: Optional[Literal['low', 'medium', 'high']] = None
     assigned_to: Optional[List[str]] = None  # Employee ID
 
- 
\ No newline at end of file
+ 
+
+
+TASK_PROJECTION = Projection(
+    columns=('id', 'title', 'description', 'start_date', 'end_date', 'status', 'priority', 'created_by', 'created_at'),
+    embeds={
+        'task_assignments': Embed('task_assignments', {
+            'employee_id': 'employee_id',
+            'task_id': 'task_id',
+            'date_assigned': 'date_assigned',
+            'employees': 'employees(id, first_name, last_name, email, avatar_url)',
+        }),
+        'task_documents': Embed('task_documents', ['id', 'name', 'type', 'url', 'category', 'created_by', 'created_at']),
+    },
+    list='id, title, status, priority, start_date, end_date, created_at, task_assignments(employee_id)',
+    detail='*, task_assignments(*, employees(id, first_name, last_name, email, avatar_url)), task_documents(*)',
+    required=('id', 'created_at'),
+)
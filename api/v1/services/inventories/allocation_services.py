@@ -0,0 +1,122 @@
+from pydantic import BaseModel, Field
+from typing import Optional, List, Literal
+from flask import g
+from api.v1.utils.pagination import iter_rows
+from api.v1.services.inventories.stock_services import ID_CHUNK_SIZE
+from api.v1.services.inventories.transactions import sell_stock
+import heapq
+
+ALLOCATION_POLICIES = ('fifo', 'fewest_boxes', 'location')
+# boxes from a batch without a received_date are picked after dated ones
+UNDATED = '9999-12-31'
+
+
+class AllocationLineSchema(BaseModel):
+    contents_type: Literal['product', 'component']
+    contents_id: str
+    quantity: int = Field(..., gt=0)
+
+    class Config:
+        extra = "forbid"
+
+
+class AllocationRequestSchema(BaseModel):
+    order_id: str
+    items: List[AllocationLineSchema] = Field(..., min_length=1)
+    policy: Literal['fifo', 'fewest_boxes', 'location'] = 'fifo'
+    location_id: Optional[str] = None
+    shelf_code: Optional[str] = None
+    dry_run: bool = False
+
+    class Config:
+        extra = "forbid"
+
+
+def _priority(box: dict, policy: str, location_id: str | None, shelf_code: str | None) -> tuple:
+    """Heap key of a box: the smallest key is picked first."""
+    batch = box.get('import_batches') or {}
+    age = (batch.get('received_date') or UNDATED, box.get('batch_id') or '')
+    if policy == 'fewest_boxes':
+        return (-box['quantity_in_box'], *age, box['box_id'])
+    if policy == 'location':
+        if box.get('location_id') == location_id and location_id is not None:
+            nearness = 0 if shelf_code is None or box.get('shelf_code') == shelf_code else 1
+        else:
+            nearness = 2
+        return (nearness, *age, box['quantity_in_box'], box['box_id'])
+    # fifo: oldest batch first, part-empty boxes of a batch before full ones
+    return (*age, box['quantity_in_box'], box['box_id'])
+
+
+def allocate(boxes, lines: list, policy: str = 'fifo',
+             location_id: str | None = None, shelf_code: str | None = None) -> list:
+    """
+    Pick boxes for (contents_type, contents_id, quantity) lines.
+
+    Boxes are bucketed per item and heapified under the policy key, so each
+    line pops only the boxes it drains. Returns one
+    {box_id, contents_type, contents_id, requested_quantity} pick per box;
+    raises ValueError when an item does not have enough stock.
+    """
+    if policy not in ALLOCATION_POLICIES:
+        raise ValueError(f"policy must be one of: {', '.join(ALLOCATION_POLICIES)}")
+
+    needed = {}
+    for contents_type, contents_id, quantity in lines:
+        needed[(contents_type, contents_id)] = needed.get((contents_type, contents_id), 0) + quantity
+
+    queues = {key: [] for key in needed}
+    for box in boxes:
+        queue = queues.get((box['contents_type'], box['contents_id']))
+        if queue is not None and box['quantity_in_box'] > 0:
+            queue.append((_priority(box, policy, location_id, shelf_code), box['box_id'], box['quantity_in_box']))
+
+    picks = []
+    for (contents_type, contents_id), remaining in needed.items():
+        queue = queues[(contents_type, contents_id)]
+        available = sum(entry[2] for entry in queue)
+        if available < remaining:
+            raise ValueError(
+                f"Requested {remaining} of {contents_type} {contents_id} but only {available} in stock"
+            )
+        heapq.heapify(queue)
+        while remaining > 0:
+            _, box_id, quantity = heapq.heappop(queue)
+            take = min(quantity, remaining)
+            picks.append({
+                "box_id": box_id,
+                "contents_type": contents_type,
+                "contents_id": contents_id,
+                "requested_quantity": take
+            })
+            remaining -= take
+    return picks
+
+
+def _load_boxes(lines: list):
+    """In-stock boxes of every requested item: one paged `in_` query per chunk of ids."""
+    ids = sorted({contents_id for _, contents_id, _ in lines})
+    for start in range(0, len(ids), ID_CHUNK_SIZE):
+        query = g.supabase_user_client.from_('boxes') \
+            .select('box_id, contents_type, contents_id, quantity_in_box, location_id, shelf_code, '
+                    'batch_id, import_batches(received_date)') \
+            .in_('contents_id', ids[start:start + ID_CHUNK_SIZE]) \
+            .eq('status', 'in_stock')
+        yield from iter_rows(query, 'box_id', 'box_id', desc=False)
+
+
+def allocate_order(allocation: AllocationRequestSchema) -> dict:
+    """
+    Allocate boxes for an order under the requested policy and, unless
+    dry_run, sell them through sell_stock in one batch.
+    """
+    lines = [(item.contents_type, item.contents_id, item.quantity) for item in allocation.items]
+    picks = allocate(_load_boxes(lines), lines, allocation.policy, allocation.location_id, allocation.shelf_code)
+    if allocation.dry_run:
+        return {"picks": picks}
+
+    sale = sell_stock([
+        {"box_id": pick["box_id"], "requested_quantity": pick["requested_quantity"], "order_id": allocation.order_id}
+        for pick in picks
+    ])
+    return {"picks": picks, **sale}
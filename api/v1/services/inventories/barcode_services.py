@@ -0,0 +1,243 @@
+import secrets
+import string
+from flask import g, current_app
+from os import getenv
+from threading import Lock
+from supabase import PostgrestAPIError
+from api.v1.utils.cache import TTLCache
+from api.v1.services.inventories.bom_services import BOM_MISS_RELOAD_AGE, get_bom_graph
+from api.v1.services.inventories.stock_services import ID_CHUNK_SIZE
+
+# Scanned barcodes are cached per worker process. Box writes made through this
+# API (sales, reverted sales) drop the affected entries; the TTL bounds how
+# long another worker can serve a stale quantity.
+BARCODE_CACHE_TTL = int(getenv('BARCODE_CACHE_TTL', 300))
+BARCODE_CACHE_SIZE = int(getenv('BARCODE_CACHE_SIZE', 10000))
+# most codes accepted by one bulk resolve call
+BARCODE_RESOLVE_MAX = 1000
+
+_barcode_cache = TTLCache(maxsize=BARCODE_CACHE_SIZE, ttl=BARCODE_CACHE_TTL)
+
+BARCODE_SELECT = 'barcode, box_id, boxes!inner(contents_id, contents_type, quantity_in_box)'
+
+# New box barcodes are QR-{sku}-{batch_number}-{sequence}{check}: the sequence
+# number of the box in Crockford base32, and a Luhn mod 32 check character.
+# All boxes share one counter, so the suffix alone is unique: SKUs and batch
+# numbers may contain '-', which makes the text before it ambiguous ("A-1" +
+# "B-2" and "A" + "1-B-2" give the same prefix). Sequence numbers are reserved
+# from the database in blocks of at least BARCODE_BLOCK_SIZE and handed out
+# from memory.
+BARCODE_SEQUENCE_SCOPE = 'box'
+BARCODE_ALPHABET = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+BARCODE_BLOCK_SIZE = int(getenv('BARCODE_BLOCK_SIZE', 32))
+
+# PostgREST/Postgres errors of a database without migrations/002_barcode_sequences.sql:
+# unknown function, undefined function, undefined table
+MISSING_SEQUENCE_ERRORS = ('PGRST202', '42883', '42P01')
+# rounds of redrawing colliding random barcodes before giving up
+RANDOM_BARCODE_ATTEMPTS = 5
+
+# [next sequence number, end of the reserved block] of this worker
+_reserved_block = (0, 0)
+_block_lock = Lock()
+
+
+def _item_name(graph, contents_type: str, contents_id: str):
+    if contents_type == 'product':
+        index = graph.product_index.get(contents_id)
+        return None if index is None else graph.product_info[index]['name']
+    index = graph.component_index.get(contents_id)
+    return None if index is None else graph.component_info[index]['name']
+
+
+def _build_result(row: dict, graph) -> dict | None:
+    """Scanner payload of a barcodes row; None when its product/component no longer exists."""
+    box = row['boxes']
+    name = _item_name(graph, box['contents_type'], box['contents_id'])
+    if name is None:
+        graph = get_bom_graph(max_age=BOM_MISS_RELOAD_AGE, fresh_stock=False)
+        name = _item_name(graph, box['contents_type'], box['contents_id'])
+        if name is None:
+            return None
+
+    is_product = box['contents_type'] == 'product'
+    return {
+        "barcode": row['barcode'],
+        "box_id": row['box_id'],
+        "boxes": {
+            "product_id": box['contents_id'] if is_product else None,
+            "product_name": name if is_product else None,
+            "component_id": None if is_product else box['contents_id'],
+            "component_name": None if is_product else name,
+            "quantity_in_box": box['quantity_in_box']
+        }
+    }
+
+
+def resolve_barcodes(barcodes: list) -> tuple[dict, list]:
+    """
+    Resolve scanned barcodes to their box and item.
+
+    Cached codes are answered from memory; the rest are fetched with one
+    service-role `in_` query per ID_CHUNK_SIZE codes, and item names come from
+    the cached BOM graph instead of a second query. Returns
+    ({barcode: result}, [barcodes not found]).
+    """
+    resolved = {}
+    missing = []
+    for barcode in dict.fromkeys(barcodes):
+        cached = _barcode_cache.get(barcode)
+        if cached is None:
+            missing.append(barcode)
+        else:
+            resolved[barcode] = cached
+
+    if missing:
+        # only names are read from the graph, stock levels may be stale
+        graph = get_bom_graph(fresh_stock=False)
+        for start in range(0, len(missing), ID_CHUNK_SIZE):
+            # Use SERVICE client (bypasses RLS)
+            rows = g.service_supabase_client.from_('barcodes').select(BARCODE_SELECT) \
+                .in_('barcode', missing[start:start + ID_CHUNK_SIZE]).execute().data or []
+            for row in rows:
+                result = _build_result(row, graph)
+                if result is not None:
+                    _barcode_cache.set(row['barcode'], result)
+                    resolved[row['barcode']] = result
+
+    return resolved, [barcode for barcode in missing if barcode not in resolved]
+
+
+def resolve_barcode(barcode: str) -> dict | None:
+    """Resolve a single scanned barcode; None when it is unknown."""
+    resolved, _ = resolve_barcodes([barcode])
+    return resolved.get(barcode)
+
+
+def invalidate_boxes(box_ids):
+    """Drop cached scans of boxes whose quantity or status just changed."""
+    box_ids = set(box_ids)
+    if box_ids:
+        _barcode_cache.pop_where(lambda result: result['box_id'] in box_ids)
+
+
+def encode_sequence(number: int) -> str:
+    """Crockford base32 of a positive sequence number followed by its check character."""
+    digits = ''
+    while number:
+        number, digit = divmod(number, 32)
+        digits = BARCODE_ALPHABET[digit] + digits
+    digits = digits or '0'
+    return digits + check_character(digits)
+
+
+def check_character(digits: str) -> str:
+    """
+    Luhn mod 32 check character: catches any single mistyped character and
+    most swaps of adjacent characters.
+    """
+    total = 0
+    for position, char in enumerate(reversed(digits)):
+        value = BARCODE_ALPHABET.index(char)
+        if position % 2 == 0:
+            value *= 2
+            value = value // 32 + value % 32
+        total += value
+    return BARCODE_ALPHABET[-total % 32]
+
+
+def is_valid_sequence(code: str) -> bool:
+    """Whether the base32 suffix of a barcode carries a matching check character."""
+    code = code.upper()
+    return (len(code) >= 2 and all(char in BARCODE_ALPHABET for char in code)
+            and check_character(code[:-1]) == code[-1])
+
+
+def reserve_sequence_block(scope: str, count: int) -> int:
+    """
+    Reserve `count` consecutive sequence numbers of a scope and return the first.
+
+    One call to the reserve_barcode_block RPC (migrations/002_barcode_sequences.sql),
+    which bumps the scope's counter under its row lock, so concurrent workers
+    never get overlapping blocks.
+    """
+    # Use SERVICE client (bypasses RLS), the counters are not user data
+    first = g.service_supabase_client.rpc('reserve_barcode_block', {
+        'p_scope': scope,
+        'p_count': count
+    }).execute().data
+    if not isinstance(first, int):
+        raise Exception("Failed to reserve barcode sequence numbers")
+    return first
+
+
+def allocate_barcodes(sku: str, batch_number: str, count: int) -> list:
+    """
+    `count` new, unique box barcodes for a SKU/batch.
+
+    Numbers left in this worker's block are used first; the rest is reserved
+    with a single RPC call (at least BARCODE_BLOCK_SIZE numbers, the remainder
+    kept for the next intake), whatever the count. Numbers reserved but never
+    used only leave gaps in the sequence. On a database without the RPC, the
+    codes are random instead (random_barcodes).
+    """
+    global _reserved_block
+    prefix = f"QR-{sku}-{batch_number}-"
+    with _block_lock:
+        next_number, end = _reserved_block
+        _reserved_block = (0, 0)
+    numbers = list(range(next_number, min(end, next_number + count)))
+
+    if len(numbers) < count:
+        needed = count - len(numbers)
+        try:
+            first = reserve_sequence_block(BARCODE_SEQUENCE_SCOPE, max(needed, BARCODE_BLOCK_SIZE))
+        except PostgrestAPIError as e:
+            if e.code not in MISSING_SEQUENCE_ERRORS:
+                raise
+            current_app.logger.warning(
+                "reserve_barcode_block is not deployed (migrations/002_barcode_sequences.sql), "
+                "using random barcodes"
+            )
+            return [prefix + encode_sequence(number) for number in numbers] \
+                + random_barcodes(sku, batch_number, needed)
+        numbers.extend(range(first, first + needed))
+        next_number, end = first + needed, first + max(needed, BARCODE_BLOCK_SIZE)
+    else:
+        next_number += count
+
+    if next_number < end:
+        with _block_lock:
+            # keep the larger remainder when another request left one meanwhile
+            if end - next_number > _reserved_block[1] - _reserved_block[0]:
+                _reserved_block = (next_number, end)
+    return [prefix + encode_sequence(number) for number in numbers]
+
+
+def random_barcodes(sku: str, batch_number: str, count: int) -> list:
+    """
+    `count` box barcodes with a random 6 character suffix, QR-{sku}-{batch_number}-{suffix},
+    as intake generated them before barcode_sequences. Drawn codes are checked
+    against the barcodes table, one query per ID_CHUNK_SIZE codes, and the
+    ones already taken are drawn again.
+    """
+    alphabet = string.ascii_uppercase + string.digits
+    codes = set()
+    for _ in range(RANDOM_BARCODE_ATTEMPTS):
+        drawn = set()
+        while len(codes) + len(drawn) < count:
+            code = f"QR-{sku}-{batch_number}-{''.join(secrets.choice(alphabet) for _ in range(6))}"
+            if code not in codes:
+                drawn.add(code)
+        drawn = list(drawn)
+
+        taken = set()
+        for start in range(0, len(drawn), ID_CHUNK_SIZE):
+            # Use SERVICE client (bypasses RLS), codes must be unique across all boxes
+            rows = g.service_supabase_client.from_('barcodes').select('barcode') \
+                .in_('barcode', drawn[start:start + ID_CHUNK_SIZE]).execute().data or []
+            taken.update(row['barcode'] for row in rows)
+        codes.update(code for code in drawn if code not in taken)
+        if len(codes) == count:
+            return list(codes)
+    raise Exception("Failed to generate unique barcodes")
@@ -0,0 +1,328 @@
+from pydantic import BaseModel, Field
+from typing import Optional, List
+from flask import g
+from api.v1.utils.pagination import iter_rows
+from os import getenv
+from threading import Lock
+import math
+import time
+
+# The catalog graph (products, components, BOM lines) rarely changes; stock
+# levels change on every intake and sale. Both are cached per worker process:
+# writes made through this API invalidate them immediately, other workers pick
+# the change up after the TTL.
+# The graph is shared by every caller of the worker, so it is loaded with the
+# service client; reads served to users are narrowed to the rows the caller's
+# own client can see (visible_items()).
+BOM_CACHE_TTL = int(getenv('BOM_CACHE_TTL', 300))
+BOM_STOCK_TTL = int(getenv('BOM_STOCK_TTL', 30))
+# an unknown id reloads the catalog, at most this often
+BOM_MISS_RELOAD_AGE = 10
+# orders whose lines still need material
+OPEN_ORDER_STATUSES = ['pending', 'processing']
+
+
+class MRPItemSchema(BaseModel):
+    product_id: str
+    quantity: int = Field(..., gt=0)
+
+    class Config:
+        extra = "forbid"
+
+
+class MRPRequestSchema(BaseModel):
+    order_ids: Optional[List[str]] = None
+    items: Optional[List[MRPItemSchema]] = None
+    use_product_stock: bool = True
+    buffer_percent: float = Field(default=0, ge=0)
+
+    class Config:
+        extra = "forbid"
+
+
+class BOMGraph:
+    """
+    Compact product -> component graph.
+
+    Products and components are indexed 0..n-1; the BOM is kept as flat
+    CSR-style arrays (bom_start[p]..bom_start[p + 1] are the lines of
+    product p, with component index and quantity per line), so a pass over
+    every product is one loop over plain lists.
+    """
+
+    def __init__(self, products: list, components: list, bom_lines: list):
+        self.product_ids = [p['product_id'] for p in products]
+        self.product_info = [{"sku": p['sku'], "name": p['name']} for p in products]
+        self.product_index = {pid: i for i, pid in enumerate(self.product_ids)}
+
+        self.component_ids = [c['component_id'] for c in components]
+        self.component_info = [{"sku": c['sku'], "name": c['name']} for c in components]
+        self.component_index = {cid: i for i, cid in enumerate(self.component_ids)}
+
+        lines_by_product = [[] for _ in self.product_ids]
+        for line in bom_lines:
+            p = self.product_index.get(line['product_id'])
+            c = self.component_index.get(line['component_id'])
+            if p is not None and c is not None and line['quantity']:
+                lines_by_product[p].append((c, line['quantity']))
+
+        self.bom_start = [0]
+        self.bom_component = []
+        self.bom_quantity = []
+        for lines in lines_by_product:
+            for c, quantity in lines:
+                self.bom_component.append(c)
+                self.bom_quantity.append(quantity)
+            self.bom_start.append(len(self.bom_component))
+
+        self.product_stock = [p.get('stock_quantity') or 0 for p in products]
+        self.component_stock = [c.get('stock_quantity') or 0 for c in components]
+        self.loaded_at = time.monotonic()
+        self.stock_loaded_at = self.loaded_at
+        self.catalog_version = self.stock_version = None
+
+    def set_stock(self, products: list, components: list, loaded_at: float):
+        product_stock = list(self.product_stock)
+        component_stock = list(self.component_stock)
+        for p in products:
+            i = self.product_index.get(p['product_id'])
+            if i is not None:
+                product_stock[i] = p.get('stock_quantity') or 0
+        for c in components:
+            i = self.component_index.get(c['component_id'])
+            if i is not None:
+                component_stock[i] = c.get('stock_quantity') or 0
+        # swap whole lists so concurrent readers never see a half-updated vector
+        self.product_stock, self.component_stock = product_stock, component_stock
+        self.stock_loaded_at = loaded_at
+
+    def _component_entry(self, c: int, quantity: int, stock: list) -> dict:
+        return {
+            "component_id": self.component_ids[c],
+            **self.component_info[c],
+            "required_quantity": quantity,
+            "available_quantity": stock[c],
+        }
+
+    def components_needed(self, p: int, visible_components=None) -> list:
+        stock = self.component_stock
+        return [
+            self._component_entry(self.bom_component[i], self.bom_quantity[i], stock)
+            for i in range(self.bom_start[p], self.bom_start[p + 1])
+            if visible_components is None or self.component_ids[self.bom_component[i]] in visible_components
+        ]
+
+    def product_entry(self, p: int, visible_components=None) -> dict:
+        return {
+            "product_id": self.product_ids[p],
+            **self.product_info[p],
+            "stock_quantity": self.product_stock[p],
+            "components_needed": self.components_needed(p, visible_components),
+        }
+
+    def component_entry(self, c: int) -> dict:
+        return {
+            "component_id": self.component_ids[c],
+            **self.component_info[c],
+            "stock_quantity": self.component_stock[c],
+        }
+
+    def buildable(self, visible: tuple | None = None) -> list:
+        """
+        How many units of every product can be assembled from current component
+        stock, and which component runs out first. Products without a BOM get
+        None for both. `visible` (see visible_items()) limits the products
+        listed, and the limiting component is only named when it is visible.
+        """
+        stock = self.component_stock
+        start, components, quantities = self.bom_start, self.bom_component, self.bom_quantity
+        visible_products, visible_components = visible or (None, None)
+        result = []
+        for p in range(len(self.product_ids)):
+            if visible_products is not None and self.product_ids[p] not in visible_products:
+                continue
+            units = None
+            limiting = None
+            for i in range(start[p], start[p + 1]):
+                can_build = int(max(stock[components[i]], 0) // quantities[i])
+                if units is None or can_build < units:
+                    units, limiting = can_build, i
+            result.append({
+                "product_id": self.product_ids[p],
+                **self.product_info[p],
+                "stock_quantity": self.product_stock[p],
+                "buildable_quantity": units,
+                "limiting_component": (
+                    self._component_entry(components[limiting], quantities[limiting], stock)
+                    if limiting is not None and (visible_components is None
+                                                 or self.component_ids[components[limiting]] in visible_components)
+                    else None
+                ),
+            })
+        return result
+
+
+_graph = None
+# bumped by invalidate_bom(); a graph loaded under an older version is stale
+_catalog_version = 0
+_stock_version = 0
+_lock = Lock()
+
+
+def _load_graph() -> BOMGraph:
+    # SERVICE client: the cached graph is shared by all callers (see above)
+    client = g.service_supabase_client
+    started = time.monotonic()
+    products = list(iter_rows(client.from_('products').select('product_id, sku, name, stock_quantity'),
+                              'product_id', 'product_id', desc=False))
+    components = list(iter_rows(client.from_('components').select('component_id, sku, name, stock_quantity'),
+                                'component_id', 'component_id', desc=False))
+    bom_lines = list(iter_rows(client.from_('bom').select('id, product_id, component_id, quantity'),
+                               'id', 'id', desc=False))
+    graph = BOMGraph(products, components, bom_lines)
+    graph.loaded_at = graph.stock_loaded_at = started
+    return graph
+
+
+def _load_stock() -> tuple:
+    client = g.service_supabase_client
+    products = iter_rows(client.from_('products').select('product_id, stock_quantity'),
+                         'product_id', 'product_id', desc=False)
+    components = iter_rows(client.from_('components').select('component_id, stock_quantity'),
+                           'component_id', 'component_id', desc=False)
+    return list(products), list(components)
+
+
+def get_bom_graph(max_age: float = BOM_CACHE_TTL, fresh_stock: bool = True) -> BOMGraph:
+    """
+    Return the cached BOM graph, reloading the catalog or just the stock levels
+    when stale. A smaller max_age forces a catalog reload of an older graph;
+    callers that only need names and ids can skip the stock refresh.
+
+    Loads run outside the lock, so a slow load never blocks other requests;
+    only swapping the result in is locked, and a load started earlier never
+    replaces the result of one started later.
+    """
+    global _graph
+    now = time.monotonic()
+    catalog_version, stock_version = _catalog_version, _stock_version
+    graph = _graph
+    if graph is None or graph.catalog_version != catalog_version or now - graph.loaded_at > max_age:
+        graph = _load_graph()
+        graph.catalog_version, graph.stock_version = catalog_version, stock_version
+        with _lock:
+            if _graph is None or _graph.loaded_at < graph.loaded_at:
+                _graph = graph
+        return graph
+
+    if fresh_stock and (graph.stock_version != stock_version or now - graph.stock_loaded_at > BOM_STOCK_TTL):
+        products, components = _load_stock()
+        with _lock:
+            if graph.stock_loaded_at < now:
+                graph.set_stock(products, components, now)
+                graph.stock_version = stock_version
+    return graph
+
+
+def _visible_ids(table: str, key: str, ids) -> set:
+    query = g.supabase_user_client.from_(table).select(key)
+    if ids is None:
+        return {row[key] for row in iter_rows(query, key, key, desc=False)}
+    if not ids:
+        return set()
+    return {row[key] for row in query.in_(key, list(ids)).execute().data or []}
+
+
+def visible_items(product_ids=None, component_ids=None) -> tuple:
+    """
+    (product ids, component ids) the caller may read under RLS, all of them or
+    among the given ids: id-only queries with the caller's client, used to
+    narrow what the shared graph returns to users.
+    """
+    return (_visible_ids('products', 'product_id', product_ids),
+            _visible_ids('components', 'component_id', component_ids))
+
+
+def invalidate_bom(stock_only: bool = False):
+    """
+    Mark the cached graph as out of date. Use stock_only after update_stock,
+    the full invalidation after product, component or BOM writes.
+    """
+    global _catalog_version, _stock_version
+    if stock_only:
+        _stock_version += 1
+    else:
+        _catalog_version += 1
+
+
+def order_demand(order_ids: list | None = None) -> dict:
+    """
+    Ordered quantity per product over the given orders, or over every open
+    (pending/processing) order when no ids are given.
+    """
+    query = g.supabase_user_client.from_('orders').select('order_id, order_details(product_id, quantity)')
+    if order_ids:
+        query = query.in_('order_id', order_ids)
+    else:
+        query = query.in_('delivery_status', OPEN_ORDER_STATUSES)
+
+    demand = {}
+    for order in iter_rows(query, 'order_id', 'order_id', desc=False):
+        for line in order.get('order_details') or []:
+            demand[line['product_id']] = demand.get(line['product_id'], 0) + (line['quantity'] or 0)
+    return demand
+
+
+def material_requirements(demand: dict, use_product_stock: bool = True, buffer_percent: float = 0) -> dict:
+    """
+    Explode product demand through the BOM and net it against component stock.
+
+    Finished goods on hand are netted first (use_product_stock), the remaining
+    units are exploded per BOM line and summed per component in one pass.
+    Shortfalls get a suggested import quantity padded by buffer_percent.
+    """
+    graph = get_bom_graph()
+    start, components, quantities = graph.bom_start, graph.bom_component, graph.bom_quantity
+    required = [0] * len(graph.component_ids)
+
+    products = []
+    unknown_products = []
+    for product_id, ordered in demand.items():
+        p = graph.product_index.get(str(product_id))
+        if p is None:
+            unknown_products.append(product_id)
+            continue
+        on_hand = max(graph.product_stock[p], 0) if use_product_stock else 0
+        to_build = max(ordered - on_hand, 0)
+        for i in range(start[p], start[p + 1]):
+            required[components[i]] += to_build * quantities[i]
+        products.append({
+            "product_id": graph.product_ids[p],
+            **graph.product_info[p],
+            "ordered_quantity": ordered,
+            "on_hand_quantity": on_hand,
+            "to_build_quantity": to_build,
+            "has_bom": start[p + 1] > start[p],
+        })
+
+    stock = graph.component_stock
+    requirements = []
+    for c, quantity in enumerate(required):
+        if not quantity:
+            continue
+        shortfall = max(quantity - max(stock[c], 0), 0)
+        requirements.append({
+            "component_id": graph.component_ids[c],
+            **graph.component_info[c],
+            "required_quantity": quantity,
+            "available_quantity": stock[c],
+            "shortfall": shortfall,
+            "suggested_import_quantity": math.ceil(shortfall * (1 + buffer_percent / 100)) if shortfall else 0,
+        })
+    requirements.sort(key=lambda r: r["shortfall"], reverse=True)
+
+    return {
+        "products": products,
+        "components": requirements,
+        "unknown_products": unknown_products,
+    }
@@ -0,0 +1,291 @@
+from flask import g
+from os import getenv
+from concurrent.futures import ProcessPoolExecutor
+from threading import Lock, Thread
+from api.v1.utils.disk_cache import DiskCache, default_cache_dir
+from api.v1.utils.label_templates import LABEL_TEMPLATES
+from api.v1.utils.pdf_generator import encode_qr_chunk, generate_barcode_pdf
+from api.v1.utils.svg_generator import encode_svg_chunk, generate_barcode_svg
+from api.v1.utils.zpl_generator import generate_barcode_zpl
+from api.v1.utils.pagination import iter_rows
+from api.v1.services.inventories.bom_services import BOM_MISS_RELOAD_AGE, get_bom_graph
+from api.v1.services.inventories.stock_services import ID_CHUNK_SIZE
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import tempfile
+import time
+
+logger = logging.getLogger(__name__)
+
+# Generated label files are kept on local disk and evicted least recently used
+# first (LABEL_CACHE_MAX_BYTES per format); a miss regenerates the file from
+# the stored barcodes rows.
+LABEL_CACHE_DIR = getenv('LABEL_CACHE_DIR') or default_cache_dir('labels')
+LABEL_CACHE_MAX_BYTES = int(getenv('LABEL_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+LABEL_PDF_PASSWORD = getenv('LABEL_PDF_PASSWORD', 'madison123')
+# sheet the PDF labels are laid out for (see label_templates.LABEL_TEMPLATES),
+# e.g. 'a4-24' for A4 24-up sticker sheets; cached PDFs are kept per template
+LABEL_TEMPLATE = getenv('LABEL_TEMPLATE', 'letter-5')
+
+# format -> mimetype; pdf is encrypted with LABEL_PDF_PASSWORD, zpl goes
+# straight to thermal printers, svg is for previews
+LABEL_FORMATS = {
+    'pdf': 'application/pdf',
+    'zpl': 'application/zpl',
+    'svg': 'image/svg+xml',
+}
+# formats that encode QR codes here and render large batches in the background
+BACKGROUND_FORMATS = ('pdf', 'svg')
+
+# Batches of at least LABEL_PARALLEL_MIN labels are rendered in the background:
+# QR encoding (most of the CPU time) runs in a process pool, LABEL_CHUNK_PAGES
+# pages per task, and the request only gets a job handle to poll.
+LABEL_RENDER_WORKERS = int(getenv('LABEL_RENDER_WORKERS', min(os.cpu_count() or 1, 4)))
+LABEL_PARALLEL_MIN = int(getenv('LABEL_PARALLEL_MIN', 300))
+LABEL_CHUNK_PAGES = int(getenv('LABEL_CHUNK_PAGES', 25))
+# a job whose status was not updated for this long is assumed dead and restarted
+LABEL_JOB_STALE_AFTER = 600
+# most boxes in a partial reprint (?box_ids=): one `in_` query, rendered inline
+LABEL_REPRINT_MAX_BOXES = ID_CHUNK_SIZE
+
+_label_caches = {}
+_render_pool = None
+_running_jobs = set()
+_jobs_lock = Lock()
+
+
+def label_cache(label_format: str = 'pdf') -> DiskCache:
+    cache = _label_caches.get(label_format)
+    if cache is None:
+        cache = _label_caches[label_format] = DiskCache(LABEL_CACHE_DIR, LABEL_CACHE_MAX_BYTES,
+                                                        suffix=f'.{label_format}')
+    return cache
+
+
+def label_filename(transaction_id: str, label_format: str = 'pdf', box_ids=None) -> str:
+    if box_ids:
+        return f"labels_{transaction_id}_{len(set(box_ids))}_boxes.{label_format}"
+    return f"labels_{transaction_id}.{label_format}"
+
+
+def box_set_digest(box_ids) -> str:
+    """Stable short digest of a set of box ids, whatever their order or repetitions."""
+    return hashlib.sha256(','.join(sorted(set(box_ids))).encode()).hexdigest()[:16]
+
+
+def _cache_key(transaction_id: str, label_format: str, box_ids=None) -> str:
+    """Cache key of a label file: the transaction, the box set of a partial reprint and the PDF template."""
+    key = f"{transaction_id}.{box_set_digest(box_ids)}" if box_ids else transaction_id
+    return f"{key}.{LABEL_TEMPLATE}" if label_format == 'pdf' else key
+
+
+def label_job(transaction_id: str, label_format: str = 'pdf') -> dict:
+    """What the intake response returns instead of the labels themselves."""
+    job = {
+        "job_id": transaction_id,
+        "format": label_format,
+        "url": f"/api/v1/stocks/labels/{transaction_id}.{label_format}",
+        "filename": label_filename(transaction_id, label_format),
+        "password_protected": label_format == 'pdf',
+    }
+    if label_format == 'pdf':
+        job["password_hint"] = f"Use '{LABEL_PDF_PASSWORD}' to open"
+        job["template"] = LABEL_TEMPLATE
+    return job
+
+
+def _item_name(contents_type: str, contents_id: str) -> str:
+    graph = get_bom_graph(fresh_stock=False)
+    if contents_id not in graph.product_index and contents_id not in graph.component_index:
+        graph = get_bom_graph(max_age=BOM_MISS_RELOAD_AGE, fresh_stock=False)
+    if contents_type == 'product':
+        index, info = graph.product_index, graph.product_info
+    else:
+        index, info = graph.component_index, graph.component_info
+    return info[index[contents_id]]['name'] if contents_id in index else contents_id
+
+
+def _load_labels(transaction_id: str, box_ids=None) -> dict | None:
+    """
+    Barcodes, item name and box quantity of an intake transaction, or of the
+    given boxes of it (at most LABEL_REPRINT_MAX_BOXES); None without barcodes.
+    """
+    # Use SERVICE client (bypasses RLS), as the barcode lookups do
+    query = g.service_supabase_client.from_('barcodes') \
+        .select('barcode, boxes!inner(quantity_in_box, contents_type, contents_id)') \
+        .eq('transaction_id', transaction_id)
+    if box_ids:
+        rows = query.in_('box_id', sorted(set(box_ids))).order('barcode').execute().data or []
+    else:
+        rows = list(iter_rows(query, 'barcode', 'barcode', desc=False))
+    if not rows:
+        return None
+
+    box = rows[0]['boxes']
+    quantities = [row['boxes']['quantity_in_box'] for row in rows]
+    return {
+        "item_name": _item_name(box['contents_type'], box['contents_id']),
+        "barcodes": [{"barcode": row['barcode'], "quantity_in_box": row['boxes']['quantity_in_box']} for row in rows],
+        # boxes sold since intake hold less; the header shows the most common quantity
+        "quantity_per_box": max(set(quantities), key=quantities.count),
+    }
+
+
+def _pool() -> ProcessPoolExecutor:
+    global _render_pool
+    with _jobs_lock:
+        if _render_pool is None:
+            # spawn: workers only need the label generators, not a copy of this worker's threads
+            _render_pool = ProcessPoolExecutor(max_workers=LABEL_RENDER_WORKERS,
+                                               mp_context=multiprocessing.get_context('spawn'))
+        return _render_pool
+
+
+def _status_path(transaction_id: str, label_format: str) -> str:
+    return os.path.join(label_cache(label_format).directory, f"{transaction_id}.{label_format}.job")
+
+
+def _write_status(transaction_id: str, label_format: str, **status):
+    """Job status lives next to the cached files, so any worker on the host can report it."""
+    status["updated_at"] = time.time()
+    fd, tmp_path = tempfile.mkstemp(dir=label_cache(label_format).directory, suffix='.tmp')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(status, f)
+    os.replace(tmp_path, _status_path(transaction_id, label_format))
+
+
+def _read_status(transaction_id: str, label_format: str) -> dict | None:
+    try:
+        with open(_status_path(transaction_id, label_format)) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _encode_qr_codes(barcodes: list, encoder, progress=None) -> list | None:
+    """Run encoder over page-aligned chunks in the process pool; None for small batches."""
+    if len(barcodes) < LABEL_PARALLEL_MIN or LABEL_RENDER_WORKERS <= 1:
+        return None
+    chunk_size = LABEL_CHUNK_PAGES * LABEL_TEMPLATES[LABEL_TEMPLATE].per_page
+    futures = [_pool().submit(encoder, barcodes[start:start + chunk_size])
+               for start in range(0, len(barcodes), chunk_size)]
+    encoded = []
+    for future in futures:
+        encoded.extend(future.result())
+        if progress:
+            progress(len(encoded))
+    return encoded
+
+
+def _render(transaction_id: str, labels: dict, batch_id: str, progress=None, label_format: str = 'pdf',
+            box_ids=None) -> str:
+    """
+    Render the labels in the given format and store them in the disk cache.
+    Large PDF and SVG batches have their QR codes encoded in the process pool.
+    """
+    header = {
+        "barcodes_data": labels["barcodes"],
+        "item_name": labels["item_name"],
+        "batch_id": batch_id,
+        "boxes_count": len(labels["barcodes"]),
+        "quantity_per_box": labels["quantity_per_box"],
+    }
+    if label_format == 'zpl':
+        # the printer encodes the QR codes
+        return label_cache('zpl').put(_cache_key(transaction_id, 'zpl', box_ids), generate_barcode_zpl(**header).encode())
+
+    barcodes = [label["barcode"] for label in labels["barcodes"]]
+    if label_format == 'svg':
+        qr_paths = _encode_qr_codes(barcodes, encode_svg_chunk, progress)
+        svg = generate_barcode_svg(**header, qr_paths=qr_paths)
+        return label_cache('svg').put(_cache_key(transaction_id, 'svg', box_ids), svg.encode())
+
+    qr_paths = _encode_qr_codes(barcodes, encode_qr_chunk, progress)
+    pdf = generate_barcode_pdf(**header, password=LABEL_PDF_PASSWORD, qr_paths=qr_paths, template=LABEL_TEMPLATE)
+    # pages are assembled and encrypted once, in this process
+    return label_cache('pdf').put(_cache_key(transaction_id, 'pdf', box_ids), pdf.getbuffer())
+
+
+def _run_job(transaction_id: str, labels: dict, batch_id: str, label_format: str):
+    total = len(labels["barcodes"])
+    try:
+        _write_status(transaction_id, label_format, status="rendering", done=0, total=total)
+        _render(transaction_id, labels, batch_id, label_format=label_format,
+                progress=lambda done: _write_status(transaction_id, label_format,
+                                                    status="rendering", done=done, total=total))
+        os.unlink(_status_path(transaction_id, label_format))
+    except Exception as e:
+        logger.error("Label rendering failed for transaction %s (%s): %s", transaction_id, label_format, e)
+        _write_status(transaction_id, label_format, status="failed", done=0, total=total, error=str(e))
+    finally:
+        with _jobs_lock:
+            _running_jobs.discard((transaction_id, label_format))
+
+
+def start_label_job(transaction_id: str, labels: dict, batch_id: str, label_format: str = 'pdf') -> dict:
+    """
+    Render the labels of a transaction on a background thread and return the
+    job status. Starting a job that is already running is a no-op.
+    """
+    with _jobs_lock:
+        if (transaction_id, label_format) not in _running_jobs:
+            _running_jobs.add((transaction_id, label_format))
+            _write_status(transaction_id, label_format, status="queued", done=0, total=len(labels["barcodes"]))
+            Thread(target=_run_job, args=(transaction_id, labels, batch_id, label_format),
+                   name=f"labels-{transaction_id}-{label_format}", daemon=True).start()
+    return label_job_status(transaction_id, label_format)
+
+
+def label_job_status(transaction_id: str, label_format: str = 'pdf') -> dict | None:
+    """Progress of a label job; None when there is neither a job nor a rendered file."""
+    if label_cache(label_format).get(_cache_key(transaction_id, label_format)) is not None:
+        return {**label_job(transaction_id, label_format), "status": "done"}
+    status = _read_status(transaction_id, label_format)
+    if status is None:
+        return None
+    return {**label_job(transaction_id, label_format), **status}
+
+
+def _job_in_progress(transaction_id: str, label_format: str) -> dict | None:
+    status = _read_status(transaction_id, label_format)
+    if status is None or status["status"] == "failed":
+        return None
+    if time.time() - status["updated_at"] > LABEL_JOB_STALE_AFTER:
+        return None
+    return {**label_job(transaction_id, label_format), **status}
+
+
+def get_labels(transaction_id: str, label_format: str = 'pdf', box_ids=None) -> tuple:
+    """
+    Labels of an intake transaction in the given format, as (path, job).
+
+    Cached files come back as a path. Otherwise the labels are loaded from the
+    stored barcodes and rendered inline (path), except large PDF/SVG batches
+    which render in the background (job status to poll). With box_ids only
+    those boxes are reprinted, always inline; the file is cached under the
+    digest of the box set. (None, None) when the transaction does not exist
+    (for the caller) or has no barcodes (among box_ids).
+    """
+    transaction = g.supabase_user_client.from_('inventory_transactions') \
+        .select('transaction_id, batch_id').eq('transaction_id', transaction_id).execute().data
+    if not transaction:
+        return None, None
+
+    path = label_cache(label_format).get(_cache_key(transaction_id, label_format, box_ids))
+    if path is not None:
+        return path, None
+    if not box_ids:
+        job = _job_in_progress(transaction_id, label_format)
+        if job is not None:
+            return None, job
+
+    labels = _load_labels(transaction_id, box_ids)
+    if labels is None:
+        return None, None
+    if not box_ids and label_format in BACKGROUND_FORMATS and len(labels["barcodes"]) >= LABEL_PARALLEL_MIN:
+        return None, start_label_job(transaction_id, labels, transaction[0]['batch_id'], label_format)
+    return _render(transaction_id, labels, transaction[0]['batch_id'], label_format=label_format,
+                   box_ids=box_ids), None
@@ -0,0 +1,128 @@
+from flask import g
+
+# Boxes hold either a product or a component (contents_type + contents_id),
+# so there is no foreign key to embed item details from; they are fetched
+# with one `in_` query per item table instead of one query per item.
+ITEM_TABLES = {
+    'product': ('products', 'product_id'),
+    'component': ('components', 'component_id'),
+}
+# keeps the `in_` filter well below URL length limits
+ID_CHUNK_SIZE = 200
+
+
+def _stock_totals(location_id: str | None = None, by_shelf: bool = False) -> dict:
+    """
+    In-stock quantities per (location_id, contents_type, contents_id) and,
+    with by_shelf, per shelf_code as well. The boxes are summed in the
+    database by the stock_by_location RPC (migrations/005_stock_by_location.sql),
+    one call returning one row per group.
+    """
+    rows = g.supabase_user_client.rpc('stock_by_location', {
+        'p_location_id': location_id,
+        'p_by_shelf': by_shelf
+    }).execute().data or []
+
+    totals = {}
+    for row in rows:
+        key = (row['location_id'] or 'unassigned', row['contents_type'], row['contents_id'])
+        entry = totals.setdefault(key, {"quantity": 0, "shelves": {}})
+        entry["quantity"] += row['quantity']
+        if by_shelf:
+            shelf = row['shelf_code'] or 'unassigned'
+            entry["shelves"][shelf] = entry["shelves"].get(shelf, 0) + row['quantity']
+    return totals
+
+
+def _item_details(item_keys) -> dict:
+    """Map (contents_type, contents_id) to {sku, name} with one query per item table."""
+    ids = {}
+    for contents_type, contents_id in item_keys:
+        ids.setdefault(contents_type, set()).add(contents_id)
+
+    details = {}
+    for contents_type, item_ids in ids.items():
+        if contents_type not in ITEM_TABLES:
+            continue
+        table, id_column = ITEM_TABLES[contents_type]
+        item_ids = sorted(item_ids)
+        for start in range(0, len(item_ids), ID_CHUNK_SIZE):
+            rows = g.supabase_user_client.from_(table).select(f'{id_column}, sku, name') \
+                .in_(id_column, item_ids[start:start + ID_CHUNK_SIZE]).execute().data or []
+            for row in rows:
+                details[(contents_type, row[id_column])] = {"sku": row['sku'], "name": row['name']}
+    return details
+
+
+def _item_entry(contents_type: str, contents_id: str, details: dict) -> dict:
+    # items deleted since the box was received still show up, without sku/name
+    info = details.get((contents_type, contents_id), {})
+    id_column = ITEM_TABLES.get(contents_type, (None, 'contents_id'))[1]
+    return {id_column: contents_id, "sku": info.get('sku'), "name": info.get('name')}
+
+
+def get_stock_by_location(location_id: str, by_shelf: bool = False):
+    """
+    Get the quantity of each product and component stored at a location.
+
+    Costs a constant number of queries: the location, its in-stock totals and
+    one lookup per item table. Returns None when the location does not exist.
+    With by_shelf, every item also carries a {shelf_code: quantity} breakdown.
+    """
+    location = g.supabase_user_client.from_('locations').select('*').eq('id', location_id).execute().data
+    if not location:
+        return None
+
+    totals = _stock_totals(location_id, by_shelf)
+    details = _item_details((contents_type, contents_id) for _, contents_type, contents_id in totals)
+
+    products = []
+    components = []
+    for (_, contents_type, contents_id), entry in totals.items():
+        item = _item_entry(contents_type, contents_id, details)
+        item["stock_quantity"] = entry["quantity"]
+        if by_shelf:
+            item["shelves"] = entry["shelves"]
+        (products if contents_type == 'product' else components).append(item)
+
+    return {
+        "location": location[0],
+        "products": products,
+        "components": components
+    }
+
+
+def get_stock_matrix(by_shelf: bool = False) -> dict:
+    """
+    Quantities of every item at every location in one call.
+
+    Only in_stock boxes count. Returns the locations and one row per item
+    with its total and a {location_id: quantity} map (plus
+    {location_id: {shelf_code: quantity}} with by_shelf). Locations without
+    stock are listed but have no cells.
+    """
+    locations = g.supabase_user_client.from_('locations').select('*').execute().data or []
+    totals = _stock_totals(by_shelf=by_shelf)
+    details = _item_details((contents_type, contents_id) for _, contents_type, contents_id in totals)
+
+    items = {}
+    for (location_id, contents_type, contents_id), entry in totals.items():
+        item = items.get((contents_type, contents_id))
+        if item is None:
+            item = items[(contents_type, contents_id)] = {
+                "contents_type": contents_type,
+                **_item_entry(contents_type, contents_id, details),
+                "total_quantity": 0,
+                "quantities": {},
+            }
+            if by_shelf:
+                item["shelves"] = {}
+        item["total_quantity"] += entry["quantity"]
+        item["quantities"][location_id] = entry["quantity"]
+        if by_shelf:
+            item["shelves"][location_id] = entry["shelves"]
+
+    return {
+        "locations": locations,
+        "items": list(items.values())
+    }
@@ -1,8 +1,22 @@
 from pydantic import BaseModel, Field
-from typing import Optional, Literal
-from flask import g
-import secrets
-import string
+from typing import Optional, Literal, List
+from flask import g, current_app
+from os import getenv
+from postgrest.types import ReturnMethod
+from supabase import PostgrestAPIError
+from api.v1.utils.caller_context import get_caller_employee_id
+from api.v1.services.inventories.bom_services import BOM_MISS_RELOAD_AGE, get_bom_graph, invalidate_bom, visible_items
+from api.v1.services.inventories.barcode_services import allocate_barcodes, invalidate_boxes
+from api.v1.services.inventories.stock_services import ID_CHUNK_SIZE
+
+# most events accepted by one sync call
+SCAN_SYNC_MAX = 5000
+# times a sync batch is re-read and replayed when another request applied
+# some of its events first (see migrations/001_scan_events.sql)
+SCAN_SYNC_ATTEMPTS = int(getenv('SCAN_SYNC_ATTEMPTS', 3))
+UNIQUE_VIOLATION = '23505'
+# SQLSTATE of a `raise exception` in an RPC: the request was checked and refused
+RPC_REJECTED = 'P0001'
 
 class BoxCreateSchema(BaseModel):
     contents_id: str
@@ -35,133 +49,102 @@ class TransactionCreateSchema(BaseModel):
     class Config:
         extra = "forbid"
 
+class ScanEventSchema(BaseModel):
+    event_id: str
+    device_id: str
+    barcode: str
+    action: Literal['scan', 'sell', 'damage']
+    quantity: int = Field(default=1, gt=0)
+    scanned_at: str
+    order_id: Optional[str] = None
 
-def generate_barcode(sku, batch_number) -> str:
-    """
-    Generate a unique barcode for the box.
-    """
-    random_string = ''.join(secrets.choice(string.ascii_uppercase + string.digits) for _ in range(6))
-    return f"QR-{sku}-{batch_number}-{random_string}"
+    class Config:
+        extra = "forbid"
+
+class ScanSyncSchema(BaseModel):
+    events: List[ScanEventSchema] = Field(..., min_length=1, max_length=SCAN_SYNC_MAX)
+
+    class Config:
+        extra = "forbid"
+
+
+def update_stock(contents_type: str, contents_id: str, quantity_change: int):
+    """Adjust the stock_quantity of a product or component through the update_stock RPC."""
+    g.supabase_user_client.rpc('update_stock', {
+        'p_contents_type': contents_type,
+        'p_contents_id': contents_id,
+        'p_quantity_change': quantity_change
+    }).execute()
+    invalidate_bom(stock_only=True)
 
 
 def add_new_stock(data: dict):
     """
     Add new stock to the inventory.
-    """
-    """Algorithm
 
-    1. Validate input
-    2. Check the type of stock
-    
+    The number of Supabase calls does not depend on boxes_count:
+    item + batch metadata, at most one barcode block reservation (see
+    barcode_services.allocate_barcodes) and one call to the intake_stock RPC
+    (migrations/004_intake_stock.sql), which inserts the boxes, updates the
+    stock total, records the inventory transaction and the box barcodes
+    linked to it in one database transaction: either all of it is written or
+    none of it.
     """
     table = 'products' if data['contents_type'] == 'product' else 'components'
     item_query = g.supabase_user_client.from_(table) \
-        .select('name').eq(data['contents_type'] + '_id', data['contents_id']).execute()
+        .select('name, sku').eq(data['contents_type'] + '_id', data['contents_id']).execute()
 
     if not item_query.data:
         raise Exception("Item not found")
 
     item_name = item_query.data[0]['name']
-    sku = g.supabase_user_client.from_(table).select('sku').eq(data['contents_type'] + '_id', data['contents_id']).execute().data[0]['sku']
-    batch_number = g.supabase_user_client.from_('import_batches').select('batch_number').eq('batch_id', data['batch_id']).execute().data[0]['batch_number']
-
-    # validate_stock = BoxCreateSchema(
-    #     content_type=data['contents_type'], 
-    #     content_id=data['contents_id'], 
-    #     quantity_in_box=data['quantity_in_box'], 
-    #     status=data['status'],
-    #     batch_id=data['batch_id'],
-    #     location_id=data['location_id'],
-    #     shelf_code=data['shelf_code']
-    # )
+    sku = item_query.data[0]['sku']
+    batch_query = g.supabase_user_client.from_('import_batches').select('batch_number').eq('batch_id', data['batch_id']).execute()
+    if not batch_query.data:
+        raise Exception("Import batch not found")
+    batch_number = batch_query.data[0]['batch_number']
+
+    created_by = get_caller_employee_id()
+    if not created_by:
+        raise Exception("Employee record not found")
 
     validate_stock = BoxCreateSchema(**data)
 
     stock_data = validate_stock.model_dump()
-    all_stocks = [stock_data.copy() for _ in range(data['boxes_count'])]
-    all_barcodes = set()
-    for stock in all_stocks:
-         stock['barcode'] = generate_barcode(sku, batch_number)
-         all_barcodes.add(stock['barcode'])
-
-    response = g.supabase_user_client.from_('boxes').insert(all_stocks).execute()
-    if response.data and len(response.data) == data['boxes_count']:
-        # g.supabase_user_client.rpc(update_prod) #add function to update product stock
-        g.supabase_user_client.rpc('update_stock', {
-            'p_contents_type': data['contents_type'], 
-            'p_contents_id': data['contents_id'], 
-            'p_quantity_change': data['boxes_count'] * data['quantity_in_box']
-        }).execute()
-
-        created_by = g.supabase_user_client.from_('employees').select('id').eq('user_id', g.current_user).execute().data[0]['id']
-
-        transaction_data = {
-            "type": "inbound",
-            "batch_id": data['batch_id'],
-            "notes": f'Added {data["boxes_count"]} new boxes of {data["contents_type"]} {sku}',
-            "created_by": created_by
-        }
+    barcodes = allocate_barcodes(sku, batch_number, data['boxes_count'])
 
-        validated_transaction = TransactionCreateSchema(**transaction_data)
-        transaction = validated_transaction.model_dump()
-        create_transaction = g.supabase_user_client.from_('inventory_transactions').insert(transaction).execute()
-        if not create_transaction.data:
-            raise Exception("Failed to create inventory transaction")
-
-        return {
-            "boxes": response.data,
-            "barcodes": list(all_barcodes),
-            "transaction": create_transaction.data[0],
-            "item_name": item_name,
-            "boxes_count": data['boxes_count']
-        }
-    
-    raise Exception("Failed to add new stock")
+    intake = g.supabase_user_client.rpc('intake_stock', {
+        'p_box': stock_data,
+        'p_barcodes': barcodes,
+        'p_created_by': created_by,
+        'p_notes': f'Added {data["boxes_count"]} new boxes of {data["contents_type"]} {sku}'
+    }).execute().data
+    invalidate_bom(stock_only=True)
 
+    if not intake or not intake.get('transaction') or len(intake.get('boxes') or []) != data['boxes_count']:
+        raise Exception("Failed to add new stock")
+
+    return {
+        "boxes": intake['boxes'],
+        "barcodes": [box['barcode'] for box in intake['boxes']],
+        "transaction": intake['transaction'],
+        "item_name": item_name,
+        "boxes_count": data['boxes_count']
+    }
 
 
 def get_all_stocks():
     """
     Check available stock for products and components with breakdown.
+    Served from the cached BOM graph (see bom_services), limited to the rows
+    the caller can read.
     """
-    products = g.supabase_user_client.from_('products').select(
-        'product_id, sku, name, stock_quantity, '
-        'bom(component_id, quantity, components(sku, name, stock_quantity))'
-    ).execute().data
-
-    # Fetch components
-    components = g.supabase_user_client.from_('components').select(
-        'component_id, sku, name, stock_quantity'
-    ).execute().data
-
-    # Format products with breakdown
-    product_stock = [
-        {
-            "product_id": p['product_id'],
-            "sku": p['sku'],
-            "name": p['name'],
-            "stock_quantity": p['stock_quantity'],
-            "components_needed": [
-                {
-                    "component_id": item['component_id'],
-                    "sku": item['components']['sku'],
-                    "name": item['components']['name'],
-                    "required_quantity": item['quantity'],
-                    "available_quantity": item['components']['stock_quantity']
-                } for item in p['bom'] or []
-            ]
-        } for p in products
-    ]
-
-    # Format components
-    component_stock = [
-        {
-            "component_id": c['component_id'],
-            "sku": c['sku'],
-            "name": c['name'],
-            "stock_quantity": c['stock_quantity']
-        } for c in components
-    ]
+    graph = get_bom_graph()
+    products, components = visible_items()
+    product_stock = [graph.product_entry(p, components) for p, product_id in enumerate(graph.product_ids)
+                     if product_id in products]
+    component_stock = [graph.component_entry(c) for c, component_id in enumerate(graph.component_ids)
+                       if component_id in components]
 
     return {
         "products": product_stock,
@@ -174,45 +157,25 @@ def get_stock_by_id(product_id: str):
     """
     Get stock details for a specific product or component by ID.
     """
+    product_id = str(product_id)
+    graph = get_bom_graph()
+    if product_id not in graph.product_index and product_id not in graph.component_index:
+        # may have been created by another worker since the graph was loaded
+        graph = get_bom_graph(max_age=BOM_MISS_RELOAD_AGE)
+
     # Check if the ID belongs to a product
-    product = g.supabase_user_client.from_('products').select(
-        'product_id, sku, name, stock_quantity, '
-        'bom(component_id, quantity, components(sku, name, stock_quantity))'
-    ).eq('product_id', product_id).execute().data
-
-    if product:
-        p = product[0]
-        return {
-            "type": "product",
-            "product_id": p['product_id'],
-            "sku": p['sku'],
-            "name": p['name'],
-            "stock_quantity": p['stock_quantity'],
-            "components_needed": [
-                {
-                    "component_id": item['component_id'],
-                    "sku": item['components']['sku'],
-                    "name": item['components']['name'],
-                    "required_quantity": item['quantity'],
-                    "available_quantity": item['components']['stock_quantity']
-                } for item in p['bom'] or []
-            ]
-        }
+    if product_id in graph.product_index:
+        p = graph.product_index[product_id]
+        bom_components = {graph.component_ids[c] for c in graph.bom_component[graph.bom_start[p]:graph.bom_start[p + 1]]}
+        products, components = visible_items([product_id], bom_components)
+        if products:
+            return {"type": "product", **graph.product_entry(p, components)}
 
     # Check if the ID belongs to a component
-    component = g.supabase_user_client.from_('components').select(
-        'component_id, sku, name, stock_quantity'
-    ).eq('component_id', product_id).execute().data
-
-    if component:
-        c = component[0]
-        return {
-            "type": "component",
-            "component_id": c['component_id'],
-            "sku": c['sku'],
-            "name": c['name'],
-            "stock_quantity": c['stock_quantity']
-        }
+    elif product_id in graph.component_index:
+        _, components = visible_items([], [product_id])
+        if components:
+            return {"type": "component", **graph.component_entry(graph.component_index[product_id])}
 
     raise Exception("Product or Component not found")
 
@@ -229,153 +192,322 @@ def sell_stock(data: list):
             "order_id": "uuid"   ← same for all items in batch
         }
     ]
+
+    The sale is a single call to the sell_boxes RPC (migrations/003_sell_boxes.sql),
+    which locks and checks every box, then writes the boxes, the stock totals
+    and the outbound transaction in one database transaction: either the
+    whole batch is sold or nothing is written.
     """
     if not isinstance(data, list) or len(data) == 0:
         raise ValueError("Expected non-empty list of items to sell")
 
-    sold_boxes = []
-    
     # Get employee ID for transaction
-    employee_res = g.supabase_user_client.from_('employees') \
-        .select('id').eq('user_id', g.current_user).single().execute()
-    
-    if not employee_res.data:
+    created_by = get_caller_employee_id()
+    if not created_by:
         raise Exception("Employee record not found")
-    
-    created_by = employee_res.data['id']
-
-    total_sold = 0
 
-    # Process each item in the batch
+    requested = {}
     for item in data:
         box_id = item.get("box_id")
         requested_qty = item.get("requested_quantity")
-        order_id = item.get("order_id")
 
         if not box_id or not isinstance(requested_qty, int) or requested_qty <= 0:
             raise ValueError(f"Invalid item data: {item}")
+        # the same box may appear more than once in a batch
+        requested[box_id] = requested.get(box_id, 0) + requested_qty
 
-        # Fetch box (must be in_stock)
-        box_res = g.supabase_user_client.from_('boxes') \
-            .select('*') \
-            .eq('box_id', box_id) \
-            .eq('status', 'in_stock') \
-            .single().execute()
+    try:
+        sale = g.supabase_user_client.rpc('sell_boxes', {
+            'p_items': [{"box_id": box_id, "requested_quantity": qty} for box_id, qty in requested.items()],
+            'p_order_id': data[0].get("order_id"),  # All items should have same order_id
+            'p_created_by': created_by
+        }).execute().data
+    except PostgrestAPIError as e:
+        if e.code == RPC_REJECTED:
+            raise ValueError(e.message)
+        raise Exception(f"Transaction failed: {e.message}")
+    finally:
+        invalidate_boxes(requested)
+        invalidate_bom(stock_only=True)
+
+    if not sale or not sale.get('transaction'):
+        raise Exception("Failed to record transaction")
 
-        if not box_res.data:
-            raise ValueError(f"Box {box_id} not found or not available for sale")
+    return {
+        "sold_boxes": sale['sold_boxes'],
+        "total_units_sold": sale['total_units_sold'],
+        "transaction Recorded": True
+    }
 
-        box = box_res.data
 
-        if requested_qty > box['quantity_in_box']:
-            raise ValueError(
-                f"Requested {requested_qty} but only {box['quantity_in_box']} available in box {box_id}"
+def _update_boxes(changes: list, put_back: bool = True) -> list:
+    """
+    Write the new quantity_in_box and status of boxes, given as (before, after)
+    pairs. Only those two columns are written, and only to boxes that still
+    hold their `before` values: boxes with the same change are updated
+    together, one conditional update per ID_CHUNK_SIZE boxes.
+
+    Returns the pairs written. If any box was changed by someone else in
+    between, the boxes already written are put back (unless `put_back` is
+    False, as when this is itself putting boxes back) and a ValueError is
+    raised; any other error puts them back and is re-raised.
+    """
+    groups = {}
+    for before, after in changes:
+        key = (before['quantity_in_box'], before['status'], after['quantity_in_box'], after['status'])
+        groups.setdefault(key, []).append((before, after))
+
+    written = []
+    conflicts = []
+    try:
+        for (quantity, status, new_quantity, new_status), pairs in groups.items():
+            for start in range(0, len(pairs), ID_CHUNK_SIZE):
+                chunk = pairs[start:start + ID_CHUNK_SIZE]
+                rows = g.supabase_user_client.from_('boxes') \
+                    .update({"quantity_in_box": new_quantity, "status": new_status}) \
+                    .in_('box_id', [before['box_id'] for before, _ in chunk]) \
+                    .eq('quantity_in_box', quantity) \
+                    .eq('status', status) \
+                    .execute().data or []
+                updated = {row['box_id'] for row in rows}
+                for pair in chunk:
+                    (written if pair[0]['box_id'] in updated else conflicts).append(pair)
+    except Exception:
+        # a later group failed: the earlier groups must not stay written
+        if put_back:
+            _put_back_boxes(written)
+        raise
+    finally:
+        invalidate_boxes(before['box_id'] for before, _ in changes)
+
+    if conflicts:
+        if put_back:
+            _put_back_boxes(written)
+        raise ValueError(
+            f"Box(es) {', '.join(before['box_id'] for before, _ in conflicts)} changed while this request "
+            f"was processed, try again"
+        )
+    return written
+
+
+def _put_back_boxes(written: list):
+    """Undo the (before, after) box writes of a failed _update_boxes, logging what could not be undone."""
+    if not written:
+        return
+    try:
+        _update_boxes([(after, before) for before, after in written], put_back=False)
+    except Exception as e:
+        current_app.logger.error(f"Failed to put back boxes {[before['box_id'] for before, _ in written]}: {str(e)}")
+
+
+def _revert_sale(box_changes: list, applied_changes: dict):
+    """
+    Put boxes and stock totals back after a failed scanner sync. Each stock
+    total is reverted even when the boxes or another total could not be.
+    """
+    _put_back_boxes(box_changes)
+    for (contents_type, contents_id), quantity_change in applied_changes.items():
+        try:
+            update_stock(contents_type, contents_id, -quantity_change)
+        except Exception as e:
+            current_app.logger.error(
+                f"Failed to revert stock of {contents_type} {contents_id} by {-quantity_change}: {str(e)}"
             )
 
-        # Update box
-        new_quantity = box['quantity_in_box'] - requested_qty
-        new_status = 'sold' if new_quantity == 0 else 'in_stock'
 
-        update_payload = {
-            "quantity_in_box": new_quantity,
-            "status": new_status
-        }
+def _scan_result(event, status: str, box: dict | None = None, message: str | None = None) -> dict:
+    result = {"event_id": event.event_id, "status": status}
+    if box is not None:
+        result.update(box_id=box['box_id'], quantity_in_box=box['quantity_in_box'], box_status=box['status'])
+    if message:
+        result["message"] = message
+    return result
 
-        g.supabase_user_client.from_('boxes') \
-            .update(update_payload) \
-            .eq('box_id', box_id) \
-            .execute()
-
-        # Reduce total stock via RPC
-        g.supabase_user_client.rpc('update_stock', {
-            'p_contents_type': box['contents_type'],
-            'p_contents_id': box['contents_id'],
-            'p_quantity_change': -requested_qty  # Negative = reduce
-        }).execute()
-
-        sold_boxes.append({
-            "box_id": box_id,
-            "sold_quantity": requested_qty,
-            "remaining_quantity": new_quantity,
-            "new_status": new_status
-        })
-
-        total_sold += requested_qty
-
-    # Create single outbound transaction for the whole batch
-    transaction_data = {
-        "type": "outbound",
-        "order_id": data[0].get("order_id"),  # All items should have same order_id
-        "notes": f"Sold {total_sold} units from {len(data)} box(es) for order",
-        "created_by": created_by
-    }
 
-    try:
-        validated = TransactionCreateSchema(**transaction_data)
-        tx = validated.model_dump()
-        result = g.supabase_user_client.from_('inventory_transactions') \
-            .insert(tx).execute()
+def _applied_scan_events(event_ids: list) -> dict:
+    """Stored results of the events already applied, by event_id, one query per ID_CHUNK_SIZE ids."""
+    applied = {}
+    for start in range(0, len(event_ids), ID_CHUNK_SIZE):
+        # scan_events is bookkeeping of this API, written with the SERVICE client only
+        rows = g.service_supabase_client.from_('scan_events').select('event_id, result') \
+            .in_('event_id', event_ids[start:start + ID_CHUNK_SIZE]).execute().data or []
+        applied.update((row['event_id'], row['result']) for row in rows)
+    return applied
+
 
-        if not result.data:
-            raise Exception("Failed to record transaction")
+def _release_scan_events(event_ids: list):
+    """Forget events claimed by a batch that was reverted, so a retry applies them."""
+    try:
+        for start in range(0, len(event_ids), ID_CHUNK_SIZE):
+            g.service_supabase_client.from_('scan_events') \
+                .delete().in_('event_id', event_ids[start:start + ID_CHUNK_SIZE]).execute()
     except Exception as e:
-        raise Exception(f"Transaction failed: {str(e)}")
+        current_app.logger.error(f"Failed to release scan events {event_ids}: {str(e)}")
 
-    return {
-        "sold_boxes": sold_boxes,
-        "total_units_sold": total_sold,
-        "transaction Recorded": True
-    }
 
-def get_stock_by_location(location_id: str):
+def sync_scan_events(events: list) -> list:
     """
-    Get all stock entries at a specific location.
-    Get the number of each products and components available at that location.
+    Apply a batch of queued scanner events and return one result per event.
+
+    Events are deduplicated by event_id, within the batch and against the
+    scan_events table, resolved to their boxes with one query per
+    ID_CHUNK_SIZE barcodes and replayed per box in scanned_at order:
+    - scan: nothing is written, the current box is returned
+    - sell: takes quantity out of the box, rejected if the box holds less
+    - damage: marks the box damaged and takes what it held out of stock
+
+    The applied events are claimed first, with one insert into scan_events
+    (event_id is unique there). If another request applied one of them in
+    the meantime the insert fails as a whole with a unique violation, and
+    the batch is read and replayed again with those events as duplicates.
+    Then every touched box is written with _update_boxes, stock totals with
+    one update_stock per item and one outbound transaction per order (plus
+    one for damaged boxes). If a write fails the batch is reverted, its
+    claims are released and the error raised, so the scanner can retry it
+    as a whole.
+    """
+    created_by = get_caller_employee_id()
+    if not created_by:
+        raise Exception("Employee record not found")
 
+    event_ids = list(dict.fromkeys(event.event_id for event in events))
+    for attempt in range(SCAN_SYNC_ATTEMPTS):
+        previous = _applied_scan_events(event_ids)
+        results = {}
+        pending = []
+        for event in events:
+            if event.event_id in results:
+                continue
+            if event.event_id in previous:
+                results[event.event_id] = {**previous[event.event_id], "status": "duplicate"}
+            else:
+                results[event.event_id] = None
+                pending.append(event)
+
+        batch = _replay_scan_events(pending, results)
+        applied = batch[-1]
+        if not applied:
+            break
+        try:
+            g.service_supabase_client.from_('scan_events').insert([
+                {
+                    "event_id": event.event_id,
+                    "device_id": event.device_id,
+                    "barcode": event.barcode,
+                    "action": event.action,
+                    "scanned_at": event.scanned_at,
+                    "created_by": created_by,
+                    "result": results[event.event_id],
+                }
+                for event in applied
+            ], returning=ReturnMethod.minimal).execute()
+            break
+        except PostgrestAPIError as e:
+            if e.code != UNIQUE_VIOLATION:
+                raise
+            current_app.logger.info(f"Scan events applied concurrently, replaying batch (attempt {attempt + 1})")
+    else:
+        raise ValueError("Scan events were applied concurrently, try again")
+
+    box_changes, stock_changes, sold, damaged, applied = batch
+    claimed = [event.event_id for event in applied]
+    if box_changes:
+        try:
+            _update_boxes(box_changes)
+        except Exception:
+            _release_scan_events(claimed)
+            raise
+
+        applied_changes = {}
+        try:
+            for (contents_type, contents_id), quantity_change in stock_changes.items():
+                update_stock(contents_type, contents_id, quantity_change)
+                applied_changes[(contents_type, contents_id)] = quantity_change
+
+            transactions = [
+                TransactionCreateSchema(
+                    type="outbound",
+                    order_id=order_id,
+                    notes=f"Sold {quantity} units from scanner sync",
+                    created_by=created_by
+                ).model_dump()
+                for order_id, quantity in sold.items()
+            ]
+            if damaged:
+                transactions.append(TransactionCreateSchema(
+                    type="outbound",
+                    notes=f"Marked {damaged} box(es) damaged from scanner sync",
+                    created_by=created_by
+                ).model_dump())
+            g.supabase_user_client.from_('inventory_transactions') \
+                .insert(transactions, returning=ReturnMethod.minimal).execute()
+        except Exception as e:
+            _revert_sale(box_changes, applied_changes)
+            _release_scan_events(claimed)
+            raise Exception(f"Scan sync failed: {str(e)}")
+
+    return [results[event_id] for event_id in results]
+
+
+def _replay_scan_events(pending: list, results: dict) -> tuple:
     """
-    location = g.supabase_user_client.from_('locations').select('*').eq('id', location_id).execute().data
-    if not location:
-        raise Exception("Location not found")
-    location = location[0]
-    
-    # boxes = g.supabase_user_client.rpc('get_stock_by_location', {'p_location_id': location_id}).execute().data
-    # if not boxes:
-    #     raise Exception("No stock found at this location")
-    # print(boxes)  # Debugging line
-    # return []
-
-    boxes = g.supabase_user_client.from_('boxes').select('*').eq('location_id', location_id).execute().data
-    if not boxes:
-        return []
-
-    products = {}
-    components = {}
-
-    for box in boxes:
-        if box['contents_type'] == 'product':
-            if box['contents_id'] not in products:
-                product_info = g.supabase_user_client.from_('products').select('sku, name').eq('product_id', box['contents_id']).execute().data
-                if product_info:
-                    products[box['contents_id']] = {
-                        "product_id": box['contents_id'],
-                        "sku": product_info[0]['sku'],
-                        "name": product_info[0]['name'],
-                        "stock_quantity": 0
-                    }
-            products[box['contents_id']]['stock_quantity'] += box['quantity_in_box']
-        elif box['contents_type'] == 'component':
-            if box['contents_id'] not in components:
-                component_info = g.supabase_user_client.from_('components').select('sku, name').eq('component_id', box['contents_id']).execute().data
-                if component_info:
-                    components[box['contents_id']] = {
-                        "component_id": box['contents_id'],
-                        "sku": component_info[0]['sku'],
-                        "name": component_info[0]['name'],
-                        "stock_quantity": 0
-                    }
-            components[box['contents_id']]['stock_quantity'] += box['quantity_in_box']
-            
-    return {
-        "products": list(products.values()),
-        "components": list(components.values())
-    }
+    Replay the pending events on the current boxes, filling in `results`.
+    Nothing is written; returns (box_changes, stock_changes, sold, damaged,
+    applied) for sync_scan_events to write.
+    """
+    barcodes = sorted({event.barcode for event in pending})
+    boxes_by_barcode = {}
+    for start in range(0, len(barcodes), ID_CHUNK_SIZE):
+        # Use SERVICE client (bypasses RLS), as the single barcode lookup does
+        rows = g.service_supabase_client.from_('barcodes').select('barcode, boxes!inner(*)') \
+            .in_('barcode', barcodes[start:start + ID_CHUNK_SIZE]).execute().data or []
+        for row in rows:
+            boxes_by_barcode[row['barcode']] = row['boxes']
+
+    by_box = {}
+    for event in pending:
+        box = boxes_by_barcode.get(event.barcode)
+        if box is None:
+            results[event.event_id] = _scan_result(event, "rejected", message="Barcode not found")
+        else:
+            by_box.setdefault(box['box_id'], (box, []))[1].append(event)
+
+    box_changes = []
+    stock_changes = {}
+    sold = {}
+    damaged = 0
+    applied = []
+    for box, box_events in by_box.values():
+        current = dict(box)
+        for event in sorted(box_events, key=lambda e: e.scanned_at):
+            if event.action == 'scan':
+                results[event.event_id] = _scan_result(event, "applied", current)
+                applied.append(event)
+                continue
+            if current['status'] != 'in_stock':
+                results[event.event_id] = _scan_result(event, "rejected", current, f"Box is {current['status']}")
+                continue
+            if event.action == 'sell' and event.quantity > current['quantity_in_box']:
+                results[event.event_id] = _scan_result(
+                    event, "rejected", current,
+                    f"Requested {event.quantity} but only {current['quantity_in_box']} available in box"
+                )
+                continue
+
+            removed = event.quantity if event.action == 'sell' else current['quantity_in_box']
+            if event.action == 'sell':
+                remaining = current['quantity_in_box'] - removed
+                current = {**current, "quantity_in_box": remaining, "status": 'sold' if remaining == 0 else 'in_stock'}
+                sold[event.order_id] = sold.get(event.order_id, 0) + removed
+            else:
+                current = {**current, "status": 'damaged'}
+                damaged += 1
+            item_key = (current['contents_type'], current['contents_id'])
+            stock_changes[item_key] = stock_changes.get(item_key, 0) - removed
+            results[event.event_id] = _scan_result(event, "applied", current)
+            applied.append(event)
+
+        if current != box:
+            box_changes.append((box, current))
+
+    return box_changes, stock_changes, sold, damaged, applied
@@ -4,6 +4,7 @@ import datetime
 import secrets
 import string
 import time
+from api.v1.utils.projections import Embed, Projection
 
 
 class OrderCreateSchema(BaseModel):
@@ -70,4 +71,22 @@ def generate_unique_order_number(prefix: str = "ORD") -> str:
     # 3. Combine components
     order_number = f"{prefix}{timestamp_ms}-{random_part}"
     
-    return order_number
\ No newline at end of file
+    return order_number
+
+
+ORDER_PROJECTION = Projection(
+    columns=(
+        'order_id', 'order_number', 'customer_id', 'delivery_date', 'delivery_status', 'payment_status',
+        'order_delivery_date', 'total_amount', 'dispatch_address', 'phone_number', 'notes', 'additional_costs',
+        'vat_percentage', 'discount_percentage', 'created_by', 'created_at',
+    ),
+    embeds={
+        'order_details': Embed('order_details', {
+            'quantity': 'quantity',
+            'product_id': 'product_id(name, price)',
+        }),
+    },
+    list='order_id, order_number, customer_id, delivery_status, payment_status, total_amount, created_at',
+    detail='*, order_details(product_id(name, price), quantity)',
+    required=('order_id', 'created_at'),
+)
@@ -0,0 +1,61 @@
+from collections import OrderedDict
+from threading import Lock
+import time
+
+
+class TTLCache:
+    """
+    Small thread-safe LRU cache whose entries expire after a time-to-live.
+
+    Used for per-process caches shared across requests on the same worker
+    (caller profiles, decoded tokens, ...). Each entry can override the
+    default ttl, e.g. to expire exactly when a JWT does.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl: float | None = None):
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._data.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def pop_where(self, predicate) -> int:
+        """Remove every entry whose value matches predicate, return how many."""
+        with self._lock:
+            keys = [k for k, (_, v) in self._data.items() if predicate(v)]
+            for k in keys:
+                del self._data[k]
+        return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
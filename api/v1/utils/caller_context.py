@@ -0,0 +1,78 @@
+from flask import g
+from os import getenv
+from api.v1.utils.cache import TTLCache
+
+# Caller profiles are cached per worker process, keyed by the auth user_id.
+CALLER_CACHE_TTL = int(getenv('CALLER_CACHE_TTL', 60))
+CALLER_CACHE_SIZE = int(getenv('CALLER_CACHE_SIZE', 2048))
+
+_caller_cache = TTLCache(maxsize=CALLER_CACHE_SIZE, ttl=CALLER_CACHE_TTL)
+
+CALLER_SELECT = 'id, department_id, location_id, employment_status, deleted_at, department:department_id(id, name)'
+
+
+def _build_profile(row: dict) -> dict:
+    department = row.get('department') or {}
+    return {
+        "id": row['id'],
+        "department_id": row.get('department_id') or department.get('id'),
+        "department_name": department.get('name'),
+        "location_id": row.get('location_id'),
+        "employment_status": row.get('employment_status'),
+        "is_active": row.get('deleted_at') is None,
+    }
+
+
+def get_caller_profile() -> dict | None:
+    """
+    Return the employee profile of the authenticated caller.
+
+    The employees row is resolved at most once per request (memoised on g.caller)
+    and shared between requests of the same user through a bounded TTL cache.
+    Returns None when the request is anonymous or the user has no employee record.
+    """
+    if 'caller' in g:
+        return g.caller
+
+    user_id = g.get('current_user')
+    if not user_id:
+        return None
+
+    profile = _caller_cache.get(user_id)
+    if profile is None:
+        response = g.supabase_user_client.from_('employees').select(CALLER_SELECT).eq('user_id', user_id).execute()
+        if response.data:
+            profile = _build_profile(response.data[0])
+            _caller_cache.set(user_id, profile)
+
+    g.caller = profile
+    return profile
+
+
+def get_caller_department() -> str | None:
+    """Department name of the caller, e.g. 'warehouse' or 'sales'."""
+    profile = get_caller_profile()
+    return profile['department_name'] if profile else None
+
+
+def get_caller_employee_id(active_only: bool = False) -> str | None:
+    """Employee id of the caller. With active_only, soft-deleted employees resolve to None."""
+    profile = get_caller_profile()
+    if not profile or (active_only and not profile['is_active']):
+        return None
+    return profile['id']
+
+
+def invalidate_caller(user_id: str | None = None, employee_id: str | None = None):
+    """
+    Drop cached caller profiles after the employees row changed.
+    Pass the auth user_id when known, otherwise the employee id.
+    """
+    if user_id:
+        _caller_cache.pop(str(user_id))
+    if employee_id:
+        _caller_cache.pop_where(lambda profile: profile and profile['id'] == str(employee_id))
+    if 'caller' in g and g.caller and (
+        str(user_id) == g.get('current_user') or (employee_id and g.caller['id'] == str(employee_id))
+    ):
+        g.pop('caller')
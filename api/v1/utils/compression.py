@@ -0,0 +1,125 @@
+"""
+Response compression negotiated from Accept-Encoding (brotli, then gzip).
+
+- Buffered responses are compressed only above COMPRESS_MIN_SIZE bytes.
+- Streamed responses (NDJSON/CSV exports) are compressed chunk by chunk and
+  flushed after every chunk, so the client still receives rows as they are
+  produced.
+- Already encoded bodies, file downloads (send_file), non-text types and
+  responses marked `Cache-Control: no-transform` are left alone.
+
+A strong ETag becomes weak once the body is encoded, so If-None-Match keeps
+matching across encodings (If-None-Match uses weak comparison).
+
+Environment:
+    COMPRESS_MIN_SIZE       smallest buffered body worth compressing (default 1024)
+    COMPRESS_GZIP_LEVEL     zlib level 1-9 (default 6)
+    COMPRESS_BROTLI_QUALITY brotli quality 0-11 (default 4, tuned for dynamic responses)
+"""
+from flask import request
+from os import getenv
+import zlib
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+COMPRESS_MIN_SIZE = int(getenv('COMPRESS_MIN_SIZE', 1024))
+COMPRESS_GZIP_LEVEL = int(getenv('COMPRESS_GZIP_LEVEL', 6))
+COMPRESS_BROTLI_QUALITY = int(getenv('COMPRESS_BROTLI_QUALITY', 4))
+
+COMPRESSIBLE_TYPES = ('application/json', 'application/x-ndjson', 'text/')
+
+
+class _GzipEncoder:
+    def __init__(self):
+        # wbits=31 -> gzip container
+        self._compressor = zlib.compressobj(COMPRESS_GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _BrotliEncoder:
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=COMPRESS_BROTLI_QUALITY)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+ENCODERS = {'gzip': _GzipEncoder}
+if brotli is not None:
+    ENCODERS = {'br': _BrotliEncoder, **ENCODERS}
+
+
+def negotiate_encoding(accept_encoding) -> str | None:
+    """Pick the best supported encoding the client accepts, preferring brotli."""
+    for encoding in ENCODERS:
+        if accept_encoding[encoding] > 0:
+            return encoding
+    return None
+
+
+def _compressible(response) -> bool:
+    if response.status_code < 200 or response.status_code in (204, 206, 304):
+        return False
+    if 'Content-Encoding' in response.headers or response.direct_passthrough:
+        return False
+    if 'no-transform' in response.headers.get('Cache-Control', ''):
+        return False
+    return response.mimetype.startswith(COMPRESSIBLE_TYPES)
+
+
+def _stream(chunks, encoder):
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode()
+        data = encoder.compress(chunk) + encoder.flush()
+        if data:
+            yield data
+    yield encoder.finish()
+
+
+def compress_response(response):
+    """after_request hook: encode the body if the client and the response allow it."""
+    if not _compressible(response):
+        return response
+    encoding = negotiate_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+
+    encoder = ENCODERS[encoding]()
+    if response.is_streamed:
+        response.response = _stream(response.response, encoder)
+        response.headers.pop('Content-Length', None)
+    else:
+        body = response.get_data()
+        if len(body) < COMPRESS_MIN_SIZE:
+            return response
+        response.set_data(encoder.compress(body) + encoder.finish())
+
+    response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_compression(app):
+    """Register the compression hook on the app."""
+    app.after_request(compress_response)
@@ -0,0 +1,90 @@
+"""
+Size-bounded file cache on local disk with least-recently-used eviction.
+
+Used for generated artifacts that are expensive to rebuild and are served as
+files (label PDFs). Files are written to a temporary name and renamed into
+place, so concurrent workers never serve a partial file; a read bumps the
+file's mtime, and eviction removes the oldest files once the directory grows
+past max_bytes. Several worker processes may share one directory.
+"""
+from threading import Lock
+import os
+import tempfile
+
+
+class DiskCache:
+    def __init__(self, directory: str, max_bytes: int, suffix: str = ''):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self._lock = Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}{self.suffix}")
+
+    def get(self, key: str) -> str | None:
+        """Path of the cached file for key, or None on a miss."""
+        path = self.path(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(self, key: str, chunks) -> str:
+        """Store the bytes (or iterable of byte chunks) under key and return the file path."""
+        if isinstance(chunks, (bytes, bytearray, memoryview)):
+            chunks = [chunks]
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in chunks:
+                    f.write(chunk)
+            os.replace(tmp_path, self.path(key))
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+        self.evict()
+        return self.path(key)
+
+    def discard(self, key: str):
+        try:
+            os.unlink(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def evict(self):
+        """Remove least recently used files until the cache fits in max_bytes."""
+        with self._lock:
+            entries = []
+            total = 0
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if not entry.name.endswith(self.suffix) or entry.name.endswith('.tmp'):
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+            if total <= self.max_bytes:
+                return
+            for _, size, path in sorted(entries):
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+                if total <= self.max_bytes:
+                    break
+
+
+def default_cache_dir(name: str) -> str:
+    """Per-host default directory for a named cache under the system temp dir."""
+    return os.path.join(tempfile.gettempdir(), f"edike-{name}")
+
@@ -0,0 +1,27 @@
+from flask import make_response, request
+from functools import wraps
+
+
+def conditional_get(f):
+    """
+    Conditional GET support for reference-data endpoints.
+
+    Successful responses get a strong ETag computed from the serialized body
+    and `Cache-Control: private, no-cache`, so clients keep a copy but
+    revalidate it on every read: a request whose If-None-Match matches is
+    answered with an empty 304, and a row written through the API shows up on
+    the next read. Responses depend on the caller's role and RLS, so they are
+    marked private and vary on Authorization.
+
+    Place it right below the route decorator so 401/403 answers pass through.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        response = make_response(f(*args, **kwargs))
+        if request.method != 'GET' or response.status_code != 200:
+            return response
+        response.add_etag()
+        response.headers['Cache-Control'] = 'private, no-cache'
+        response.vary.add('Authorization')
+        return response.make_conditional(request)
+    return decorated_function
@@ -0,0 +1,62 @@
+"""
+Flask JSON provider backed by orjson, with the stdlib provider as fallback.
+
+orjson serializes straight to bytes and is several times faster than the
+stdlib encoder on the large nested lists this API returns (employees with
+documents, orders with details, stock with BOM breakdowns). When orjson is not
+installed, or meets something it cannot encode (integers wider than 64 bits,
+custom kwargs), Flask's DefaultJSONProvider is used unchanged.
+
+Output matches the default provider: keys sorted when sort_keys is set,
+indented in debug mode, dates and Decimals encoded through the same default().
+"""
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+class FastJSONProvider(DefaultJSONProvider):
+
+    def _orjson_options(self, indent=None) -> int:
+        # datetimes go through default() so they keep Flask's HTTP-date format
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def _dumps_bytes(self, obj, **kwargs) -> bytes | None:
+        """Serialize with orjson, or return None when the stdlib path must be used."""
+        if orjson is None or not set(kwargs) <= {'indent', 'separators'}:
+            return None
+        try:
+            return orjson.dumps(obj, default=self.default, option=self._orjson_options(kwargs.get('indent')))
+        except TypeError:
+            return None
+
+    def dumps(self, obj, **kwargs) -> str:
+        data = self._dumps_bytes(obj, **kwargs)
+        if data is None:
+            return super().dumps(obj, **kwargs)
+        return data.decode()
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        try:
+            return orjson.loads(s)
+        except orjson.JSONDecodeError:
+            # let the stdlib raise its usual error (and accept NaN/Infinity like before)
+            return super().loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = 2 if (self.compact is None and self._app.debug) or self.compact is False else None
+        data = self._dumps_bytes(obj, indent=indent)
+        if data is None:
+            return super().response(obj)
+        return self._app.response_class(data + b"\n", mimetype=self.mimetype)
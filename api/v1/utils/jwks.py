@@ -0,0 +1,119 @@
+import json
+import logging
+import os
+import threading
+import time
+import urllib.request
+
+import jwt
+from jwt import PyJWKSet
+
+logger = logging.getLogger(__name__)
+
+
+class JWKSKeyManager:
+    """
+    Keeps the Supabase JWKS signing keys in memory and refreshes them in a
+    background thread, so verifying a token never waits on the auth server.
+
+    - The key set is fetched when the worker boots (start()) and re-fetched
+      `refresh_margin` seconds before `lifespan` runs out.
+    - A failed refresh keeps serving the previous (stale) keys and is retried
+      after `retry_interval` seconds.
+    - An unknown `kid` (key rotation) schedules an early refresh instead of
+      fetching inline; the request fails with PyJWKClientError meanwhile.
+
+    `url` may be an https URL or a local JWKS file (path or file:// URL),
+    which is what tests and offline benchmarks use.
+    """
+
+    def __init__(self, url: str, lifespan: int = 3600, refresh_margin: int = 300,
+                 retry_interval: int = 30, timeout: float = 5):
+        self.url = url
+        self.lifespan = lifespan
+        self.refresh_margin = refresh_margin
+        self.retry_interval = retry_interval
+        self.timeout = timeout
+        self._keys = {}
+        self._fetched_at = None
+        self._last_attempt = float('-inf')
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    # --- fetching ---------------------------------------------------------
+    def _fetch(self) -> dict:
+        if self.url.startswith('file://') or os.path.exists(self.url):
+            path = self.url[len('file://'):] if self.url.startswith('file://') else self.url
+            with open(path) as f:
+                return json.load(f)
+        req = urllib.request.Request(self.url, headers={"User-Agent": "erp-backend"})
+        with urllib.request.urlopen(req, timeout=self.timeout) as response:
+            return json.load(response)
+
+    def refresh(self) -> bool:
+        """Fetch the key set now. Returns False (keeping the old keys) on failure."""
+        self._last_attempt = time.monotonic()
+        try:
+            jwk_set = PyJWKSet.from_dict(self._fetch())
+        except Exception as e:
+            logger.warning(f"JWKS refresh from {self.url} failed, serving stale keys: {e}")
+            return False
+        keys = {key.key_id: key for key in jwk_set.keys}
+        with self._lock:
+            self._keys = keys
+            self._fetched_at = self._last_attempt
+        logger.info(f"JWKS refreshed: {len(keys)} key(s)")
+        return True
+
+    # --- background refresh ----------------------------------------------
+    def _next_delay(self) -> float:
+        now = time.monotonic()
+        if self._fetched_at is None or self._last_attempt > self._fetched_at:
+            # never loaded, or the last attempt failed: retry soon
+            return max(self._last_attempt + self.retry_interval - now, 0)
+        return max(self._fetched_at + self.lifespan - self.refresh_margin - now, 0)
+
+    def _run(self):
+        while True:
+            woken = self._wakeup.wait(self._next_delay())
+            self._wakeup.clear()
+            # an unknown kid asks for an early refresh; at most one per retry_interval
+            if woken and time.monotonic() - self._last_attempt < self.retry_interval:
+                continue
+            self.refresh()
+
+    def start(self, prefetch: bool = True):
+        """
+        Start the refresher thread for this process. With prefetch, the first
+        fetch happens synchronously so the worker boots with keys loaded.
+        Safe to call repeatedly and after a fork (gunicorn --preload).
+        """
+        if self._thread and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        if prefetch and not self._keys:
+            self.refresh()
+        self._pid = os.getpid()
+        self._thread = threading.Thread(target=self._run, name="jwks-refresh", daemon=True)
+        self._thread.start()
+
+    def request_refresh(self):
+        """Ask the background thread to refresh as soon as possible."""
+        self._wakeup.set()
+
+    # --- lookups ----------------------------------------------------------
+    def get_signing_key(self, kid: str):
+        if self._pid != os.getpid():
+            self.start(prefetch=False)
+        key = self._keys.get(kid)
+        if key is None:
+            self.request_refresh()
+            if not self._keys:
+                raise jwt.PyJWKClientError("Signing keys are not loaded yet")
+            raise jwt.PyJWKClientError(f'Unable to find a signing key that matches: "{kid}"')
+        return key
+
+    def get_signing_key_from_jwt(self, token: str):
+        header = jwt.get_unverified_header(token)
+        return self.get_signing_key(header.get("kid"))
@@ -0,0 +1,117 @@
+"""
+Declarative label sheet templates for the PDF labels.
+
+A template describes the page and the grid of labels on it: page size,
+columns and rows, label size, margins and gaps, QR size and fonts. The cell
+positions of a template are computed once, as a flat grid in reading order,
+and every page of every batch reuses them; the renderer only indexes into
+the grid (label i goes to page i // per_page, cell i % per_page).
+
+Labels are drawn either `stacked` (barcode text, QR and quantity under each
+other, for tall cells) or `side` (QR on the left, text on the right, for
+the wide cells of sticker sheets). Sizes are in millimetres.
+"""
+from functools import cached_property
+from reportlab.lib.pagesizes import A4, LETTER
+from reportlab.lib.units import mm
+
+LAYOUTS = ('stacked', 'side')
+
+
+class LabelTemplate:
+    """Page size, grid and per-label styling of one label sheet."""
+
+    def __init__(self, name: str, description: str, pagesize, columns: int, rows: int,
+                 label_width: float, label_height: float, top_margin: float, left_margin: float,
+                 qr_size: float, column_gap: float = 0, row_gap: float = 0, layout: str = 'side',
+                 font_size: float = 7, detail_font_size: float = 6, line_chars: int | None = None,
+                 page_header: bool = False, separators: bool = False):
+        if layout not in LAYOUTS:
+            raise ValueError(f"layout must be one of: {', '.join(LAYOUTS)}")
+        self.name = name
+        self.description = description
+        self.pagesize = pagesize
+        self.columns = columns
+        self.rows = rows
+        self.label_width = label_width * mm
+        self.label_height = label_height * mm
+        self.top_margin = top_margin * mm
+        self.left_margin = left_margin * mm
+        self.column_gap = column_gap * mm
+        self.row_gap = row_gap * mm
+        self.qr_size = qr_size * mm
+        self.layout = layout
+        # barcode text (bold), and item, batch and quantity
+        self.font_size = font_size
+        self.detail_font_size = detail_font_size
+        self.line_chars = line_chars
+        # batch summary (item, batch, box count) above the labels of the first page
+        self.page_header = page_header
+        # light rule under every label, for plain paper that is cut by hand
+        self.separators = separators
+
+        width, height = pagesize
+        if (self.left_margin + columns * self.label_width + (columns - 1) * self.column_gap > width + 0.5 * mm
+                or self.top_margin + rows * self.label_height + (rows - 1) * self.row_gap > height + 0.5 * mm):
+            raise ValueError(f"label template {name} does not fit on its page")
+
+    @property
+    def per_page(self) -> int:
+        return self.columns * self.rows
+
+    @cached_property
+    def cells(self) -> tuple:
+        """(x, y) of the top-left corner of every label on a page, in reading order."""
+        page_height = self.pagesize[1]
+        xs = [self.left_margin + col * (self.label_width + self.column_gap) for col in range(self.columns)]
+        ys = [page_height - self.top_margin - row * (self.label_height + self.row_gap) for row in range(self.rows)]
+        return tuple((x, y) for y in ys for x in xs)
+
+    @cached_property
+    def chars_per_line(self) -> int:
+        """Barcode characters that fit on one text line (uppercase Helvetica-Bold averages ~0.65 em)."""
+        if self.line_chars:
+            return self.line_chars
+        text_width = self.label_width - 4 * mm
+        if self.layout == 'side':
+            text_width -= self.qr_size + 2 * mm
+        return max(8, int(text_width / (self.font_size * 0.68)))
+
+    def pages(self, count: int) -> int:
+        return -(-count // self.per_page)
+
+    def describe(self) -> dict:
+        return {
+            "name": self.name,
+            "description": self.description,
+            "page": "A4" if self.pagesize == A4 else "Letter",
+            "columns": self.columns,
+            "rows": self.rows,
+            "labels_per_page": self.per_page,
+            "label_size_mm": [round(self.label_width / mm, 1), round(self.label_height / mm, 1)],
+        }
+
+
+LABEL_TEMPLATES = {template.name: template for template in (
+    # the original layout: one label per row under a batch header, cut by hand
+    # (it used to put 6 per page, the 6th QR code running off the page)
+    LabelTemplate('letter-5', "Letter, 5 per page under a batch header (plain paper)", LETTER,
+                  columns=1, rows=5, label_width=LETTER[0] / mm, label_height=38, top_margin=80,
+                  left_margin=0, qr_size=25, layout='stacked', font_size=11, detail_font_size=10,
+                  line_chars=36, page_header=True, separators=True),
+    LabelTemplate('avery-5160', "Avery 5160 / 8160, Letter 30-up, 66.7 x 25.4 mm", LETTER,
+                  columns=3, rows=10, label_width=66.7, label_height=25.4, top_margin=12.7,
+                  left_margin=4.8, column_gap=3.2, qr_size=21, font_size=6, detail_font_size=5.5),
+    LabelTemplate('avery-5163', "Avery 5163 / 8163, Letter 10-up, 101.6 x 50.8 mm", LETTER,
+                  columns=2, rows=5, label_width=101.6, label_height=50.8, top_margin=12.7,
+                  left_margin=4.0, column_gap=4.8, qr_size=40, font_size=9, detail_font_size=8),
+    LabelTemplate('avery-l7160', "Avery L7160, A4 21-up, 63.5 x 38.1 mm", A4,
+                  columns=3, rows=7, label_width=63.5, label_height=38.1, top_margin=15.15,
+                  left_margin=7.2, column_gap=2.5, qr_size=30, font_size=6.5, detail_font_size=6),
+    LabelTemplate('a4-24', "A4 24-up, 70 x 37 mm, no margins", A4,
+                  columns=3, rows=8, label_width=70, label_height=37, top_margin=0.5,
+                  left_margin=0, qr_size=30, font_size=7, detail_font_size=6.5),
+    LabelTemplate('a4-40', "A4 40-up, 52.5 x 29.7 mm, no margins", A4,
+                  columns=4, rows=10, label_width=52.5, label_height=29.7, top_margin=0,
+                  left_margin=0, qr_size=24, font_size=5.5, detail_font_size=5),
+)}
@@ -0,0 +1,149 @@
+"""
+Logging pipeline for the API.
+
+Records are pushed onto an in-memory queue by a QueueHandler and written to
+disk (or stderr) by a QueueListener thread, so request threads never block on
+log I/O. Every record is emitted as one JSON object carrying the request id.
+
+Environment:
+    LOG_LEVEL           root level (default INFO)
+    LOG_LEVELS          per-logger overrides, e.g. "api.v1=DEBUG,httpx=WARNING"
+    LOG_FILE            output file (default app.log, "-" for stderr)
+    LOG_DEBUG_SAMPLE    keep 1 in N DEBUG records per call site (default 1 = all)
+    LOG_CAPTURE_PRINT   "1" routes stray print() output into the "stdout" logger
+                        (INFO) and stderr output, e.g. traceback.print_exc(),
+                        into the "stderr" logger (WARNING)
+"""
+from flask import g, has_request_context, request
+from logging.handlers import QueueHandler, QueueListener
+from os import getenv
+from threading import Lock, current_thread
+import atexit
+import json
+import logging
+import queue
+import sys
+import uuid
+
+# Libraries whose DEBUG output is wire-level chatter
+NOISY_LOGGERS = ['httpx', 'httpcore', 'hpack', 'h2', 'urllib3', 'realtime', 'websockets']
+
+_listener = None
+
+
+class RequestIdFilter(logging.Filter):
+    """Attach the current request id (or '-') to every record."""
+
+    def filter(self, record):
+        record.request_id = g.get('request_id', '-') if has_request_context() else '-'
+        return True
+
+
+class DebugSamplingFilter(logging.Filter):
+    """Keep only every Nth DEBUG record per call site; other levels always pass."""
+
+    def __init__(self, every: int = 1):
+        super().__init__()
+        self.every = max(every, 1)
+        self._counts = {}
+        self._lock = Lock()
+
+    def filter(self, record):
+        if self.every == 1 or record.levelno > logging.DEBUG:
+            return True
+        key = (record.pathname, record.lineno)
+        with self._lock:
+            count = self._counts.get(key, 0)
+            self._counts[key] = count + 1
+        return count % self.every == 0
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        payload = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, 'request_id', '-'),
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+class _PrintToLogger:
+    """File-like object that turns print() output into log records."""
+
+    def __init__(self, logger, level, stream):
+        self.logger = logger
+        self.level = level
+        # the original stream, for output of the listener thread itself
+        # (a failing handler reporting its error must not be queued again)
+        self.stream = stream
+
+    def write(self, message):
+        if _listener is not None and current_thread() is _listener._thread:
+            self.stream.write(message)
+            return
+        message = message.rstrip()
+        if message and self.logger.isEnabledFor(self.level):
+            self.logger.log(self.level, message)
+
+    def flush(self):
+        self.stream.flush()
+
+
+def _parse_levels(spec: str) -> dict:
+    levels = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        name, _, level = item.partition('=')
+        levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def configure_logging(app):
+    """
+    Install the queue-based JSON logging pipeline and request id hooks.
+    Call once when the app is created.
+    """
+    global _listener
+
+    log_file = getenv('LOG_FILE', 'app.log')
+    target = logging.StreamHandler(sys.stderr) if log_file == '-' else logging.FileHandler(log_file)
+    target.setFormatter(JsonFormatter())
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    # Filters run on the request thread so the request id and sampling apply before enqueueing
+    queue_handler.addFilter(RequestIdFilter())
+    queue_handler.addFilter(DebugSamplingFilter(int(getenv('LOG_DEBUG_SAMPLE', 1))))
+
+    root = logging.getLogger()
+    root.handlers[:] = [queue_handler]
+    root.setLevel(getenv('LOG_LEVEL', 'INFO').upper())
+    for name in NOISY_LOGGERS:
+        logging.getLogger(name).setLevel(logging.WARNING)
+    for name, level in _parse_levels(getenv('LOG_LEVELS', '')).items():
+        logging.getLogger(name).setLevel(level)
+
+    if _listener is not None:
+        _listener.stop()
+    _listener = QueueListener(log_queue, target, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    if getenv('LOG_CAPTURE_PRINT') == '1':
+        sys.stdout = _PrintToLogger(logging.getLogger('stdout'), logging.INFO, sys.__stdout__)
+        sys.stderr = _PrintToLogger(logging.getLogger('stderr'), logging.WARNING, sys.__stderr__)
+
+    @app.before_request
+    def assign_request_id():
+        g.request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex
+
+    @app.after_request
+    def expose_request_id(response):
+        if 'request_id' in g:
+            response.headers['X-Request-ID'] = g.request_id
+        return response
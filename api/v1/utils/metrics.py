@@ -0,0 +1,176 @@
+"""
+Minimal Prometheus instrumentation for the API.
+
+- Per-route request latency (http_request_duration_seconds)
+- Per-route and per-table Supabase/PostgREST round trips, latency and bytes,
+  collected with httpx event hooks on the postgrest session of each client
+- Round trips per request (supabase_round_trips_per_request), which is what
+  exposes N+1 endpoints
+
+Metrics are kept per worker process and exposed in the Prometheus text format
+on GET /metrics, which requires `Authorization: Bearer <METRICS_TOKEN>`. Without
+METRICS_TOKEN the endpoint answers 401 to everyone, unless METRICS_PUBLIC=true
+explicitly opens it (e.g. when only the internal network can reach it).
+"""
+from flask import Response, g, has_request_context, request
+from os import getenv
+from threading import Lock
+import hmac
+import time
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+ROUND_TRIP_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250, 500, 1000)
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + (extra or [])
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_format_labels(self.labelnames, labels)} {value}')
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = Lock()
+
+    def observe(self, value, *labels):
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                series = self._values[labels] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for labels, series in sorted(self._values.items()):
+                for bound, count in zip(self.buckets, series):
+                    lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, labels, [("le", bound)])} {count}')
+                lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, labels, [("le", "+Inf")])} {series[-1]}')
+                lines.append(f'{self.name}_sum{_format_labels(self.labelnames, labels)} {series[-2]}')
+                lines.append(f'{self.name}_count{_format_labels(self.labelnames, labels)} {series[-1]}')
+        return lines
+
+
+REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds', 'Flask request latency by route.',
+    ('endpoint', 'method', 'status'))
+SUPABASE_REQUESTS = Counter(
+    'supabase_requests_total', 'PostgREST round trips by route and table.',
+    ('endpoint', 'table', 'method', 'status'))
+SUPABASE_DURATION = Histogram(
+    'supabase_request_duration_seconds', 'PostgREST round-trip latency by route and table.',
+    ('endpoint', 'table'))
+SUPABASE_BYTES = Counter(
+    'supabase_response_bytes_total', 'PostgREST response body bytes by route and table.',
+    ('endpoint', 'table'))
+SUPABASE_ROUND_TRIPS = Histogram(
+    'supabase_round_trips_per_request', 'PostgREST round trips made while serving one request.',
+    ('endpoint',), buckets=ROUND_TRIP_BUCKETS)
+
+REGISTRY = [REQUEST_DURATION, SUPABASE_REQUESTS, SUPABASE_DURATION, SUPABASE_BYTES, SUPABASE_ROUND_TRIPS]
+
+
+def _current_endpoint():
+    if has_request_context():
+        return request.endpoint or 'unknown'
+    return 'background'
+
+
+def _table_from_path(path: str) -> str:
+    # /rest/v1/employees -> employees, /rest/v1/rpc/update_stock -> rpc/update_stock
+    marker = '/rest/v1/'
+    return path.split(marker, 1)[1] if marker in path else path.lstrip('/')
+
+
+def _on_request(http_request):
+    http_request.extensions['metrics_start'] = time.perf_counter()
+
+
+def _on_response(http_response):
+    http_response.read()
+    elapsed = time.perf_counter() - http_response.request.extensions.get('metrics_start', time.perf_counter())
+    endpoint = _current_endpoint()
+    table = _table_from_path(http_response.request.url.path)
+    SUPABASE_REQUESTS.inc(endpoint, table, http_response.request.method, http_response.status_code)
+    SUPABASE_DURATION.observe(elapsed, endpoint, table)
+    SUPABASE_BYTES.inc(endpoint, table, amount=len(http_response.content))
+    if has_request_context():
+        g.supabase_round_trips = g.get('supabase_round_trips', 0) + 1
+
+
+def instrument_supabase_client(client):
+    """Attach the round-trip hooks to the postgrest session of a Supabase client."""
+    hooks = client.postgrest.session.event_hooks
+    if _on_response not in hooks['response']:
+        hooks['request'].append(_on_request)
+        hooks['response'].append(_on_response)
+        client.postgrest.session.event_hooks = hooks
+
+
+def _before_request():
+    g.metrics_start = time.perf_counter()
+    g.supabase_round_trips = 0
+
+
+def _after_request(response):
+    start = g.get('metrics_start')
+    if start is not None and request.endpoint != 'metrics':
+        endpoint = request.endpoint or 'unknown'
+        REQUEST_DURATION.observe(time.perf_counter() - start, endpoint, request.method, response.status_code)
+        SUPABASE_ROUND_TRIPS.observe(g.get('supabase_round_trips', 0), endpoint)
+    return response
+
+
+def render_metrics() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+def init_metrics(app):
+    """Register request timing hooks and the /metrics endpoint on the app."""
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    token = getenv('METRICS_TOKEN')
+    public = not token and getenv('METRICS_PUBLIC', '').lower() in ['1', 'true']
+    if not token and not public:
+        app.logger.warning("METRICS_TOKEN is not set, /metrics answers 401 (set METRICS_PUBLIC=true to open it)")
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        """Prometheus scrape endpoint."""
+        if not public and not (token and hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}')):
+            return Response('Unauthorized\n', status=401, mimetype='text/plain')
+        return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,161 @@
+"""
+Keyset (cursor) pagination for list endpoints.
+
+A list endpoint opts in by passing its PostgREST query to paginate() when the
+client sent `?limit=` or `?cursor=`. Rows are ordered by (sort column, primary
+key) and the next page starts strictly after the last row returned, so a page
+costs the same no matter how deep into the table it is.
+
+    GET /api/v1/orders?limit=50                    first page
+    GET /api/v1/orders?limit=50&cursor=<next>      following pages
+    GET /api/v1/orders?limit=50&count=estimated    adds an estimated "total"
+
+Cursors are opaque: base64url(JSON) plus an HMAC, bound to the endpoint that
+issued them, so they cannot be forged or replayed against another list.
+
+Environment:
+    PAGE_SIZE_DEFAULT    rows per page when only a cursor is given (default 50)
+    PAGE_SIZE_MAX        upper bound for ?limit= (default 500)
+    PAGINATION_SECRET    cursor signing key (defaults to SUPABASE_JWT_SECRET)
+"""
+from flask import current_app, request
+from os import getenv
+import base64
+import copy
+import hashlib
+import hmac
+import json
+
+PAGE_SIZE_DEFAULT = int(getenv('PAGE_SIZE_DEFAULT', 50))
+PAGE_SIZE_MAX = int(getenv('PAGE_SIZE_MAX', 500))
+COUNT_METHODS = ('estimated', 'planned', 'exact')
+
+
+class PaginationError(ValueError):
+    """Bad ?limit=, ?cursor= or ?count= value; views answer it with a 400."""
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode()
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+def _signature(payload: bytes) -> bytes:
+    secret = current_app.config.get('PAGINATION_SECRET') or current_app.config['SUPABASE_JWT_SECRET']
+    return hmac.new(secret.encode(), payload, hashlib.sha256).digest()[:16]
+
+
+def encode_cursor(sort_value, key_value) -> str:
+    payload = json.dumps([request.endpoint, sort_value, key_value], separators=(',', ':'), default=str).encode()
+    return f"{_b64encode(payload)}.{_b64encode(_signature(payload))}"
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """Return (sort_value, key_value) from a cursor issued by this endpoint."""
+    try:
+        body, signature = cursor.split('.', 1)
+        payload = _b64decode(body)
+        valid = hmac.compare_digest(_b64decode(signature), _signature(payload))
+        endpoint, sort_value, key_value = json.loads(payload)
+    except (ValueError, TypeError):
+        raise PaginationError("Invalid cursor")
+    if not valid or endpoint != request.endpoint:
+        raise PaginationError("Invalid cursor")
+    return sort_value, key_value
+
+
+def pagination_requested() -> bool:
+    """True when the client asked for a page rather than the legacy full list."""
+    return 'limit' in request.args or 'cursor' in request.args
+
+
+def _page_size() -> int:
+    raw = request.args.get('limit')
+    if raw is None:
+        return PAGE_SIZE_DEFAULT
+    try:
+        limit = int(raw)
+    except ValueError:
+        raise PaginationError("limit must be an integer")
+    if limit < 1:
+        raise PaginationError("limit must be at least 1")
+    return min(limit, PAGE_SIZE_MAX)
+
+
+def _quote(value) -> str:
+    # PostgREST logic-tree values with reserved characters (",", ":", "()") must be double quoted
+    text = str(value).replace('\\', '\\\\').replace('"', '\\"')
+    return f'"{text}"'
+
+
+def keyset(query, sort: str, key: str, desc: bool = True, after: tuple | None = None):
+    """
+    Order the query by (sort, key) and, given the (sort_value, key_value) of
+    the last row already seen, keep only the rows that come after it.
+    NULL sort values are ordered last.
+    """
+    if after is not None:
+        sort_value, key_value = after
+        op = 'lt' if desc else 'gt'
+        if sort_value is None:
+            query = query.is_(sort, 'null').filter(key, op, key_value)
+        else:
+            value = _quote(sort_value)
+            query = query.or_(f'{sort}.{op}.{value},and({sort}.eq.{value},{key}.{op}.{_quote(key_value)}),{sort}.is.null')
+    return query.order(sort, desc=desc, nullsfirst=False).order(key, desc=desc)
+
+
+def iter_rows(query, sort: str, key: str, desc: bool = True, page_size: int = 1000):
+    """
+    Yield every row of `query`, fetching `page_size` rows per round trip, so
+    callers never hit the PostgREST max-rows cap or hold the whole table.
+
+    Only an empty page ends the scan: PostgREST silently returns at most
+    max-rows rows whatever the limit, so a short page does not mean the last
+    one when page_size is above that cap.
+    """
+    after = None
+    while True:
+        page = copy.copy(query)
+        page.headers = query.headers.copy()
+        rows = keyset(page, sort, key, desc, after).limit(page_size).execute().data or []
+        if not rows:
+            return
+        yield from rows
+        after = (rows[-1].get(sort), rows[-1][key])
+
+
+def paginate(query, sort: str, key: str, desc: bool = True) -> dict:
+    """
+    Run `query` for one page ordered by (sort, key) and return the envelope:
+    {"data": [...], "next_cursor": str | None, "has_more": bool[, "total": int]}.
+    Both columns must be part of the selected fields. Raises PaginationError.
+    """
+    limit = _page_size()
+    count = request.args.get('count')
+    if count is not None and count not in COUNT_METHODS:
+        raise PaginationError(f"count must be one of: {', '.join(COUNT_METHODS)}")
+
+    cursor = request.args.get('cursor')
+    after = decode_cursor(cursor) if cursor else None
+    query = keyset(query, sort, key, desc, after).limit(limit + 1)
+    if count:
+        prefer = query.headers.get('Prefer')
+        query.headers['Prefer'] = f"{prefer},count={count}" if prefer else f"count={count}"
+
+    response = query.execute()
+    rows = response.data or []
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    page = {
+        "data": rows,
+        "next_cursor": encode_cursor(rows[-1].get(sort), rows[-1][key]) if has_more else None,
+        "has_more": has_more,
+    }
+    if count:
+        page["total"] = response.count
+    return page
@@ -1,10 +1,137 @@
-from reportlab.lib.pagesizes import LETTER
 from reportlab.lib.units import mm
 from reportlab.pdfgen import canvas
 from reportlab.lib.utils import ImageReader
 from io import BytesIO
+from functools import lru_cache
 import qrcode
 from datetime import datetime
+from api.v1.utils.label_templates import LABEL_TEMPLATES
+
+# QR matrices are cached per process, so a reprinted label is not re-encoded
+QR_CACHE_SIZE = 4096
+QR_BORDER = 4
+
+
+@lru_cache(maxsize=QR_CACHE_SIZE)
+def qr_runs(data: str) -> tuple:
+    """
+    Dark modules of the QR code for `data` as horizontal runs.
+
+    Returns (modules, runs): the side length in modules (quiet zone
+    included) and (row, first column, length) for every run of dark modules,
+    so a label is drawn with one rectangle per run instead of one per module.
+    """
+    qr = qrcode.QRCode(version=1, border=QR_BORDER)
+    qr.add_data(data)
+    qr.make(fit=True)
+    matrix = qr.get_matrix()
+
+    runs = []
+    for row, modules in enumerate(matrix):
+        start = None
+        for col, dark in enumerate(modules):
+            if dark and start is None:
+                start = col
+            elif not dark and start is not None:
+                runs.append((row, start, col - start))
+                start = None
+        if start is not None:
+            runs.append((row, start, len(modules) - start))
+    return len(matrix), tuple(runs)
+
+
+@lru_cache(maxsize=QR_CACHE_SIZE)
+def qr_path(data: str) -> tuple:
+    """
+    (modules, PDF path operators) of the QR code for `data`, in module units
+    from the top-left corner. Integer coordinates keep the content stream
+    short, and the operators are built once per barcode.
+    """
+    modules, runs = qr_runs(data)
+    return modules, '\n'.join(f"{col} {row} {length} 1 re" for row, col, length in runs) + '\nf'
+
+
+def draw_qr_path(c, modules: int, path: str, x: float, y: float, size: float):
+    """Draw QR path operators from qr_path(), (x, y) being the bottom-left corner."""
+    c.saveState()
+    c.translate(x, y + size)
+    c.scale(size / modules, -size / modules)
+    c.setFillColorRGB(0, 0, 0)
+    c.addLiteral(path)
+    c.restoreState()
+
+
+def draw_qr_vector(c, data: str, x: float, y: float, size: float):
+    """Draw the QR code as filled vector rectangles, (x, y) being the bottom-left corner."""
+    draw_qr_path(c, *qr_path(data), x, y, size)
+
+
+def encode_qr_chunk(barcodes: list) -> list:
+    """
+    qr_path() of every barcode in the chunk. Picklable entry point for
+    rendering QR codes in worker processes (see label_services).
+    """
+    return [qr_path(barcode) for barcode in barcodes]
+
+
+def draw_qr_png(c, data: str, x: float, y: float, size: float):
+    """Draw the QR code as an embedded PNG image (previous renderer, kept for comparison)."""
+    qr = qrcode.QRCode(version=1, box_size=8, border=QR_BORDER)
+    qr.add_data(data)
+    qr.make(fit=True)
+    img = qr.make_image(fill_color="black", back_color="white")
+    img_io = BytesIO()
+    img.save(img_io, "PNG")
+    img_io.seek(0)
+    c.drawImage(ImageReader(img_io), x, y, width=size, height=size, mask="auto")
+
+
+QR_RENDERERS = {'vector': draw_qr_vector, 'png': draw_qr_png}
+
+
+def _draw_stacked(c, template, x, top, text_lines, quantity, draw_code):
+    """Barcode text, QR and quantity under each other, centred in the cell."""
+    center = x + template.label_width / 2
+    line_height = template.font_size * 1.03
+
+    c.setFont("Helvetica-Bold", template.font_size)
+    baseline = top - template.font_size * 0.77
+    for line in text_lines:
+        c.drawCentredString(center, baseline, line)
+        baseline -= line_height
+
+    # QR 2 mm under the last text line, quantity 3 mm under the QR
+    qr_bottom = baseline + line_height - 2 * mm - template.qr_size
+    draw_code(center - template.qr_size / 2, qr_bottom)
+    c.setFont("Helvetica", template.detail_font_size)
+    c.drawCentredString(center, qr_bottom - 3 * mm, f"Qty in this box: {quantity}")
+
+
+def _side_lines(template, barcode_lines: int) -> list:
+    """(font, size, y offset from the cell top) of every text line of a `side` label, centred vertically."""
+    fonts = [("Helvetica-Bold", template.detail_font_size), ("Helvetica", template.detail_font_size)]
+    fonts += [("Helvetica-Bold", template.font_size)] * barcode_lines
+    fonts.append(("Helvetica", template.detail_font_size))
+    y = -(template.label_height - sum(size * 1.2 for _, size in fonts)) / 2
+    lines = []
+    for font, size in fonts:
+        y -= size * 1.2
+        lines.append((font, size, y + size * 0.25))
+    return lines
+
+
+def _draw_side(c, template, x, top, text_lines, quantity, draw_code, lines):
+    """QR on the left; the item and batch (the shared 'labelDetails' form), barcode text and quantity on the right."""
+    draw_code(x + 2 * mm, top - (template.label_height + template.qr_size) / 2)
+    c.saveState()
+    c.translate(x, top)
+    c.doForm('labelDetails')
+    c.restoreState()
+
+    text_x = x + template.qr_size + 4 * mm
+    for (font, size, y), text in zip(lines[2:], text_lines + [f"Qty: {quantity}"]):
+        c.setFont(font, size)
+        c.drawString(text_x, top + y, text)
 
 
 def generate_barcode_pdf(
@@ -13,7 +140,10 @@ def generate_barcode_pdf(
     batch_id,
     boxes_count,
     quantity_per_box,
-    password=""
+    password="",
+    qr_renderer="vector",
+    qr_paths=None,
+    template="letter-5"
 ):
     """
     barcodes_data       : list[dict] → {'barcode': str, 'quantity_in_box': int}
@@ -22,10 +152,15 @@ def generate_barcode_pdf(
     boxes_count         : int
     quantity_per_box    : int            ← NEW – qty you entered in the form
     password            : str (optional)
+    qr_renderer         : 'vector' (default) or 'png', see QR_RENDERERS
+    qr_paths            : list (optional) → qr_path() of each barcode, already encoded
+    template            : name of the label sheet, see label_templates.LABEL_TEMPLATES
     """
+    draw_qr = QR_RENDERERS[qr_renderer]
+    sheet = LABEL_TEMPLATES[template]
     buffer = BytesIO()
-    c = canvas.Canvas(buffer, pagesize=LETTER)
-    width, height = LETTER
+    c = canvas.Canvas(buffer, pagesize=sheet.pagesize)
+    width, height = sheet.pagesize
 
     # -----------------------------------------------------------------
     # 1. Password (your existing method – works with free ReportLab)
@@ -36,106 +171,79 @@ def generate_barcode_pdf(
         c.setEncrypt(password)
 
     # -----------------------------------------------------------------
-    # 2. Header – clean, centered, professional
+    # 2. Header – clean, centered, professional (plain paper templates;
+    #    on sticker sheets every label carries the item and batch)
     # -----------------------------------------------------------------
-    c.setFont("Helvetica-Bold", 18)
-    c.drawCentredString(width / 2, height - 25 * mm, item_name)
-
-    c.setFont("Helvetica", 13)
-    c.drawCentredString(width / 2, height - 38 * mm, f"Batch ID: {batch_id}")
-
-    c.setFont("Helvetica", 12)
-    c.drawCentredString(
-        width / 2,
-        height - 50 * mm,
-        f"{boxes_count} Box{'es' if boxes_count != 1 else ''} • "
-        f"{quantity_per_box} pcs per box"
-    )
-
-    c.setFont("Helvetica-Oblique", 10)
-    c.drawCentredString(
-        width / 2,
-        height - 60 * mm,
-        f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M')}"
-    )
+    if sheet.page_header:
+        c.setFont("Helvetica-Bold", 18)
+        c.drawCentredString(width / 2, height - 25 * mm, item_name)
+
+        c.setFont("Helvetica", 13)
+        c.drawCentredString(width / 2, height - 38 * mm, f"Batch ID: {batch_id}")
+
+        c.setFont("Helvetica", 12)
+        c.drawCentredString(
+            width / 2,
+            height - 50 * mm,
+            f"{boxes_count} Box{'es' if boxes_count != 1 else ''} • "
+            f"{quantity_per_box} pcs per box"
+        )
+
+        c.setFont("Helvetica-Oblique", 10)
+        c.drawCentredString(
+            width / 2,
+            height - 60 * mm,
+            f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M')}"
+        )
 
     # -----------------------------------------------------------------
-    # 3. Vertical layout – ONE QR per row (6 per page)
+    # 3. Labels – cell positions come from the template grid
     # -----------------------------------------------------------------
-    start_y = height - 80 * mm          # first QR top reference point (top of the first label slot)
-    row_height = 38 * mm                # slot height for each label
-    margin_x = 30 * mm
-
-    labels_per_page = 6
-    
-    # Reduced QR size for better fit within the row_height
-    qr_size = 25 * mm
-    qr_box_size = 8 # Box size adjusted for 25mm QR
+    cells = sheet.cells
+    per_page = sheet.per_page
+    chars = sheet.chars_per_line
+    if sheet.layout == 'side':
+        # item and batch are the same on every label: drawn once as a form, placed per label
+        barcode_lines = 2 if any(len(info["barcode"]) > chars for info in barcodes_data) else 1
+        lines = _side_lines(sheet, barcode_lines)
+        c.beginForm('labelDetails')
+        for (font, size, y), text in zip(lines, (str(item_name)[:chars], f"Batch: {batch_id}"[:chars])):
+            c.setFont(font, size)
+            c.drawString(sheet.qr_size + 4 * mm, y, text)
+        c.endForm()
+    inset = min(30 * mm, sheet.label_width / 8)
 
     for idx, info in enumerate(barcodes_data):
-        if idx > 0 and idx % labels_per_page == 0:
+        if idx > 0 and idx % per_page == 0:
             c.showPage()
-            start_y = height - 80 * mm
+        x, top = cells[idx % per_page]
 
-        # y is the top reference point for the current label slot
-        y = start_y - (idx % labels_per_page) * row_height
-
-        # --- DRAWING ELEMENTS (Text -> QR -> Quantity) ---
-        
         barcode = info["barcode"]
-        
-        # 1. Barcode Text (Top)
-        c.setFont("Helvetica-Bold", 11) # Slightly smaller font
-        
-        # Line 1 baseline is 3mm down from the slot top
-        text_baseline_1 = y - 3 * mm
-        c.drawCentredString(width / 2, text_baseline_1, barcode[:36])
-
-        # Line 2 baseline is 4mm further down
-        if len(barcode) > 36:
-            text_baseline_2 = y - 7 * mm
-            c.drawCentredString(width / 2, text_baseline_2, barcode[36:72])
-            # Set the anchor point for the QR code below the second line of text
-            qr_top_anchor_y = text_baseline_2 - 2 * mm 
+        text_lines = [barcode[:chars]]
+        if len(barcode) > chars:
+            text_lines.append(barcode[chars:2 * chars])
+
+        if qr_paths is not None:
+            def draw_code(qr_x, qr_y, code=qr_paths[idx]):
+                draw_qr_path(c, *code, qr_x, qr_y, sheet.qr_size)
         else:
-            # Set the anchor point for the QR code below the first line of text
-            qr_top_anchor_y = text_baseline_1 - 2 * mm
-
-        # 2. QR Code (Middle - below the text)
-        qr = qrcode.QRCode(version=1, box_size=qr_box_size, border=4)
-        qr.add_data(info["barcode"])
-        qr.make(fit=True)
-        img = qr.make_image(fill_color="black", back_color="white")
-        img_io = BytesIO()
-        img.save(img_io, "PNG")
-        img_io.seek(0)
-
-        # The drawImage Y position is the bottom-left corner.
-        # Bottom corner Y = Anchor Y (top of QR) - QR Size
-        qr_bottom_y = qr_top_anchor_y - qr_size
-
-        c.drawImage(
-            ImageReader(img_io),
-            (width - qr_size) / 2,
-            qr_bottom_y, # This is the bottom-left corner
-            width=qr_size,
-            height=qr_size,
-            mask="auto"
-        )
+            def draw_code(qr_x, qr_y, code=barcode):
+                draw_qr(c, code, qr_x, qr_y, sheet.qr_size)
 
-        # 3. Quantity text (Bottom - below the QR)
-        c.setFont("Helvetica", 10) # Slightly smaller font
-        qty_baseline_y = qr_bottom_y - 3 * mm # 3mm buffer below QR
-        c.drawCentredString(width / 2, qty_baseline_y,
-                            f"Qty in this box: {info['quantity_in_box']}")
+        if sheet.layout == 'stacked':
+            _draw_stacked(c, sheet, x, top, text_lines, info['quantity_in_box'], draw_code)
+        else:
+            _draw_side(c, sheet, x, top, text_lines, info['quantity_in_box'], draw_code, lines)
 
-        # 4. Separator line (Near the bottom of the 38mm slot)
-        c.setStrokeColorRGB(0.85, 0.85, 0.85)
-        c.line(margin_x, y - 37 * mm, width - margin_x, y - 37 * mm) # Drawn 1mm from the bottom of the slot
+        if sheet.separators:
+            # drawn 1mm from the bottom of the slot
+            bottom = top - sheet.label_height + 1 * mm
+            c.setStrokeColorRGB(0.85, 0.85, 0.85)
+            c.line(x + inset, bottom, x + sheet.label_width - inset, bottom)
 
     # -----------------------------------------------------------------
     # 4. Save
     # -----------------------------------------------------------------
     c.save()
     buffer.seek(0)
-    return buffer
\ No newline at end of file
+    return buffer
@@ -0,0 +1,87 @@
+"""
+List/detail projections and sparse fieldsets (?fields=) for heavy resources.
+
+Each resource declares the columns and embedded relations a client may ask
+for, plus two named select strings: a slim `list` projection for directory and
+picker screens and the full `detail` projection. A request picks one with
+`?view=list|detail`, or asks for exactly the fields it shows:
+
+    GET /api/v1/employees?fields=id,first_name,departments.name
+    GET /api/v1/tasks?fields=id,title,task_assignments.employees
+
+Field names are the keys of the JSON response; `relation.field` selects one
+field of an embedded relation and a bare relation name selects all its
+allowed fields. Anything outside the allow-list is rejected with a 400.
+"""
+from flask import request
+
+
+class ProjectionError(ValueError):
+    """Unknown ?fields= entry or ?view= value; views answer it with a 400."""
+
+
+class Embed:
+    """An embedded relation: the PostgREST relation hint and its selectable fields."""
+
+    def __init__(self, relation: str, fields):
+        self.relation = relation
+        # a field is either a column name or {name: select fragment} for nested embeds
+        self.fields = dict(fields) if isinstance(fields, dict) else {name: name for name in fields}
+
+    def select(self, names=None) -> str:
+        fragments = [self.fields[name] for name in (names or self.fields)]
+        return f"{self.relation}({', '.join(fragments)})"
+
+
+class Projection:
+    """
+    Allow-list and named projections of one resource.
+
+    `required` columns are always selected, e.g. the keys used for pagination.
+    `views` adds resource-specific named projections next to list and detail.
+    """
+
+    def __init__(self, columns, embeds: dict, list: str, detail: str, required=(), views=None):
+        self.columns = tuple(columns)
+        self.embeds = embeds
+        self.views = {'list': list, 'detail': detail, **(views or {})}
+        self.required = tuple(required)
+
+    def parse_fields(self, spec: str) -> str:
+        """Translate a ?fields= value into a PostgREST select string."""
+        columns = list(self.required)
+        embedded = {}
+        for field in filter(None, (part.strip() for part in spec.split(','))):
+            name, _, sub = field.partition('.')
+            if not sub and name in self.columns:
+                if name not in columns:
+                    columns.append(name)
+            elif name in self.embeds and (not sub or sub in self.embeds[name].fields):
+                selected = embedded.setdefault(name, [])
+                for sub_name in ([sub] if sub else self.embeds[name].fields):
+                    if sub_name not in selected:
+                        selected.append(sub_name)
+            else:
+                raise ProjectionError(f"Unknown field: {field}")
+        if not columns and not embedded:
+            raise ProjectionError("fields must name at least one field")
+        return ', '.join(columns + [self.embeds[name].select(names) for name, names in embedded.items()])
+
+    def select(self, default: str = 'detail') -> str:
+        """Select string for the current request: ?fields=, then ?view=, then `default`."""
+        if request.args.get('fields'):
+            return self.parse_fields(request.args['fields'])
+        view = request.args.get('view', default)
+        if view not in self.views:
+            raise ProjectionError(f"view must be one of: {', '.join(self.views)}")
+        return self.views[view]
+
+    def inner(self, select: str, name: str) -> str:
+        """
+        Turn embed `name` of a select string into an inner join, so the query
+        can filter on it; the embed is added with its first field if absent.
+        """
+        embed = self.embeds[name]
+        if f"{embed.relation}(" in select:
+            return select.replace(f"{embed.relation}(", f"{embed.relation}!inner(", 1)
+        return f"{select}, {embed.relation}!inner({next(iter(embed.fields.values()))})"
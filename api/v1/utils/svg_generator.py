@@ -0,0 +1,74 @@
+from datetime import datetime
+from xml.sax.saxutils import escape
+from api.v1.utils.pdf_generator import qr_runs
+
+# Layout in millimetres: a header, then one label per row as on the PDF
+SVG_WIDTH = 100
+SVG_HEADER_HEIGHT = 30
+SVG_ROW_HEIGHT = 38
+SVG_QR_SIZE = 25
+
+
+def qr_svg_path(data: str) -> tuple:
+    """(modules, SVG path data) of the QR code for `data`, one subpath per run of dark modules."""
+    modules, runs = qr_runs(data)
+    return modules, ''.join(f"M{col} {row}h{length}v1h-{length}z" for row, col, length in runs)
+
+
+def encode_svg_chunk(barcodes: list) -> list:
+    """qr_svg_path() of every barcode in the chunk, for worker processes (see label_services)."""
+    return [qr_svg_path(barcode) for barcode in barcodes]
+
+
+def generate_barcode_svg(
+    barcodes_data,
+    item_name,
+    batch_id,
+    boxes_count,
+    quantity_per_box,
+    qr_paths=None
+):
+    """
+    All labels of a batch as one SVG document, for browser preview and
+    printers that take vector input.
+
+    barcodes_data       : list[dict] → {'barcode': str, 'quantity_in_box': int}
+    item_name           : str
+    batch_id            : str
+    boxes_count         : int
+    quantity_per_box    : int
+    qr_paths            : list (optional) → qr_svg_path() of each barcode, already encoded
+
+    QR codes are vector paths built from the same cached module runs as the
+    PDF labels. Returns the SVG document as a string.
+    """
+    height = SVG_HEADER_HEIGHT + len(barcodes_data) * SVG_ROW_HEIGHT
+    center = SVG_WIDTH / 2
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{SVG_WIDTH}mm" height="{height}mm" '
+        f'viewBox="0 0 {SVG_WIDTH} {height}" font-family="Helvetica, Arial, sans-serif" text-anchor="middle">',
+        f'<rect width="{SVG_WIDTH}" height="{height}" fill="#fff"/>',
+        f'<text x="{center}" y="9" font-size="6" font-weight="bold">{escape(str(item_name))}</text>',
+        f'<text x="{center}" y="16" font-size="4">Batch ID: {escape(str(batch_id))}</text>',
+        f'<text x="{center}" y="22" font-size="3.6">{boxes_count} Box{"es" if boxes_count != 1 else ""} • '
+        f'{quantity_per_box} pcs per box</text>',
+        f'<text x="{center}" y="27" font-size="3" font-style="italic">'
+        f'Generated: {datetime.now().strftime("%Y-%m-%d %H:%M")}</text>',
+    ]
+
+    qr_x = (SVG_WIDTH - SVG_QR_SIZE) / 2
+    for idx, info in enumerate(barcodes_data):
+        y = SVG_HEADER_HEIGHT + idx * SVG_ROW_HEIGHT
+        barcode = escape(info['barcode'])
+        modules, path = qr_paths[idx] if qr_paths is not None else qr_svg_path(info['barcode'])
+        scale = SVG_QR_SIZE / modules
+        parts.append(
+            f'<text x="{center}" y="{y + 4}" font-size="3.6" font-weight="bold">{barcode}</text>'
+            f'<path transform="translate({qr_x} {y + 6}) scale({scale:.4f})" d="{path}"/>'
+            f'<text x="{center}" y="{y + 6 + SVG_QR_SIZE + 4}" font-size="3.4">'
+            f'Qty in this box: {info["quantity_in_box"]}</text>'
+            f'<line x1="10" y1="{y + SVG_ROW_HEIGHT - 1}" x2="{SVG_WIDTH - 10}" y2="{y + SVG_ROW_HEIGHT - 1}" '
+            f'stroke="#d9d9d9" stroke-width="0.3"/>'
+        )
+    parts.append('</svg>\n')
+    return '\n'.join(parts)
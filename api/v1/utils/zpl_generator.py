@@ -0,0 +1,70 @@
+from datetime import datetime
+from os import getenv
+
+# Label stock in printer dots (203 dpi: 812 x 406 = 4" x 2")
+ZPL_LABEL_WIDTH = int(getenv('ZPL_LABEL_WIDTH', 812))
+ZPL_LABEL_HEIGHT = int(getenv('ZPL_LABEL_HEIGHT', 406))
+# ^BQ magnification 1-10: module size in dots
+ZPL_QR_MAGNIFICATION = int(getenv('ZPL_QR_MAGNIFICATION', 6))
+# stored format in printer RAM holding the batch layout
+ZPL_FORMAT_NAME = 'R:EDIKELBL.ZPL'
+
+# characters with a meaning in ZPL field data, sent as ^FH hex escapes
+_ESCAPES = str.maketrans({'_': '_5F', '^': '_5E', '~': '_7E'})
+
+
+def _field(text) -> str:
+    return str(text).translate(_ESCAPES)
+
+
+def generate_barcode_zpl(
+    barcodes_data,
+    item_name,
+    batch_id,
+    boxes_count,
+    quantity_per_box
+):
+    """
+    One ZPL label per box for Zebra-style thermal printers.
+
+    barcodes_data       : list[dict] → {'barcode': str, 'quantity_in_box': int}
+    item_name           : str
+    batch_id            : str
+    boxes_count         : int
+    quantity_per_box    : int
+
+    The printer draws the QR code itself (^BQ), so nothing is encoded or
+    rasterised here. The layout and the fields shared by the batch are sent
+    once as a stored format (^DF); every label only recalls it (^XF) with its
+    barcode and quantity. Returns the ZPL document as a string.
+    """
+    # cut before escaping, so the cut never lands inside a _XX escape
+    item = _field(str(item_name)[:40])
+    batch = _field(batch_id)
+    generated = datetime.now().strftime('%Y-%m-%d %H:%M')
+    qr_x = 30
+    text_x = 300
+
+    template = (
+        f"^XA^DF{ZPL_FORMAT_NAME}^FS"
+        f"^CI28^PW{ZPL_LABEL_WIDTH}^LL{ZPL_LABEL_HEIGHT}^LH0,0"
+        f"^FO{text_x},30^A0N,34,34^FH^FD{item}^FS"
+        f"^FO{text_x},80^A0N,24,24^FH^FDBatch ID: {batch}^FS"
+        f"^FO{text_x},115^A0N,22,22^FD{boxes_count} Box{'es' if boxes_count != 1 else ''} - "
+        f"{quantity_per_box} pcs per box^FS"
+        f"^FO{text_x},{ZPL_LABEL_HEIGHT - 40}^A0N,18,18^FDGenerated: {generated}^FS"
+        f"^FO{qr_x},20^BQN,2,{ZPL_QR_MAGNIFICATION}^FN1^FS"
+        f"^FO{text_x},170^A0N,22,22^FB{ZPL_LABEL_WIDTH - text_x - 20},3,0,L^FN2^FS"
+        f"^FO{text_x},260^A0N,30,30^FN3^FS"
+        "^XZ\n"
+    )
+
+    labels = [template]
+    for info in barcodes_data:
+        barcode = _field(info['barcode'])
+        labels.append(
+            f"^XA^XF{ZPL_FORMAT_NAME}"
+            f"^FN1^FH^FDMA,{barcode}^FS^FN2^FH^FD{barcode}^FS"
+            f"^FN3^FDQty in this box: {info['quantity_in_box']}^FS^XZ\n"
+        )
+    return ''.join(labels)
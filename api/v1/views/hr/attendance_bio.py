@@ -1,5 +1,7 @@
 from flask import request, jsonify, g, current_app
 from api.v1.auth import login_required, role_required
+from api.v1.utils.export import export_requested, stream_export
+from api.v1.utils.pagination import PaginationError, paginate, pagination_requested
 from api.v1.services.hr.attendance_biometrics_service import BiometricService
 from api.v1.views import app_views
 import traceback
@@ -102,15 +104,21 @@ def fetch_attendance_transactions():
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
 
-        query = g.supabase_user_client.from_('attendance_transactions').select('employee:employee_id(first_name, last_name, id, email, avatar_url), date, check_in, check_out, status')
+        query = g.supabase_user_client.from_('attendance_transactions').select('id, employee:employee_id(first_name, last_name, id, email, avatar_url), date, check_in, check_out, status')
         if start_date:
             query = query.gte('date', start_date)
         if end_date:
             query = query.lte('date', end_date)
-        
+
+        if export_requested():
+            return stream_export(query, 'date', 'id', 'attendance_transactions')
+        if pagination_requested():
+            return jsonify(paginate(query, 'date', 'id')), 200
         response = query.execute()
         return jsonify(response.data), 200
     
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         current_app.logger.error(f"Unexpected error: {str(e)}")
         traceback.print_exc()
@@ -1,5 +1,6 @@
 from flask import current_app, request, jsonify, g
 from api.v1.auth import login_required, role_required, service_supabase_client
+from api.v1.utils.caller_context import get_caller_employee_id
 from uuid import UUID
 from api.v1.views import app_views
 from pydantic import ValidationError
@@ -17,8 +18,8 @@ from api.v1.services.hr.payroll_services import (
 def get_deductions(employee_id):
     try:
         if g.user_role not in ['super_admin', 'hr_manager']:
-            user_employee_id = g.supabase_user_client.from_('employees').select('id').eq('user_id', g.current_user).execute()
-            if not user_employee_id.data or user_employee_id.data[0]['id'] != employee_id:
+            user_employee_id = get_caller_employee_id()
+            if not user_employee_id or user_employee_id != str(employee_id):
                 return jsonify({"error": "Unauthorized access to another employee's information"}), 403
         response = g.supabase_user_client.from_('deductions').select('id, employee:employee_id(first_name, last_name), pardoned_fee, status, reason, instances, default_charge:default_charge_id(id, charge_name, description, penalty_fee)').eq('employee_id', employee_id).execute()
         if response.data:
@@ -37,10 +38,10 @@ def create_deduction():
     if not data:
         return jsonify({"error": "No data provided, request body must be JSON"}), 400
     try:
-        creator_response = g.supabase_user_client.from_('employees').select('id').eq('user_id', g.current_user).execute()
-        if not creator_response.data:
+        creator_id = get_caller_employee_id()
+        if not creator_id:
             return jsonify({"error": "Creator employee record not found"}), 404
-        data['created_by'] = creator_response.data[0]['id']
+        data['created_by'] = creator_id
         deduction_data = DeductionCreateSchema(**data)
         
         employee_check = g.supabase_user_client.from_('employees').select('id').eq('id', deduction_data.employee_id).execute()
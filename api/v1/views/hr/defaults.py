@@ -1,5 +1,7 @@
 from flask import current_app, request, jsonify, g
 from api.v1.auth import login_required, role_required, service_supabase_client
+from api.v1.utils.http_cache import conditional_get
+from api.v1.utils.caller_context import get_caller_employee_id
 from api.v1.views import app_views
 from api.v1.services.hr.payroll_services import (
     DeductionCreateSchema,
@@ -12,6 +14,7 @@ import re
 from uuid import UUID
 
 @app_views.route('/default_charges', methods=['GET'])
+@conditional_get
 @login_required
 @role_required(['super_admin', 'hr_manager', 'manager', 'user'])
 def get_default_charges():
@@ -45,11 +48,10 @@ def create_default_charge():
     if not data:
         return jsonify({"error": "No data provided, request body must be JSON"}), 400
     try:
-        creator_response = g.supabase_user_client.from_('employees').select('id').eq('user_id', g.current_user).execute()
-        if not creator_response.data:
-            print(creator_response)
+        creator_id = get_caller_employee_id()
+        if not creator_id:
             return jsonify({"error": "Creator employee record not found"}), 404
-        data['created_by'] = creator_response.data[0]['id']
+        data['created_by'] = creator_id
 
         default_charge = DefaultChargeCreateSchema(**data)
 
@@ -1,5 +1,9 @@
-from flask import Blueprint, request, jsonify, g
+from flask import Blueprint, request, jsonify, g, current_app
 from api.v1.auth import login_required, role_required, service_supabase_client
+from api.v1.utils.caller_context import get_caller_employee_id, invalidate_caller
+from api.v1.utils.export import export_requested, stream_export
+from api.v1.utils.pagination import PaginationError, paginate, pagination_requested
+from api.v1.utils.projections import ProjectionError
 from uuid import UUID
 from api.v1.views import app_views
 import traceback
@@ -15,6 +19,7 @@ from api.v1.services.hr.auth_services import (
 )
 from api.v1.services.hr.employee_services import (
     EmployeeUpdateSchema,
+    EMPLOYEE_PROJECTION,
     ALLOWED_ROLES,
 )
 
@@ -41,19 +46,27 @@ def get_employeee():
     - Other users: See basic employee infor (if policy allows).
     """
     try:
+        select = EMPLOYEE_PROJECTION.select()
         if g.user_role == 'user':
-            response = g.supabase_user_client.from_('employees').select('*, departments(name), shift_types(name, start_time, end_time), employee_documents!employee_documents_employee_id_fkey(id, name, url, type, category, created_at)').eq('user_id', str(g.current_user)).is_('deleted_at', 'null').execute()
+            response = g.supabase_user_client.from_('employees').select(select).eq('user_id', str(g.current_user)).is_('deleted_at', 'null').execute()
             if not response.data:
                 return jsonify({"message": "No employee record found for current user."}), 404
             return jsonify(**response.data[0], role=g.user_role), 200
         else:
-            response = g.supabase_user_client.from_('employees').select('*, departments(name), shift_types(name, start_time, end_time), employee_documents!employee_documents_employee_id_fkey(id, name, url, type, category, created_at)').is_('deleted_at', 'null').execute()
+            query = g.supabase_user_client.from_('employees').select(select).is_('deleted_at', 'null')
+            if export_requested():
+                return stream_export(query, 'created_at', 'id', 'employees')
+            if pagination_requested():
+                return jsonify(paginate(query, 'created_at', 'id')), 200
+            response = query.execute()
             if response.data:
                 return jsonify(response.data), 200
         return jsonify({"message": "No employees found"}), 200
     
+    except (PaginationError, ProjectionError) as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
-        print(f"Error fetching employees: {str(e)}")
+        current_app.logger.error("Error fetching employees: %s", e)
         return jsonify({"error": str(e)}), 500
     
 
@@ -64,14 +77,17 @@ def get_employee(employee_id):
     """
     Get a single employee by ID.
     RLS policies will ensure only authorized users can view the specific employee.
+    Documents are included only with ?view=detail or ?fields=employee_documents.
     """
     if not is_valid_uuid(str(employee_id)):
         return jsonify({"error": "Invalid employee ID format"}), 400
     try:
-        response = g.supabase_user_client.from_('employees').select('*, departments(name), shift_types(name, start_time, end_time)').eq('id', str(employee_id)).execute()
+        response = g.supabase_user_client.from_('employees').select(EMPLOYEE_PROJECTION.select(default='record')).eq('id', str(employee_id)).execute()
         if response.data:
             return jsonify(**response.data[0], role=g.user_role), 200
         return jsonify({"error": "Employee not found"}), 404
+    except ProjectionError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -101,7 +117,6 @@ def create_employee():
     Only accessible by Super Admin and HR Manager.
     """
     data = request.get_json()
-    print(data)
     if not data:
         return jsonify({"error": "No data provided, request body must be JSON"}), 400
     try:
@@ -127,7 +142,7 @@ def create_employee():
         # catch pydantic validation errors
         return jsonify({"error": "Validation failed", "details": str(e.errors())}), 400
     except Exception as e:
-        print(f"Error creating employee: {str(e)}")
+        current_app.logger.exception("Error creating employee: %s", e)
         #catch any other exceptions and return a generic error message
         return jsonify({"error": str(e)}), 500
 
@@ -150,10 +165,9 @@ def update_employee(employee_id):
         return jsonify({"error": "No data provided, request body must be JSON"}), 400
     try:
         update_data = EmployeeUpdateSchema(**data)
-        print("Update data: ", update_data)
         employee_table_data = update_data.model_dump(exclude_unset=True, exclude={'role'})
         new_role = update_data.role
-        print('User new role: ', new_role, update_data)
+        current_app.logger.debug("Updating employee %s, new role: %s", employee_id, new_role)
 
         if g.user_role in ['super_admin', 'hr_manager']:
             if g.user_role == 'hr_manager' and new_role == 'super_admin':
@@ -172,11 +186,10 @@ def update_employee(employee_id):
                     if not success:
                         return jsonify({"error": "Failed to update user role in Supabase Auth."}), 500
                 else:
-                    print(f"Warning: Employee {employee_id} has no linked user_id for role update.")
-            print(employee_table_data)
+                    current_app.logger.warning("Employee %s has no linked user_id for role update.", employee_id)
             # Update the employee record in public.employees
             response = g.service_supabase_client.from_('employees').update(employee_table_data).eq('id', str(employee_id)).execute()
-            print(response)
+            invalidate_caller(user_id=linked_user_id, employee_id=employee_id)
             if response.data or new_role:
                 return jsonify(response.data[0]), 200
             
@@ -186,17 +199,16 @@ def update_employee(employee_id):
             if new_role:  # Prevent users from trying to change their own role
                 return jsonify({"error": "Users are not allowed to change their own role."}), 403
             
-            employee_lookup_response = g.supabase_user_client.from_('employees').select('id').eq('user_id', g.current_user).execute()
-            if not employee_lookup_response.data or not employee_lookup_response.data[0]:
+            actual_employee_id_for_user = get_caller_employee_id()
+            if not actual_employee_id_for_user:
                 return jsonify({"message": "Employee record not found for current user."}), 403
-            actual_employee_id_for_user = employee_lookup_response.data[0]['id']
 
             if str(employee_id) != str(actual_employee_id_for_user):
                  return jsonify({"message": "Permission denied: You can only update your own record."}), 403
 
             # Use g.supabase_user_client for RLS-aware update. RLS will enforce field restrictions.
             response = g.supabase_user_client.from_('employees').update(employee_table_data).eq('id', str(employee_id)).execute()
-            print(response)
+            invalidate_caller(user_id=g.current_user)
             if response.data:
                 return jsonify(response.data[0]), 200
             return jsonify({"error": "Failed to update employee or employee not found."}), 404
@@ -209,7 +221,7 @@ def update_employee(employee_id):
     except ValueError as e:
         return jsonify({"error": "Value error", "details": str(e)}), 400
     except Exception as e:
-        print(e)
+        current_app.logger.exception("Error updating employee %s: %s", employee_id, e)
         return jsonify({"error": "Internal Error", "details": str(e)}), 500
 
 
@@ -240,21 +252,21 @@ def soft_delete_employee(employee_id):
         if len(employee_user_req.data) < 1:
             return jsonify({"error": "Employee not found."}), 404
         employee_user_id = employee_user_req.data[0]['user_id']
-        print(f"Employee {employee_id} has user_id: {employee_user_id}")
+        current_app.logger.debug("Employee %s has user_id: %s", employee_id, employee_user_id)
         if employee_user_id:
             # Delete the associated Supabase Auth user
             g.service_supabase_client.auth.admin.delete_user(str(employee_user_id))
 
         # Use service_supabase_client to bypass RLS for this administrative update
         response = g.supabase_user_client.from_('employees').update(update_payload).eq('id', str(employee_id)).execute()
+        invalidate_caller(user_id=employee_user_id, employee_id=employee_id)
 
         if response.data:
             return jsonify({"message": f"Employee {employee_id} deleted (terminated) successfully."}), 200
         else:
             return jsonify({"error": "Failed to soft-delete employee or employee not found."}), 404
     except Exception as e:
-        traceback.print_exc()
-        print(f"Error soft-deleting employee {employee_id}: {str(e)}")
+        current_app.logger.exception("Error soft-deleting employee %s: %s", employee_id, e)
         return jsonify({"error": "Internal Error"}), 500
 
 
@@ -272,7 +284,6 @@ def create_employee_document(employee_id):
 
     try:
         documents = request.get_json().get('documents', [])
-        print(documents)
         if not documents:
             return jsonify({"error": "No documents provided"}), 400
 
@@ -295,7 +306,6 @@ def update_employee_document(employee_document_id):
     try:
         document_data = EmployeeDocumentUpdateSchema(**request.get_json())
         document_upload_payload = document_data.model_dump(exclude_unset=True)
-        print(document_data)
         # Update the document
         response = g.supabase_user_client.from_('employee_documents').update(document_upload_payload).eq('id', str(employee_document_id)).execute()
         if response.data:
@@ -319,7 +329,6 @@ def delete_employee_document(employee_document_id):
         if not document.data or not document.data[0]:
             return jsonify({"error": "Document not found"}), 404
         response = g.supabase_user_client.from_('employee_documents').delete().eq('id', str(employee_document_id)).execute()
-        print(response)
         if response.data:
             return jsonify({"message": "Document deleted successfully"}), 200
         return jsonify({"error": "Failed to delete document"}), 400
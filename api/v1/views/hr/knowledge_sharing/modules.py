@@ -1,5 +1,7 @@
 from flask import Blueprint, request, jsonify, g, current_app
 from api.v1.auth import login_required, role_required
+from api.v1.utils.http_cache import conditional_get
+from api.v1.utils.caller_context import get_caller_profile
 from uuid import UUID
 from api.v1.views import app_views
 import traceback
@@ -24,6 +26,7 @@ The Idea
 """
 
 @app_views.route('/kss/modules', methods=['GET'])
+@conditional_get
 @login_required
 @role_required(['hr_manager', 'super_admin', 'user', 'manager'])
 def get_modules():
@@ -31,19 +34,21 @@ def get_modules():
     try:
         if g.user_role in ['hr_manager', 'super_admin']:
             modules = g.supabase_user_client.from_('modules').select('*, lessons(*)').execute()
-        elif g.user_role == 'manager':
+            return jsonify(modules.data), 200
+
+        # Assignments are matched on the caller's department
+        employee = get_caller_profile()
+        if not employee or not employee['is_active']:
+            return jsonify({"error": "Employee not found"}), 404
+        employee_department_id = employee['department_id']
+
+        if g.user_role == 'manager':
             # Get modules assigned to manager's role or department
-            employee = g.supabase_user_client.from_('employees').select('department:department_id(id, name)').eq('user_id', g.current_user).is_('deleted_at', 'null').execute()
-            print('employee ===== ', employee)
-            employee_department_id = employee.data[0]['department']['id']  # Adjusted to access nested department ID
             module_assignments = g.supabase_user_client.from_('module_assignments').select('module_id').or_(f"department_id.eq.{employee_department_id},role.eq.manager").execute()
             assigned_module_ids = [assignment['module_id'] for assignment in module_assignments.data]
             modules = g.supabase_user_client.from_('modules').select('*, lessons(*)').in_('id', assigned_module_ids).execute()
         else:
             # Employee case: Get modules assigned to employee's department or non-manager roles
-            employee = g.supabase_user_client.from_('employees').select('department:department_id(name, id)').eq('user_id', g.current_user).is_('deleted_at', 'null').execute()
-            employee_department_id = employee.data[0]['department']['id']  # Access nested department ID
-
             # Query module_assignments where either department_id matches or role matches (excluding manager role)
             module_assignments = g.supabase_user_client.from_('module_assignments').select('module_id').or_(
                 f"department_id.eq.{employee_department_id},and(role.eq.{g.user_role},role.neq.manager)"
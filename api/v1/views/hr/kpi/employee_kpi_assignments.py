@@ -1,5 +1,6 @@
 from flask import request, jsonify, g, current_app
 from api.v1.auth import login_required, role_required
+from api.v1.utils.caller_context import get_caller_employee_id
 from uuid import UUID
 from api.v1.views import app_views
 import traceback
@@ -70,10 +71,9 @@ def update_employee_kpi_assignment(assignment_id):
 
         #check if status is present and set to 'Approved' or 'Rejected'
         if 'status' in assignment_data.keys() and assignment_data['status'] in ['Accepted', 'Rejected']:
-            reviewed_by = g.supabase_user_client.from_('employees').select('id').eq('user_id', g.current_user).is_('deleted_at', 'null').execute()
-            if not reviewed_by.data:
+            reviewed_by_id = get_caller_employee_id(active_only=True)
+            if not reviewed_by_id:
                 return jsonify({'error': "Could not fetch Reviewer's data"}),  401
-            reviewed_by_id = reviewed_by.data[0]['id']
             assignment_data['reviewed_by'] = reviewed_by_id
 
 
@@ -1,5 +1,6 @@
 from flask import request, jsonify, g, current_app
 from api.v1.auth import login_required, role_required
+from api.v1.utils.http_cache import conditional_get
 from uuid import UUID
 from api.v1.views import app_views
 import traceback
@@ -14,6 +15,7 @@ from api.v1.services.hr.kpi_services import (
 
 #get all kpi templates
 @app_views.route('/hr/kpi/templates', methods=['GET'])
+@conditional_get
 @login_required
 @role_required(['hr_manager', 'super_admin'])
 def get_kpi_templates():
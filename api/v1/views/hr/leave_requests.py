@@ -3,6 +3,8 @@
 from flask import request, jsonify, g
 from api.v1.views import app_views
 from api.v1.auth import login_required, role_required
+from api.v1.utils.caller_context import get_caller_employee_id, get_caller_profile
+from api.v1.utils.pagination import PaginationError, paginate, pagination_requested
 from uuid import UUID
 from datetime import date
 from pydantic import ValidationError
@@ -42,22 +44,20 @@ def get_leave_requests():
         # Role-based filtering
         if g.user_role == 'user':
             # Find employee's ID from current user
-            emp_res = g.supabase_user_client.from_('employees') \
-                .select('id').eq('user_id', g.current_user).single().execute()
-            if not emp_res.data:
+            employee_id = get_caller_employee_id()
+            if not employee_id:
                 return jsonify({"error": "Employee profile not found"}), 404
-            query = query.eq('employee_id', emp_res.data['id'])
+            query = query.eq('employee_id', employee_id)
 
         elif g.user_role == 'manager':
             # Find manager's employee record
-            mgr_res = g.supabase_user_client.from_('employees') \
-                .select('department_id').eq('user_id', g.current_user).single().execute()
-            if not mgr_res.data or not mgr_res.data.get('department_id'):
+            manager = get_caller_profile()
+            if not manager or not manager.get('department_id'):
                 return jsonify({"error": "Manager has no department assigned"}), 403
 
             # Get employees in the same department
             dept_employees = g.supabase_user_client.from_('employees') \
-                .select('id').eq('department_id', mgr_res.data['department_id']).execute()
+                .select('id').eq('department_id', manager['department_id']).execute()
             employee_ids = [emp['id'] for emp in dept_employees.data]
             if not employee_ids:
                 return jsonify([]), 200
@@ -65,9 +65,13 @@ def get_leave_requests():
 
         # super_admin and hr_manager → see all (no filter)
 
+        if pagination_requested():
+            return jsonify(paginate(query, 'created_at', 'id')), 200
         response = query.execute()
         return jsonify(response.data or []), 200  # Always 200, even if empty
 
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -205,10 +209,9 @@ def update_leave_request(request_id):
                 .eq('id', req_res.data['employee_id']).execute()
 
             # Set approver
-            approver_res = g.supabase_user_client.from_('employees') \
-                .select('id').eq('user_id', g.current_user).single().execute()
-            if approver_res.data:
-                update_payload['approved_by'] = approver_res.data['id']
+            approver_id = get_caller_employee_id()
+            if approver_id:
+                update_payload['approved_by'] = approver_id
 
         # Execute update
         response = g.supabase_user_client.from_('leave_requests') \
@@ -1,6 +1,7 @@
 from flask import request, jsonify, g
 from api.v1.views import app_views
 from api.v1.auth import login_required, role_required
+from api.v1.utils.http_cache import conditional_get
 from uuid import UUID
 from datetime import datetime
 from pydantic import ValidationError
@@ -21,6 +22,7 @@ def is_valid_uuid(uuid_string):
 
 # GET all shift types → return empty list instead of 404
 @app_views.route('/shift_types', methods=['GET'])
+@conditional_get
 @login_required
 @role_required(['super_admin', 'hr_manager', 'manager', 'user'])
 def get_shift_types():
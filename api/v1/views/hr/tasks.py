@@ -1,11 +1,14 @@
 from flask import request, jsonify, g
 from api.v1.views import app_views
 from api.v1.auth import login_required, role_required
+from api.v1.utils.caller_context import get_caller_employee_id
+from api.v1.utils.pagination import PaginationError, paginate, pagination_requested
+from api.v1.utils.projections import ProjectionError
 from uuid import UUID
 from datetime import datetime
 from pydantic import ValidationError
 from flask_cors import cross_origin
-from api.v1.services.hr.task_services import TaskCreateSchema, TaskUpdateSchema
+from api.v1.services.hr.task_services import TaskCreateSchema, TaskUpdateSchema, TASK_PROJECTION
 from api.v1.services.hr.document_services import (
     TaskDocumentCreateSchema,
     TaskDocumentUpdateSchema
@@ -27,27 +30,31 @@ def is_valid_uuid(uuid_string):
 def get_tasks():
     try:
         """Task """
+        select = TASK_PROJECTION.select()
         if g.user_role in ['super_admin', 'hr_manager', 'manager']:
-            response = g.supabase_user_client.from_('tasks').select(
-                "*, task_assignments(*, employees(id, first_name, last_name, email, avatar_url)), task_documents(*)"
-            ).execute()
+            query = g.supabase_user_client.from_('tasks').select(select)
+            if pagination_requested():
+                return jsonify(paginate(query, 'created_at', 'id')), 200
+            response = query.execute()
             if response.data:
                 return jsonify(response.data), 200
             return jsonify({"message": "No tasks found"}), 204
         
-        current_user = g.supabase_user_client.from_('employees').select('id').eq('user_id', g.current_user).is_('deleted_at', 'null').execute()
-        if not current_user.data:
+        employee_id = get_caller_employee_id(active_only=True)
+        if not employee_id:
             return jsonify({"error": "Current user not found"}), 400
-        employee_id = current_user.data[0]['id']
-        print('employee id',employee_id)
-        response = g.supabase_user_client.from_('tasks').select(
-            "*, task_assignments!inner(*, employees(id, first_name, last_name, email, avatar_url)), task_documents(*)"
-        ).eq('task_assignments.employee_id', str(employee_id)).execute()
-        print(response)
+        query = g.supabase_user_client.from_('tasks').select(
+            TASK_PROJECTION.inner(select, 'task_assignments')
+        ).eq('task_assignments.employee_id', str(employee_id))
+        if pagination_requested():
+            return jsonify(paginate(query, 'created_at', 'id')), 200
+        response = query.execute()
         if response.data:
             return jsonify(response.data), 200
 
         return jsonify([]), 200
+    except (PaginationError, ProjectionError) as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -82,8 +89,8 @@ def create_task():
         task_data = TaskCreateSchema(**data)
     
         # Get creator's employee ID
-        creator_response = g.supabase_user_client.from_('employees').select('id').eq('user_id', g.current_user).is_('deleted_at', 'null').execute()
-        if not creator_response.data:
+        creator_id = get_caller_employee_id(active_only=True)
+        if not creator_id:
             return jsonify({"error": "Creator employee record not found"}), 403
 
         task_payload = {
@@ -91,7 +98,7 @@ def create_task():
             "description": task_data.description,
             "start_date": task_data.start_date,
             "end_date": task_data.end_date,
-            "created_by": creator_response.data[0]['id'],
+            "created_by": creator_id,
             "status": task_data.status,
             "priority": task_data.priority
         }
@@ -122,7 +129,7 @@ def create_task():
         for task_document in task_documents:
             validated_task_document = TaskDocumentCreateSchema(**task_document, task_id=task_response.data[0]['id'])
             validated_task_document.task_id = task_response.data[0]['id']
-            validated_task_document.created_by = creator_response.data[0]['id']
+            validated_task_document.created_by = creator_id
 
             document_response = g.supabase_user_client.from_('task_documents').insert(validated_task_document.model_dump()).execute()
             if not document_response.data:
@@ -196,12 +203,12 @@ def add_task_document(task_id):
         task_document_data = TaskDocumentCreateSchema(**data, task_id=str(task_id))
 
         # Validate creator
-        creator_response = g.supabase_user_client.from_('employees').select('id').eq('user_id', g.current_user).is_('deleted_at', 'null').execute()
+        creator_id = get_caller_employee_id(active_only=True)
         task_assigned_to = g.supabase_user_client.from_('task_assignments').select('employees:employee_id(user_id)').eq('task_id', str(task_id)).execute()
         task_assigned_to_ids = [assignment['employees']['user_id'] for assignment in task_assigned_to.data] if task_assigned_to.data else []
-        if not creator_response.data or g.current_user not in task_assigned_to_ids or g.user_role not in ['hr_manager', "super_admin"]:
+        if not creator_id or g.current_user not in task_assigned_to_ids or g.user_role not in ['hr_manager', "super_admin"]:
             return jsonify({"error": "User is not assigned to this task"}), 403
-        task_document_data.created_by = creator_response.data[0]['id']
+        task_document_data.created_by = creator_id
 
        
 
@@ -230,8 +237,8 @@ def edit_task_document(task_id, document_id):
         task_update_payload = task_document_data.model_dump(exclude_unset=True)
 
         # Validate updater
-        updater_response = g.supabase_user_client.from_('employees').select('id').eq('user_id', g.current_user).is_('deleted_at', 'null').execute()
-        if not updater_response.data:
+        updater_id = get_caller_employee_id(active_only=True)
+        if not updater_id:
             return jsonify({"error": "User is not a valid employee"}), 403
         
         task_assigned_to = g.supabase_user_client.from_('task_assignments').select('employees:employee_id(user_id)').eq('task_id', str(task_id)).execute()
@@ -242,7 +249,7 @@ def edit_task_document(task_id, document_id):
         if not task.data:
             return jsonify({"error": "Task not found"}), 404
 
-        if g.current_user not in task_assigned_to_ids and task.data[0]['created_by'] != updater_response.data[0]['id']:
+        if g.current_user not in task_assigned_to_ids and task.data[0]['created_by'] != updater_id:
             return jsonify({"error": "User is not the creator and not an assignee of this task"}), 403
 
         response = g.supabase_user_client.from_('task_documents').update(task_update_payload).eq('id', str(document_id)).execute()
@@ -272,10 +279,9 @@ def delete_task_document(task_id, document_id):
             return jsonify({"error": "Task not found"}), 404
         created_by = created.data[0]['created_by']
 
-        employee = g.supabase_user_client.from_('employees').select('id').eq('user_id', g.current_user).is_('deleted_at', 'null').execute()
-        if not employee.data:
+        employee_id = get_caller_employee_id(active_only=True)
+        if not employee_id:
             return jsonify({"error": "Employee record not found"}), 404
-        employee_id = employee.data[0]['id']
 
         print(employee_id, created_by, task_assigned_to_ids)
 
@@ -306,10 +312,9 @@ def add_employee_to_task(task_id):
         if not employee_id or not is_valid_uuid(str(employee_id)):
             return jsonify({"error": "Invalid employee ID format"}), 400
 
-        created_by = g.supabase_user_client.from_('employees').select('id').eq('user_id', g.current_user).is_('deleted_at', 'null').execute()
-        if not created_by.data:
+        created_by_id = get_caller_employee_id(active_only=True)
+        if not created_by_id:
             return jsonify({"error": "Creator employee record not found"}), 403
-        created_by_id = created_by.data[0]['id']
 
         task_response = g.supabase_user_client.from_('tasks').select('id, created_by').eq('id', str(task_id)).execute()
         if not task_response.data:
@@ -334,10 +339,9 @@ def remove_employee_from_task(task_id, employee_id):
         return jsonify({"error": "Invalid task ID or employee ID format"}), 400
     try:
         # Validate user permissions
-        created_by = g.supabase_user_client.from_('employees').select('id').eq('user_id', g.current_user).is_('deleted_at', 'null').execute()
-        if not created_by.data:
+        created_by_id = get_caller_employee_id(active_only=True)
+        if not created_by_id:
             return jsonify({"error": "Creator employee record not found"}), 403
-        created_by_id = created_by.data[0]['id']
 
         task_response = g.supabase_user_client.from_('tasks').select('id, created_by').eq('id', str(task_id)).execute()
         if not task_response.data:
@@ -1,6 +1,10 @@
 from flask import g, current_app, jsonify, request
 from api.v1.views import app_views
 from api.v1.auth import login_required, role_required
+from api.v1.services.inventories.bom_services import invalidate_bom
+from api.v1.utils.http_cache import conditional_get
+from api.v1.utils.caller_context import get_caller_department
+from api.v1.utils.pagination import PaginationError, paginate, pagination_requested
 from pydantic import ValidationError
 from api.v1.services.inventories.components_services import (
     ComponentCreateSchema,
@@ -9,6 +13,7 @@ from api.v1.services.inventories.components_services import (
 from uuid import UUID
 
 @app_views.route('/components', methods=['GET'], strict_slashes=False)
+@conditional_get
 @role_required(['super_admin', 'manager', 'user'])
 @login_required
 def get_all_components():
@@ -16,10 +21,12 @@ def get_all_components():
     Fetch all components in the warehouse.
     """
     try:
-        user = g.supabase_user_client.from_('employees').select('department:department_id(name)').eq('user_id', g.current_user).execute()
-        department = user.data[0]['department']['name']
+        department = get_caller_department()
         if department == 'warehouse' or g.user_role == 'super_admin':
-            components = g.supabase_user_client.from_('components').select('component_id, name, description,  stock_quantity, color, sku, created_at, component_image').execute()
+            query = g.supabase_user_client.from_('components').select('component_id, name, description,  stock_quantity, color, sku, created_at, component_image')
+            if pagination_requested():
+                return jsonify({"status": "success", **paginate(query, 'created_at', 'component_id')}), 200
+            components = query.execute()
             if components.data:
                 return jsonify({
                     "status": "success",
@@ -33,6 +40,11 @@ def get_all_components():
             "status": "error",
             "message": "You do not have permission to perform this action"
         }), 403
+    except PaginationError as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             "status": "error",
@@ -47,8 +59,7 @@ def get_component(component_id):
     Fetch a specific component by its ID.
     """
     try:
-        user = g.supabase_user_client.from_('employees').select('department:department_id(name)').eq('user_id', g.current_user).execute()
-        department = user.data[0]['department']['name']
+        department = get_caller_department()
         if department == 'warehouse' or g.user_role == 'super_admin':
             component = g.supabase_user_client.from_('components').select('component_id, name, description, stock_quantity, color, sku, created_at, component_image').eq('component_id', component_id).execute()
             if component.data:
@@ -78,8 +89,7 @@ def create_component():
     Create a new component in the warehouse.
     """
     try:
-        user = g.supabase_user_client.from_('employees').select('department:department_id(name)').eq('user_id', g.current_user).execute()
-        department = user.data[0]['department']['name']
+        department = get_caller_department()
         if (department == 'warehouse' and g.user_role == 'manager') or g.user_role == 'super_admin':
             data = request.get_json()
             try:
@@ -89,6 +99,7 @@ def create_component():
                 
                 # Insert the new component
                 response = g.supabase_user_client.from_('components').insert(component_data).execute()
+                invalidate_bom()
                 if response.data:
                     return jsonify({
                         "status": "success",
@@ -125,8 +136,7 @@ def update_component(component_id):
     Update an existing component in the warehouse.
     """
     try:
-        user = g.supabase_user_client.from_('employees').select('department:department_id(name)').eq('user_id', g.current_user).execute()
-        department = user.data[0]['department']['name']
+        department = get_caller_department()
         if (department == 'warehouse' and g.user_role == 'manager') or g.user_role == 'super_admin':
             data = request.get_json()
             try:
@@ -143,6 +153,7 @@ def update_component(component_id):
 
                 # Update the component
                 response = g.supabase_user_client.from_('components').update(update_data).eq('component_id', component_id).execute()
+                invalidate_bom()
                 if response.data:
                     return jsonify({
                         "status": "success",
@@ -177,8 +188,7 @@ def update_component(component_id):
 def delete_component(component_id):
     """Delete a component by its ID"""
     try:
-        user = g.supabase_user_client.from_('employees').select('department:department_id(name)').eq('user_id', g.current_user).execute()
-        department = user.data[0]['department']['name']
+        department = get_caller_department()
         if (department == 'warehouse' and g.user_role == 'manager') or g.user_role == 'super_admin':
             # Check if the component exists
             component_check = g.supabase_user_client.from_('components').select('component_id').eq('component_id', component_id).execute()
@@ -190,6 +200,7 @@ def delete_component(component_id):
 
             # Delete the component
             response = g.supabase_user_client.from_('components').delete().eq('component_id', component_id).execute()
+            invalidate_bom()
             if response.data:
                 return jsonify({
                     "status": "success",
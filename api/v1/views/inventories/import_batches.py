@@ -1,6 +1,8 @@
 from flask import g, current_app, jsonify, request
 from api.v1.views import app_views
 from api.v1.auth import login_required, role_required
+from api.v1.utils.http_cache import conditional_get
+from api.v1.utils.caller_context import get_caller_department
 from pydantic import ValidationError
 from api.v1.services.inventories.import_services import (
     ImportServiceCreateSchema,
@@ -8,14 +10,14 @@ from api.v1.services.inventories.import_services import (
 )
 
 @app_views.route('/import_batches', methods=['GET'], strict_slashes=False)
+@conditional_get
 @role_required(['super_admin', 'manager', 'user'])
 def get_import_batches():
     """
     Fetch all import batches in the system.
     """
     try:
-        user = g.supabase_user_client.from_('employees').select('department:department_id(name)').eq('user_id', g.current_user).execute()
-        department = user.data[0]['department']['name']
+        department = get_caller_department()
         if department == 'warehouse' or g.user_role == 'super_admin':
             import_batches = g.supabase_user_client.from_('import_batches').select('*').execute()
             if import_batches.data:
@@ -44,8 +46,7 @@ def get_import_batch(batch_id):
     Fetch a specific import batch by its ID.
     """
     try:
-        user = g.supabase_user_client.from_('employees').select('department:department_id(name)').eq('user_id', g.current_user).execute()
-        department = user.data[0]['department']['name']
+        department = get_caller_department()
         if department == 'warehouse' or g.user_role == 'super_admin':
             import_batch = g.supabase_user_client.from_('import_batches').select('*').eq('batch_id', batch_id).execute()
             if import_batch.data:
@@ -75,8 +76,7 @@ def create_import_batch():
     Create a new import batch.
     """
     try:
-        user = g.supabase_user_client.from_('employees').select('department:department_id(name)').eq('user_id', g.current_user).execute()
-        department = user.data[0]['department']['name']
+        department = get_caller_department()
         if department == 'warehouse' or g.user_role == 'super_admin':
             data = request.get_json()
             validated_data = ImportServiceCreateSchema(**data)
@@ -120,8 +120,7 @@ def update_import_batch(batch_id):
     Update an existing import batch.
     """
     try:
-        user = g.supabase_user_client.from_('employees').select('department:department_id(name)').eq('user_id', g.current_user).execute()
-        department = user.data[0]['department']['name']
+        department = get_caller_department()
         if (department == 'warehouse' and g.user_role == 'manager') or g.user_role == 'super_admin':
             data = request.get_json()
             validated_data = ImportServiceUpdateSchema(**data)
@@ -172,8 +171,7 @@ def delete_import_batch(batch_id):
     Delete an import batch from the system.
     """
     try:
-        user = g.supabase_user_client.from_('employees').select('department:department_id(name)').eq('user_id', g.current_user).execute()
-        department = user.data[0]['department']['name']
+        department = get_caller_department()
         if department == 'warehouse' or g.user_role == 'super_admin':
             # Check if the import batch exists
             batch_check = g.supabase_user_client.from_('import_batches').select('batch_id').eq('batch_id', batch_id).execute()
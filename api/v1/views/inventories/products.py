@@ -4,6 +4,10 @@ from api.v1.services.inventories.products_services import ProductsCreateScheme,
 from flask import request, g, Blueprint, jsonify
 from api.v1.views import app_views
 from api.v1.auth import login_required, role_required
+from api.v1.services.inventories.bom_services import invalidate_bom
+from api.v1.utils.http_cache import conditional_get
+from api.v1.utils.caller_context import get_caller_department
+from api.v1.utils.pagination import PaginationError, paginate, pagination_requested
 import traceback
 from werkzeug.exceptions import BadRequest
 
@@ -12,6 +16,7 @@ from werkzeug.exceptions import BadRequest
 
 
 @app_views.route('/products', methods=['GET'], strict_slashes=False)
+@conditional_get
 @role_required(['super_admin', 'manager', 'user'])
 @login_required
 def get_all_products():
@@ -19,13 +24,12 @@ def get_all_products():
     fetch all the available poroducts in the database
     """
     try:
-        print(g.current_user)
-        user = g.supabase_user_client.from_('employees').select('id, department:department_id(name)').eq('user_id', g.current_user).execute()
-       
-        department = user.data[0]['department']['name']
-        print(department)
+        department = get_caller_department()
         if department in ['warehouse', 'sales']  or g.user_role == 'super_admin':
-            products = g.supabase_user_client.from_('products').select('product_id, sku,name, description, price, color, created_at, product_image').execute()
+            query = g.supabase_user_client.from_('products').select('product_id, sku,name, description, price, color, created_at, product_image')
+            if pagination_requested():
+                return jsonify({"status": "success", **paginate(query, 'created_at', 'product_id')}), 200
+            products = query.execute()
             if products.data:
                 return jsonify({
                     "status": "success",
@@ -39,6 +43,11 @@ def get_all_products():
             "status": "error",
             "message": "You do not have permission to perform this action"
         }), 403
+    except PaginationError as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             "status": "error",
@@ -54,8 +63,7 @@ def get_product(product_id):
     fetch a specific product by its ID
     """
     try:
-        user = g.supabase_user_client.from_('employees').select('department:department_id(name)').eq('user_id', g.current_user).execute()
-        department = user.data[0]['department']['name']
+        department = get_caller_department()
         if department == 'warehouse' or g.user_role == 'super_admin':
             product = g.supabase_user_client.from_('products').select('product_id, sku,name, description, price, color, created_at, product_image').eq('product_id', product_id).execute()
             if product.data:
@@ -86,9 +94,7 @@ def create_product():
     create a new product
     """
     try:
-        user = g.supabase_user_client.from_('employees').select('id, department:department_id(name)').eq('user_id', g.current_user).execute()
-      
-        department = user.data[0]['department']['name']
+        department = get_caller_department()
         if department == 'warehouse' or g.user_role == 'super_admin':
             print(request.get_json())
             data = request.get_json()
@@ -97,6 +103,7 @@ def create_product():
             product_data = validated_data.model_dump()
             print(product_data)
             new_product = g.supabase_user_client.from_('products').insert(product_data).execute()
+            invalidate_bom()
             if  new_product.data:
                 return jsonify({
                     "status": "success",
@@ -135,8 +142,7 @@ def update_product(product_id):
     update a product by its ID
     """
     try:
-        user = g.supabase_user_client.from_('employees').select('department:department_id(name)').eq('user_id', g.current_user).execute()
-        department = user.data[0]['department']['name']
+        department = get_caller_department()
         if (department == 'warehouse' and g.user_role == 'manager') or g.user_role == 'super_admin':
             data = request.get_json()
             validated_data = ProductsUpdateScheme(**data)
@@ -147,6 +153,7 @@ def update_product(product_id):
                     "message": "No data provided for update"
                 }), 400
             updated_product = g.supabase_user_client.from_('products').update(product_data).eq('product_id', product_id).execute()
+            invalidate_bom()
             if updated_product.data:
                 return jsonify({
                     "status": "success",
@@ -180,10 +187,10 @@ def delete_product(product_id):
     delete a product by its ID
     """
     try:
-        user = g.supabase_user_client.from_('employees').select('department:department_id(name)').eq('user_id', g.current_user).execute()
-        department = user.data[0]['department']['name']
+        department = get_caller_department()
         if (department == 'warehouse' and g.user_role == 'manager') or g.user_role == 'super_admin':
             deleted_product = g.supabase_user_client.from_('products').delete().eq('product_id', product_id).execute()
+            invalidate_bom()
             if deleted_product.data:
                 return jsonify({
                     "status": "success",
@@ -213,9 +220,7 @@ def add_component_to_product_bom(product_id):
     Add a component to a product's Bill of Materials (BOM)
     """
     try:
-        user = g.supabase_user_client.from_('employees').select('id, department:department_id(name)').eq('user_id', g.current_user).execute()
-      
-        department = user.data[0]['department']['name']
+        department = get_caller_department()
         if department == 'warehouse' or g.user_role == 'super_admin':
             data = request.get_json()
             # Validate input data
@@ -248,6 +253,7 @@ def add_component_to_product_bom(product_id):
                 "quantity": data['quantity']
             }
             new_bom_item = g.supabase_user_client.from_('bom').insert(bom_data).execute()
+            invalidate_bom()
             if new_bom_item.data:
                 return jsonify({
                     "status": "success",
@@ -274,8 +280,7 @@ def add_component_to_product_bom(product_id):
 def remove_component_from_product_bom(product_id, component_id):
     """remove a component from a product's Bill of Materials (BOM)"""
     try:
-        user = g.supabase_user_client.from_('employees').select('department:department_id(name)').eq('user_id', g.current_user).execute()
-        department = user.data[0]['department']['name']
+        department = get_caller_department()
         if (department == 'warehouse' and g.user_role == 'manager') or g.user_role == 'super_admin':
             # Check if the BOM entry exists
             bom_check = g.supabase_user_client.from_('bom').select('id').eq('product_id', product_id).eq('component_id', component_id).execute()
@@ -287,6 +292,7 @@ def remove_component_from_product_bom(product_id, component_id):
             
             # Remove the component from the product's BOM
             deleted_bom_item = g.supabase_user_client.from_('bom').delete().eq('product_id', product_id).eq('component_id', component_id).execute()
+            invalidate_bom()
             if deleted_bom_item.data:
                 return jsonify({
                     "status": "success",
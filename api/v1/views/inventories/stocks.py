@@ -1,14 +1,42 @@
-from flask import g, current_app, jsonify, request
+from flask import g, current_app, jsonify, request, send_file
 from api.v1.views import app_views
 from api.v1.auth import login_required, role_required
+from api.v1.utils.caller_context import get_caller_department, get_caller_employee_id
+from api.v1.utils.export import export_requested, stream_export
+from api.v1.utils.pagination import PaginationError, paginate, pagination_requested
 from pydantic import ValidationError
+from api.v1.utils.label_templates import LABEL_TEMPLATES
 from api.v1.utils.pdf_generator import generate_barcode_pdf
 from api.v1.services.inventories.transactions import (
     add_new_stock,
     get_all_stocks,
     get_stock_by_id,
-    get_stock_by_location,
-    sell_stock
+    sell_stock,
+    ScanSyncSchema,
+    sync_scan_events
+)
+from api.v1.services.inventories.stock_services import get_stock_by_location, get_stock_matrix
+from api.v1.services.inventories.allocation_services import AllocationRequestSchema, allocate_order
+from api.v1.services.inventories.barcode_services import BARCODE_RESOLVE_MAX, resolve_barcode, resolve_barcodes
+from api.v1.services.inventories.label_services import (
+    BACKGROUND_FORMATS,
+    LABEL_FORMATS,
+    LABEL_PARALLEL_MIN,
+    LABEL_PDF_PASSWORD,
+    LABEL_REPRINT_MAX_BOXES,
+    LABEL_TEMPLATE,
+    get_labels,
+    label_filename,
+    label_job,
+    label_job_status,
+    start_label_job
+)
+from api.v1.services.inventories.bom_services import (
+    MRPRequestSchema,
+    get_bom_graph,
+    material_requirements,
+    order_demand,
+    visible_items
 )
 import traceback
 import base64
@@ -23,11 +51,9 @@ def fetch_stocks():
     Retrieve all stock entries with product and component breakdown.
     """
     try:
-        user = g.supabase_user_client.from_('employees').select('department:department_id(name)').eq('user_id', g.current_user).execute()
-        department = user.data[0]['department']['name']
+        department = get_caller_department()
         if department in ['warehouse', 'sales'] or g.user_role == 'super_admin':
             try:
-                print
                 stocks = get_all_stocks()
                 return jsonify({
                     "status": "success",
@@ -52,6 +78,85 @@ def fetch_stocks():
             "message": str(e)
         }), 500
 
+@app_views.route('/stocks/buildable', methods=['GET'], strict_slashes=False)
+@role_required(['super_admin', 'manager', 'user'])
+@login_required
+def fetch_buildable_stock():
+    """
+    How many units of each product can be assembled from current component
+    stock, with the component that limits each one.
+    """
+    try:
+        department = get_caller_department()
+        if department in ['warehouse', 'sales'] or g.user_role == 'super_admin':
+            return jsonify({
+                "status": "success",
+                "data": get_bom_graph().buildable(visible_items())
+            }), 200
+        return jsonify({
+            "status": "error",
+            "message": "You do not have permission to perform this action"
+        }), 403
+
+    except Exception as e:
+        current_app.logger.error(f"Error computing buildable stock: {str(e)}")
+        traceback.print_exc()
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 500
+
+
+@app_views.route('/stocks/mrp', methods=['POST'], strict_slashes=False)
+@role_required(['super_admin', 'manager'])
+@login_required
+def plan_material_requirements():
+    """
+    Component requirements, shortfalls and suggested import quantities for a
+    set of orders or ad hoc product quantities.
+    Expected payload (all optional; no order_ids or items plans every open order):
+    {
+        "order_ids": ["uuid-string"],
+        "items": [{"product_id": "uuid-string", "quantity": int}],
+        "use_product_stock": bool (default: true, nets finished goods first),
+        "buffer_percent": float (default: 0, padding on suggested imports)
+    }
+    """
+    try:
+        department = get_caller_department()
+        if department not in ['warehouse', 'sales'] and g.user_role != 'super_admin':
+            return jsonify({
+                "status": "error",
+                "message": "You do not have permission to perform this action"
+            }), 403
+
+        try:
+            plan = MRPRequestSchema(**(request.get_json(silent=True) or {}))
+        except ValidationError as ve:
+            return jsonify({"status": "error", "message": str(ve)}), 400
+
+        demand = {}
+        if plan.items:
+            for item in plan.items:
+                demand[item.product_id] = demand.get(item.product_id, 0) + item.quantity
+        if plan.order_ids or not plan.items:
+            for product_id, quantity in order_demand(plan.order_ids).items():
+                demand[product_id] = demand.get(product_id, 0) + quantity
+
+        return jsonify({
+            "status": "success",
+            "data": material_requirements(demand, plan.use_product_stock, plan.buffer_percent)
+        }), 200
+
+    except Exception as e:
+        current_app.logger.error(f"Error planning material requirements: {str(e)}")
+        traceback.print_exc()
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 500
+
+
 @app_views.route('/stocks/<string:product_id>', methods=['GET'], strict_slashes=False)
 @role_required(['super_admin', 'manager', 'user'])
 @login_required
@@ -60,8 +165,7 @@ def fetch_stock_by_id(product_id):
     Retrieve stock details for a specific product by its ID.
     """
     try:
-        user = g.supabase_user_client.from_('employees').select('department:department_id(name)').eq('user_id', g.current_user).execute()
-        department = user.data[0]['department']['name']
+        department = get_caller_department()
         if department in ['warehouse', 'sales'] or g.user_role == 'super_admin':
             try:
                 stock = get_stock_by_id(product_id)
@@ -95,19 +199,51 @@ def fetch_stock_by_id(product_id):
         }), 500
 
 
+@app_views.route('/stocks/locations', methods=['GET'], strict_slashes=False)
+@role_required(['super_admin', 'manager', 'user'])
+@login_required
+def fetch_stock_matrix():
+    """
+    Retrieve the quantity of every item at every location in one call.
+    Pass ?by_shelf=true for a breakdown by shelf_code.
+    """
+    try:
+        department = get_caller_department()
+        if department in ['warehouse', 'sales'] or g.user_role == 'super_admin':
+            return jsonify({
+                "status": "success",
+                "data": get_stock_matrix(by_shelf=request.args.get('by_shelf', '').lower() in ['1', 'true'])
+            }), 200
+        return jsonify({
+            "status": "error",
+            "message": "You do not have permission to perform this action"
+        }), 403
+
+    except Exception as e:
+        current_app.logger.error(f"Error fetching stock matrix: {str(e)}")
+        traceback.print_exc()
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 500
+
+
 @app_views.route('/stocks/locations/<string:location_id>', methods=['GET'], strict_slashes=False)
 @role_required(['super_admin', 'manager', 'user'])
 @login_required
 def fetch_stock_by_location(location_id):
     """
     Retrieve stock details for a specific location by its ID.
+    Pass ?by_shelf=true for a breakdown by shelf_code.
     """
     try:
-        user = g.supabase_user_client.from_('employees').select('department:department_id(name)').eq('user_id', g.current_user).execute()
-        department = user.data[0]['department']['name']
+        department = get_caller_department()
         if department in ['warehouse', 'sales'] or g.user_role == 'super_admin':
             try:
-                stock = get_stock_by_location(location_id)
+                stock = get_stock_by_location(
+                    location_id,
+                    by_shelf=request.args.get('by_shelf', '').lower() in ['1', 'true']
+                )
                 if stock:
                     return jsonify({
                         "status": "success",
@@ -143,14 +279,12 @@ def fetch_stock_by_location(location_id):
 @login_required
 def create_stock_entry():
     """
-    Add new stock entry to the inventory + generate PDF labels.
+    Add new stock entry to the inventory. The labels are downloaded from the
+    returned labels.url (GET /stocks/labels/<transaction_id>.<format>), in the
+    format chosen with ?format=pdf|zpl|svg (default: pdf).
     """
     try:
-        user = g.supabase_user_client.from_('employees') \
-            .select('department:department_id(name)') \
-            .eq('user_id', g.current_user).execute()
-        
-        department = user.data[0]['department']['name']
+        department = get_caller_department()
         if department != 'warehouse' and g.user_role != 'super_admin':
             return jsonify({"status": "error", "message": "Permission denied"}), 403
 
@@ -158,56 +292,69 @@ def create_stock_entry():
         if not data:
             return jsonify({"status": "error", "message": "Invalid JSON"}), 400
 
+        label_format = request.args.get('format', 'pdf').lower()
+        if label_format not in LABEL_FORMATS:
+            return jsonify({
+                "status": "error",
+                "message": f"format must be one of: {', '.join(LABEL_FORMATS)}"
+            }), 400
 
         try:
             # Call service to create boxes and get item name
             transaction = add_new_stock(data)
 
-            # --- Generate PDF ---
-            barcode_data = [
-                {
-                    "barcode": box['barcode'],
-                    "quantity_in_box": box['quantity_in_box']
-                }
-                for box in transaction["boxes"]
-            ]
-
-            pdf_buffer = generate_barcode_pdf(
-                barcodes_data=barcode_data,
-                item_name=transaction["item_name"],
-                batch_id=data["batch_id"],
-                boxes_count=transaction["boxes_count"],
-                quantity_per_box=data["quantity_in_box"],
-                password="madison123"
-            )
-
-            pdf_base64 = base64.b64encode(pdf_buffer.read()).decode('utf-8')
-            pdf_filename = f"{transaction['item_name'].replace(' ', '_')}_{data['batch_id']}.pdf"
-
-            # --- Insert barcodes into DB ---
-            for barcode, box in zip(transaction.get("barcodes", []), transaction["boxes"]):
-                try:
-                    g.service_supabase_client.from_("barcodes").insert({
-                        "barcode": barcode,
-                        "box_id": box["box_id"],
-                        "transaction_id": transaction["transaction"]["transaction_id"]  # ← CORRECT
-                    }).execute()
-                except Exception as e:
-                    current_app.logger.error(f"Barcode insert failed: {str(e)}")
-
-            # --- Return success with PDF ---
-            return jsonify({
+            response = {
                 "status": "success",
                 "data": transaction["boxes"],
                 "barcodes": transaction["barcodes"],
                 "transaction": transaction["transaction"],
-                "pdf": {
-                    "filename": pdf_filename,
-                    "data": pdf_base64,
+                # the labels are downloaded from labels.url; ?include_pdf=true still inlines the PDF as base64
+                "labels": label_job(transaction["transaction"]["transaction_id"], label_format)
+            }
+
+            if label_format in BACKGROUND_FORMATS and transaction["boxes_count"] >= LABEL_PARALLEL_MIN:
+                # large intakes start rendering right away, in the background
+                response["labels"] = start_label_job(
+                    transaction["transaction"]["transaction_id"],
+                    {
+                        "item_name": transaction["item_name"],
+                        "barcodes": [
+                            {"barcode": box['barcode'], "quantity_in_box": box['quantity_in_box']}
+                            for box in transaction["boxes"]
+                        ],
+                        "quantity_per_box": data["quantity_in_box"]
+                    },
+                    data["batch_id"],
+                    label_format
+                )
+
+            if request.args.get('include_pdf', '').lower() == 'true':
+                barcode_data = [
+                    {
+                        "barcode": box['barcode'],
+                        "quantity_in_box": box['quantity_in_box']
+                    }
+                    for box in transaction["boxes"]
+                ]
+
+                pdf_buffer = generate_barcode_pdf(
+                    barcodes_data=barcode_data,
+                    item_name=transaction["item_name"],
+                    batch_id=data["batch_id"],
+                    boxes_count=transaction["boxes_count"],
+                    quantity_per_box=data["quantity_in_box"],
+                    password=LABEL_PDF_PASSWORD,
+                    template=LABEL_TEMPLATE
+                )
+
+                response["pdf"] = {
+                    "filename": f"{transaction['item_name'].replace(' ', '_')}_{data['batch_id']}.pdf",
+                    "data": base64.b64encode(pdf_buffer.getbuffer()).decode('utf-8'),
                     "password_protected": True,
-                    "password_hint": "Use 'madison123' to open"
+                    "password_hint": f"Use '{LABEL_PDF_PASSWORD}' to open"
                 }
-            }), 201
+
+            return jsonify(response), 201
 
         except ValueError as ve:
             return jsonify({"status": "error", "message": str(ve)}), 400
@@ -221,6 +368,101 @@ def create_stock_entry():
         return jsonify({"status": "error", "message": str(e)}), 500
 
 
+@app_views.route('/stocks/labels/<string:transaction_id>.<any(pdf, zpl, svg):label_format>',
+                 methods=['GET'], strict_slashes=False)
+@role_required(['super_admin', 'manager', 'user'])
+@login_required
+def download_stock_labels(transaction_id, label_format):
+    """
+    Download (or reprint) the labels of an intake transaction as an encrypted
+    PDF, ZPL for thermal printers or SVG. Generated from the stored barcodes
+    on first request and served from the disk cache afterwards.
+    Large PDF/SVG batches render in the background: the response is then a 202
+    with the job status (see /stocks/labels/jobs/<transaction_id>?format=).
+    """
+    try:
+        department = get_caller_department()
+        if department not in ['warehouse', 'sales'] and g.user_role != 'super_admin':
+            return jsonify({
+                "status": "error",
+                "message": "You do not have permission to perform this action"
+            }), 403
+
+        path, job = get_labels(transaction_id, label_format)
+        if job is not None:
+            # large batch still rendering: poll the job, then download again
+            response = jsonify({"status": "success", "data": job})
+            response.headers['Location'] = f"/api/v1/stocks/labels/jobs/{transaction_id}?format={label_format}"
+            response.headers['Retry-After'] = '2'
+            return response, 202
+        if path is None:
+            return jsonify({"status": "error", "message": "No labels found for this transaction"}), 404
+
+        return send_file(
+            path,
+            mimetype=LABEL_FORMATS[label_format],
+            as_attachment=True,
+            download_name=label_filename(transaction_id, label_format),
+            conditional=True,
+            max_age=0
+        )
+
+    except Exception as e:
+        current_app.logger.error(f"Error generating labels for transaction {transaction_id}: {str(e)}")
+        traceback.print_exc()
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
+@app_views.route('/stocks/labels/jobs/<string:transaction_id>', methods=['GET'], strict_slashes=False)
+@role_required(['super_admin', 'manager', 'user'])
+@login_required
+def fetch_label_job(transaction_id):
+    """
+    Progress of a label rendering job: status ("queued", "rendering", "done"
+    or "failed"), done and total labels, and the download url.
+    ?format=pdf|svg selects the job (default: pdf).
+    """
+    try:
+        department = get_caller_department()
+        if department not in ['warehouse', 'sales'] and g.user_role != 'super_admin':
+            return jsonify({
+                "status": "error",
+                "message": "You do not have permission to perform this action"
+            }), 403
+
+        label_format = request.args.get('format', 'pdf').lower()
+        if label_format not in BACKGROUND_FORMATS:
+            return jsonify({
+                "status": "error",
+                "message": f"format must be one of: {', '.join(BACKGROUND_FORMATS)}"
+            }), 400
+
+        job = label_job_status(transaction_id, label_format)
+        if job is None:
+            return jsonify({"status": "error", "message": "No label job found for this transaction"}), 404
+        return jsonify({"status": "success", "data": job}), 200
+
+    except Exception as e:
+        current_app.logger.error(f"Error fetching label job {transaction_id}: {str(e)}")
+        traceback.print_exc()
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+
+@app_views.route('/stocks/labels/templates', methods=['GET'], strict_slashes=False)
+@role_required(['super_admin', 'manager', 'user'])
+@login_required
+def list_label_templates():
+    """
+    Label sheet templates and the one PDF labels are laid out for, so the
+    right sticker stock goes into the printer.
+    """
+    return jsonify({
+        "status": "success",
+        "data": [template.describe() for template in LABEL_TEMPLATES.values()],
+        "active": LABEL_TEMPLATE
+    }), 200
+
+
 @app_views.route('/stocks/sell', methods=['POST'], strict_slashes=False)
 @role_required(['super_admin', 'manager'])
 @login_required
@@ -238,11 +480,7 @@ def sell_stock_in_batch():
     """
     try:
         # Permission check
-        user = g.supabase_user_client.from_('employees') \
-            .select('department:department_id(name)') \
-            .eq('user_id', g.current_user).execute()
-        
-        department = user.data[0]['department']['name'] if user.data else None
+        department = get_caller_department()
         if department != 'warehouse' and g.user_role != 'super_admin':
             return jsonify({"status": "error", "message": "Permission denied"}), 403
 
@@ -280,6 +518,95 @@ def sell_stock_in_batch():
         traceback.print_exc()
         return jsonify({"status": "error", "message": "Internal server error"}), 500
 
+@app_views.route('/stocks/scans/sync', methods=['POST'], strict_slashes=False)
+@role_required(['super_admin', 'manager'])
+@login_required
+def sync_scanner_events():
+    """
+    Upload the scan events a scanner queued while offline.
+    Expected payload:
+    {
+        "events": [
+            {
+                "event_id": "string (unique per scan, used to drop re-sent events)",
+                "device_id": "string",
+                "barcode": "QR-...",
+                "action": "scan" | "sell" | "damage",
+                "quantity": int (optional, default: 1, units sold),
+                "scanned_at": "ISO 8601 timestamp from the device",
+                "order_id": "uuid-string" (optional, for "sell")
+            }
+        ]
+    }
+    Every event gets a result with status "applied", "rejected" or "duplicate".
+    """
+    try:
+        department = get_caller_department()
+        if department != 'warehouse' and g.user_role != 'super_admin':
+            return jsonify({"status": "error", "message": "Permission denied"}), 403
+
+        try:
+            batch = ScanSyncSchema(**(request.get_json(silent=True) or {}))
+        except ValidationError as ve:
+            return jsonify({"status": "error", "message": str(ve)}), 400
+
+        results = sync_scan_events(batch.events)
+
+        return jsonify({
+            "status": "success",
+            "data": results,
+            "message": f"Applied {sum(1 for result in results if result['status'] == 'applied')} of {len(results)} events"
+        }), 200
+
+    except ValueError as ve:
+        return jsonify({"status": "error", "message": str(ve)}), 400
+    except Exception as e:
+        current_app.logger.error(f"Scan sync error: {str(e)}")
+        traceback.print_exc()
+        return jsonify({"status": "error", "message": "Internal server error"}), 500
+
+
+@app_views.route('/stocks/allocate', methods=['POST'], strict_slashes=False)
+@role_required(['super_admin', 'manager'])
+@login_required
+def allocate_stock_for_order():
+    """
+    Pick boxes for an order server-side and sell them.
+    Expected payload:
+    {
+        "order_id": "uuid-string",
+        "items": [{"contents_type": "product" | "component", "contents_id": "uuid-string", "quantity": int}],
+        "policy": "fifo" | "fewest_boxes" | "location" (optional, default: "fifo"),
+        "location_id": "uuid-string" (optional, preferred location for "location"),
+        "shelf_code": "string" (optional, preferred shelf for "location"),
+        "dry_run": bool (optional, return the picks without selling)
+    }
+    """
+    try:
+        department = get_caller_department()
+        if department != 'warehouse' and g.user_role != 'super_admin':
+            return jsonify({"status": "error", "message": "Permission denied"}), 403
+
+        try:
+            allocation = AllocationRequestSchema(**(request.get_json(silent=True) or {}))
+        except ValidationError as ve:
+            return jsonify({"status": "error", "message": str(ve)}), 400
+
+        result = allocate_order(allocation)
+
+        return jsonify({
+            "status": "success",
+            "data": result,
+            "message": "Boxes allocated" if allocation.dry_run else "Stock sold successfully"
+        }), 200
+
+    except ValueError as ve:
+        return jsonify({"status": "error", "message": str(ve)}), 400
+    except Exception as e:
+        current_app.logger.error(f"Allocate stock error: {str(e)}")
+        traceback.print_exc()
+        return jsonify({"status": "error", "message": "Internal server error"}), 500
+
 #get all transactions history
 @app_views.route('/inventory/transactions', methods=['GET'], strict_slashes=False)
 @role_required(['super_admin', 'manager', 'user'])
@@ -289,19 +616,26 @@ def fetch_inventory_transactions():
     Retrieve all inventory transactions.
     """
     try:
-        user = g.supabase_user_client.from_('employees').select('department:department_id(name)').eq('user_id', g.current_user).execute()
-        department = user.data[0]['department']['name']
+        department = get_caller_department()
         if department in ['warehouse'] or g.user_role == 'super_admin':
             try:
-                transactions = []
+                query = g.service_supabase_client.from_('inventory_transactions').select('*')
                 if g.user_role == 'user':
-                    transactions = g.service_supabase_client.from_('inventory_transactions').select('*').eq('created_by', user.data[0]['id']).order('transaction_date', desc=True).execute()
-                else:
-                    transactions = g.service_supabase_client.from_('inventory_transactions').select('*').order('transaction_date', desc=True).execute()
+                    query = query.eq('created_by', get_caller_employee_id())
+                if export_requested():
+                    return stream_export(query, 'transaction_date', 'transaction_id', 'inventory_transactions')
+                if pagination_requested():
+                    return jsonify({"status": "success", **paginate(query, 'transaction_date', 'transaction_id')}), 200
+                transactions = query.order('transaction_date', desc=True).execute()
                 return jsonify({
                     "status": "success",
                     "data": transactions.data
                 }), 200
+            except PaginationError as e:
+                return jsonify({
+                    "status": "error",
+                    "message": str(e)
+                }), 400
             except Exception as e:
                 current_app.logger.error(f"Error fetching inventory transactions: {str(e)}")
                 traceback.print_exc()
@@ -326,54 +660,48 @@ def fetch_inventory_transactions():
 @role_required(['super_admin', 'manager', 'user'])
 @login_required
 def get_box_by_barcode(barcode):
-    # Use SERVICE client (bypasses RLS)
-    res = (g.service_supabase_client
-           .from_('barcodes')
-           .select('barcode, box_id, boxes!inner(contents_id, contents_type, quantity_in_box)')
-           .eq('barcode', barcode)
-           .execute())
-
-    if not res.data:
+    result = resolve_barcode(barcode)
+    if result is None:
         return jsonify({"status": "error", "message": "Barcode not found"}), 404
 
-    box = res.data[0]['boxes']
-    barcode_data = res.data[0]
-
-    # Determine table and column
-    if box['contents_type'] == 'product':
-        table = 'products'
-        id_col = 'product_id'
-        name_col = 'name'
-    else:
-        table = 'components'
-        id_col = 'component_id'
-        name_col = 'name'
-
-    # Use correct column names
-    item = (g.service_supabase_client
-            .from_(table)
-            .select(f'{id_col}, {name_col}')
-            .eq(id_col, box['contents_id'])
-            .single()
-            .execute())
-
-    if not item.data:
-        return jsonify({"status": "error", "message": f"{box['contents_type'].title()} not found"}), 404
-
-    # Build response
-    result = {
-        "barcode": barcode_data['barcode'],
-        "box_id": barcode_data['box_id'],
-        "boxes": {
-            "product_id": item.data[id_col] if box['contents_type'] == 'product' else None,
-            "product_name": item.data[name_col] if box['contents_type'] == 'product' else None,
-            "component_id": item.data[id_col] if box['contents_type'] == 'component' else None,
-            "component_name": item.data[name_col] if box['contents_type'] == 'component' else None,
-            "quantity_in_box": box['quantity_in_box']
-        }
+    return jsonify({"status": "success", "data": result}), 200
+
+
+@app_views.route('/stocks/barcodes/resolve', methods=['POST'], strict_slashes=False)
+@role_required(['super_admin', 'manager', 'user'])
+@login_required
+def resolve_barcodes_in_bulk():
+    """
+    Resolve many scanned barcodes in one call.
+    Expected payload:
+    {
+        "barcodes": ["QR-...", ...]
     }
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        barcodes = data.get("barcodes")
+        if not isinstance(barcodes, list) or not barcodes:
+            return jsonify({"status": "error", "message": "barcodes must be a non-empty list"}), 400
+        if not all(isinstance(barcode, str) and barcode for barcode in barcodes):
+            return jsonify({"status": "error", "message": "Every barcode must be a non-empty string"}), 400
+        if len(barcodes) > BARCODE_RESOLVE_MAX:
+            return jsonify({
+                "status": "error",
+                "message": f"At most {BARCODE_RESOLVE_MAX} barcodes can be resolved at once"
+            }), 400
 
-    return jsonify({"status": "success", "data": result}), 200
+        resolved, not_found = resolve_barcodes(barcodes)
+        return jsonify({
+            "status": "success",
+            "data": resolved,
+            "not_found": not_found
+        }), 200
+
+    except Exception as e:
+        current_app.logger.error(f"Error resolving barcodes: {str(e)}")
+        traceback.print_exc()
+        return jsonify({"status": "error", "message": str(e)}), 500
 
 #Fetch all barcodes for a transaction
 @app_views.route('/inventory/transactions/<string:transaction_id>/barcodes', methods=['GET'], strict_slashes=False)
@@ -384,8 +712,7 @@ def fetch_barcodes_by_transaction(transaction_id):
     Retrieve all barcodes associated with a specific inventory transaction.
     """
     try:
-        user = g.supabase_user_client.from_('employees').select('department:department_id(name)').eq('user_id', g.current_user).execute()
-        department = user.data[0]['department']['name']
+        department = get_caller_department()
         if department in ['warehouse', 'sales'] or g.user_role == 'super_admin':
             try:
                 barcodes_response = g.service_supabase_client.from_('barcodes').select('*').eq('transaction_id', transaction_id).execute()
@@ -418,4 +745,64 @@ def fetch_barcodes_by_transaction(transaction_id):
             "message": str(e)
         }), 500 
 
-    
\ No newline at end of file
+    
+
+#Reprint the labels of a transaction
+@app_views.route('/inventory/transactions/<string:transaction_id>/labels', methods=['GET'], strict_slashes=False)
+@role_required(['super_admin', 'manager', 'user'])
+@login_required
+def reprint_transaction_labels(transaction_id):
+    """
+    Rebuild the labels of a past intake from its stored barcodes and boxes.
+    ?format=pdf|zpl|svg (default: pdf); ?box_ids=<id>,<id>,... reprints only
+    those boxes (at most LABEL_REPRINT_MAX_BOXES). Rendered files are cached
+    per transaction, box set and format, so repeated reprints are served from
+    disk. A whole large intake may answer 202 with the job status, as the
+    /stocks/labels download does.
+    """
+    try:
+        department = get_caller_department()
+        if department not in ['warehouse', 'sales'] and g.user_role != 'super_admin':
+            return jsonify({
+                "status": "error",
+                "message": "You do not have permission to perform this action"
+            }), 403
+
+        label_format = request.args.get('format', 'pdf').lower()
+        if label_format not in LABEL_FORMATS:
+            return jsonify({
+                "status": "error",
+                "message": f"format must be one of: {', '.join(LABEL_FORMATS)}"
+            }), 400
+
+        box_ids = [box_id.strip() for box_id in request.args.get('box_ids', '').split(',') if box_id.strip()]
+        if len(set(box_ids)) > LABEL_REPRINT_MAX_BOXES:
+            return jsonify({
+                "status": "error",
+                "message": f"At most {LABEL_REPRINT_MAX_BOXES} box_ids per reprint; "
+                           f"omit box_ids to reprint the whole transaction"
+            }), 400
+
+        path, job = get_labels(transaction_id, label_format, box_ids)
+        if job is not None:
+            # whole large intake still rendering: poll the job, then download again
+            response = jsonify({"status": "success", "data": job})
+            response.headers['Location'] = f"/api/v1/stocks/labels/jobs/{transaction_id}?format={label_format}"
+            response.headers['Retry-After'] = '2'
+            return response, 202
+        if path is None:
+            return jsonify({"status": "error", "message": "No labels found for this transaction"}), 404
+
+        return send_file(
+            path,
+            mimetype=LABEL_FORMATS[label_format],
+            as_attachment=True,
+            download_name=label_filename(transaction_id, label_format, box_ids),
+            conditional=True,
+            max_age=0
+        )
+
+    except Exception as e:
+        current_app.logger.error(f"Error reprinting labels for transaction {transaction_id}: {str(e)}")
+        traceback.print_exc()
+        return jsonify({"status": "error", "message": str(e)}), 500
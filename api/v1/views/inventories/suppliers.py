@@ -1,6 +1,8 @@
 from flask import g, current_app, jsonify, request
 from api.v1.views import app_views
 from api.v1.auth import login_required, role_required
+from api.v1.utils.http_cache import conditional_get
+from api.v1.utils.caller_context import get_caller_department
 from pydantic import ValidationError
 from api.v1.services.inventories.suppliers_services import (
     SupplierCreateSchema,
@@ -9,6 +11,7 @@ from api.v1.services.inventories.suppliers_services import (
 from werkzeug.exceptions import BadRequest
 
 @app_views.route('/suppliers', methods=['GET'], strict_slashes=False)
+@conditional_get
 @role_required(['super_admin', 'manager', 'user'])
 @login_required
 def get_all_suppliers():
@@ -16,8 +19,7 @@ def get_all_suppliers():
     Fetch all suppliers in the system.
     """
     try:
-        user = g.supabase_user_client.from_('employees').select('department:department_id(name)').eq('user_id', g.current_user).execute()
-        department = user.data[0]['department']['name']
+        department = get_caller_department()
         if department == 'warehouse' or g.user_role == 'super_admin':
             suppliers = g.supabase_user_client.from_('suppliers').select('supplier_id, name, contact_phone, contact_email, address, website, notes, created_at').execute()
             if suppliers.data:
@@ -48,8 +50,7 @@ def get_supplier(supplier_id):
     Fetch a specific supplier by its ID.
     """
     try:
-        user = g.supabase_user_client.from_('employees').select('department:department_id(name)').eq('user_id', g.current_user).execute()
-        department = user.data[0]['department']['name']
+        department = get_caller_department()
         if department == 'warehouse' or g.user_role == 'super_admin':
             supplier = g.supabase_user_client.from_('suppliers').select('supplier_id, name, contact_phone, contact_email, address, website, notes, created_at').eq('supplier_id', supplier_id).execute()
             if supplier.data:
@@ -80,8 +81,7 @@ def create_supplier():
     Create a new supplier.
     """
     try:
-        user = g.supabase_user_client.from_('employees').select('department:department_id(name)').eq('user_id', g.current_user).execute()
-        department = user.data[0]['department']['name']
+        department = get_caller_department()
         if department == 'warehouse' or g.user_role == 'super_admin':
             data = request.get_json()
             try:
@@ -126,8 +126,7 @@ def update_supplier(supplier_id):
     Update an existing supplier.
     """
     try:
-        user = g.supabase_user_client.from_('employees').select('department:department_id(name)').eq('user_id', g.current_user).execute()
-        department = user.data[0]['department']['name']
+        department = get_caller_department()
         if department == 'warehouse' or g.user_role == 'super_admin':
             data = request.get_json()
             try:
@@ -177,8 +176,7 @@ def delete_supplier(supplier_id):
     Delete a supplier from the system.
     """
     try:
-        user = g.supabase_user_client.from_('employees').select('department:department_id(name)').eq('user_id', g.current_user).execute()
-        department = user.data[0]['department']['name']
+        department = get_caller_department()
         if department == 'warehouse' or g.user_role == 'super_admin':
             # Check if the supplier exists
             supplier_check = g.supabase_user_client.from_('suppliers').select('supplier_id').eq('supplier_id', supplier_id).execute()
@@ -1,6 +1,8 @@
 from flask import g, current_app, jsonify, request
 from api.v1.views import app_views
 from api.v1.auth import login_required, role_required
+from api.v1.utils.caller_context import get_caller_department
+from api.v1.utils.pagination import PaginationError, paginate, pagination_requested
 from pydantic import ValidationError
 from api.v1.services.sales.customers import (
     CustomerCreateSchema,
@@ -16,14 +18,16 @@ def fetch_customers():
     Retrieve all customers.
     """
     try:
-        user = g.supabase_user_client.from_('employees').select('department:department_id(name)').eq('user_id', g.current_user).execute()
-        department = user.data[0]['department']['name']
+        department = get_caller_department()
         if department != 'sales' and g.user_role != 'super_admin':
             return jsonify({
                 "status": "error",
                 "message": "You do not have permission to perform this action"
             }), 403
-        customers = g.supabase_user_client.from_('customers').select('*').execute()
+        query = g.supabase_user_client.from_('customers').select('*')
+        if pagination_requested():
+            return jsonify({"status": "success", **paginate(query, 'created_at', 'customer_id')}), 200
+        customers = query.execute()
         if not customers.data:
             return jsonify({
                 "status": "success",
@@ -36,6 +40,11 @@ def fetch_customers():
             "data": customers.data
         }), 200
 
+    except PaginationError as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 400
     except Exception as e:
         current_app.logger.error(f"Error fetching customers: {str(e)}")
         return jsonify({
@@ -51,8 +60,7 @@ def fetch_customer(customer_id):
     Retrieve a specific customer by ID.
     """
     try:
-        user = g.supabase_user_client.from_('employees').select('department:department_id(name)').eq('user_id', g.current_user).execute()
-        department = user.data[0]['department']['name']
+        department = get_caller_department()
         if department not in ['sales', 'warehouse'] and g.user_role != 'super_admin':
             return jsonify({
                 "status": "error",
@@ -86,8 +94,7 @@ def create_customer():
     Create a new customer.
     """
     try:
-        user = g.supabase_user_client.from_('employees').select('department:department_id(name)').eq('user_id', g.current_user).execute()
-        department = user.data[0]['department']['name']
+        department = get_caller_department()
         if department != 'sales' and g.user_role != 'super_admin':
             return jsonify({
                 "status": "error",
@@ -140,8 +147,7 @@ def update_customer(customer_id):
     Update an existing customer.
     """
     try:
-        user = g.supabase_user_client.from_('employees').select('department:department_id(name)').eq('user_id', g.current_user).execute()
-        department = user.data[0]['department']['name']
+        department = get_caller_department()
         if department != 'sales' and g.user_role != 'super_admin':
             return jsonify({
                 "status": "error",
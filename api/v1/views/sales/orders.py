@@ -1,10 +1,19 @@
 from flask import g, current_app, jsonify, request
 from api.v1.views import app_views
 from api.v1.auth import login_required, role_required
+from api.v1.utils.caller_context import (
+    get_caller_department,
+    get_caller_employee_id,
+    get_caller_profile
+)
+from api.v1.utils.export import export_requested, stream_export
+from api.v1.utils.pagination import PaginationError, paginate, pagination_requested
+from api.v1.utils.projections import ProjectionError
 from pydantic import ValidationError
 from api.v1.services.sales.order_services import (
     OrderCreateSchema,
     OrderUpdateSchema,
+    ORDER_PROJECTION,
     generate_unique_order_number
 )
 import traceback
@@ -19,14 +28,18 @@ def fetch_orders():
     Retrieve all sales orders.
     """
     try:
-        user = g.supabase_user_client.from_('employees').select('department:department_id(name)').eq('user_id', g.current_user).execute()
-        department = user.data[0]['department']['name']
+        department = get_caller_department()
         if department not in ['sales', 'warehouse'] and g.user_role != 'super_admin':
             return jsonify({
                 "status": "error",
                 "message": "You do not have permission to perform this action"
             }), 403
-        orders = g.supabase_user_client.from_('orders').select('*, order_details(product_id(name, price), quantity)').execute()
+        query = g.supabase_user_client.from_('orders').select(ORDER_PROJECTION.select())
+        if export_requested():
+            return stream_export(query, 'created_at', 'order_id', 'orders')
+        if pagination_requested():
+            return jsonify({"status": "success", **paginate(query, 'created_at', 'order_id')}), 200
+        orders = query.execute()
         if not orders.data:
             return jsonify({
                 "status": "success",
@@ -39,6 +52,11 @@ def fetch_orders():
             "data": orders.data
         }), 200
 
+    except (PaginationError, ProjectionError) as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 400
     except Exception as e:
         current_app.logger.error(f"Error fetching orders: {str(e)}")
         return jsonify({
@@ -56,7 +74,7 @@ def fetch_order(order_id):
     Retrieve a specific sales order by ID.
     """
     try:
-        order = g.supabase_user_client.from_('orders').select('*, order_details(product_id(name, price), quantity)').eq('order_id', order_id).execute()
+        order = g.supabase_user_client.from_('orders').select(ORDER_PROJECTION.select()).eq('order_id', order_id).execute()
         if not order.data:
             return jsonify({
                 "status": "success",
@@ -69,6 +87,11 @@ def fetch_order(order_id):
             "data": order.data
         }), 200
 
+    except ProjectionError as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 400
     except Exception as e:
         current_app.logger.error(f"Error fetching order: {str(e)}")
         return jsonify({
@@ -102,8 +125,7 @@ def create_order():
     }
     """
     try:
-        user = g.supabase_user_client.from_('employees').select('department:department_id(name)').eq('user_id', g.current_user).execute()
-        department = user.data[0]['department']['name']
+        department = get_caller_department()
         if department != 'sales' and g.user_role != 'super_admin':
             return jsonify({
                 "status": "error",
@@ -119,13 +141,13 @@ def create_order():
         
         validated_data = OrderCreateSchema(**data)
         order_data = validated_data.model_dump(exclude={'products', 'apply_discount', 'apply_vat'})
-        created_by = g.supabase_user_client.from_('employees').select('id').eq('user_id', g.current_user).execute().data
+        created_by = get_caller_employee_id()
         if not created_by:
             return jsonify({
                 "status": "error",
                 "message": "Employee record not found for the current user"
             }), 400
-        order_data['created_by'] = created_by[0]['id']
+        order_data['created_by'] = created_by
         order_data['order_number'] = generate_unique_order_number()
 
         create_order = g.supabase_user_client.from_('orders').insert(order_data).execute()
@@ -170,16 +192,11 @@ def create_order():
 def update_order(order_id):
     try:
         # Get employee + department
-        emp_res = g.supabase_user_client.from_('employees')\
-            .select('id, department:department_id(name)')\
-            .eq('user_id', g.current_user)\
-            .execute()
-        
-        if not emp_res.data:
+        employee = get_caller_profile()
+        if not employee:
             return jsonify({"status": "error", "message": "Employee not found"}), 400
 
-        employee = emp_res.data[0]
-        department = employee['department']['name']
+        department = employee['department_name']
 
         # Permission: sales, warehouse, or super_admin
         if department not in ['sales', 'warehouse'] and g.user_role != 'super_admin':
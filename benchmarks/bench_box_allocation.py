@@ -0,0 +1,66 @@
+"""
+Benchmark: server-side box allocation against a large warehouse.
+
+Builds 100k in-stock boxes spread over 2,000 items, 40 import batches and
+12 locations, then allocates orders of 50 and 500 lines under every policy.
+Only the allocator is timed; loading the boxes is one paged query in
+production.
+
+    python -m benchmarks.bench_box_allocation
+"""
+import random
+import timeit
+
+from api.v1.services.inventories.allocation_services import ALLOCATION_POLICIES, allocate
+
+random.seed(7)
+
+BOXES = 100_000
+ITEMS = 2_000
+
+
+def boxes_payload(n=BOXES, items=ITEMS):
+    batches = [(f"batch-{b:03d}", f"2025-{1 + b % 12:02d}-{1 + b % 28:02d}") for b in range(40)]
+    boxes = []
+    for i in range(n):
+        batch_id, received = random.choice(batches)
+        item = random.randrange(items)
+        boxes.append({
+            "box_id": f"box-{i:07d}",
+            "contents_type": "product" if item % 4 else "component",
+            "contents_id": f"item-{item:05d}",
+            "quantity_in_box": random.randint(1, 24),
+            "location_id": f"loc-{random.randrange(12):02d}",
+            "shelf_code": f"S{random.randrange(30):02d}",
+            "batch_id": batch_id,
+            "import_batches": {"received_date": received},
+        })
+    return boxes
+
+
+def order_lines(boxes, n):
+    stock = {}
+    for box in boxes:
+        key = (box["contents_type"], box["contents_id"])
+        stock[key] = stock.get(key, 0) + box["quantity_in_box"]
+    keys = random.sample(sorted(stock), n)
+    return [(contents_type, contents_id, random.randint(1, stock[(contents_type, contents_id)]))
+            for contents_type, contents_id in keys]
+
+
+def main():
+    boxes = boxes_payload()
+    orders = {"50 lines": order_lines(boxes, 50), "500 lines": order_lines(boxes, 500)}
+
+    print(f"{BOXES:,} boxes, {ITEMS:,} items")
+    print(f"{'order':<12}{'policy':<14}{'time':>10}{'picks':>8}")
+    for name, lines in orders.items():
+        for policy in ALLOCATION_POLICIES:
+            def run():
+                return allocate(boxes, lines, policy, location_id="loc-03", shelf_code="S07")
+            elapsed = min(timeit.repeat(run, number=3, repeat=3)) / 3 * 1e3
+            print(f"{name:<12}{policy:<14}{elapsed:>7.1f} ms{len(run()):>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Benchmark: JSON serialization time and bytes on the wire.
+
+Compares Flask's default provider (stdlib json) with FastJSONProvider (orjson)
+on payloads shaped like our heaviest responses, and reports the body size
+uncompressed, gzip (COMPRESS_GZIP_LEVEL) and brotli (COMPRESS_BROTLI_QUALITY).
+
+    python -m benchmarks.bench_json_compression
+"""
+import base64
+import os
+import random
+import timeit
+import zlib
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from api.v1.utils import compression
+from api.v1.utils.json_provider import FastJSONProvider
+
+random.seed(7)
+
+
+def employees_payload(n=800):
+    """GET /employees with departments, shift types and documents embedded."""
+    return [
+        {
+            "id": f"9b1c{i:04d}-0000-4000-8000-{i:012d}",
+            "first_name": random.choice(["Ada", "Chidi", "Ngozi", "Tunde", "Amaka"]),
+            "last_name": random.choice(["Okafor", "Adeyemi", "Bello", "Eze"]),
+            "email": f"employee{i}@example.com",
+            "phone_number": f"+23480{i:08d}",
+            "position": random.choice(["Storekeeper", "Sales rep", "Driver", "Accountant"]),
+            "salary": random.randint(80_000, 900_000),
+            "employment_status": "active",
+            "hire_date": "2023-04-01",
+            "created_at": "2024-01-01T08:00:00+00:00",
+            "deleted_at": None,
+            "departments": {"name": random.choice(["warehouse", "sales", "hr"])},
+            "shift_types": {"name": "Morning", "start_time": "08:00:00", "end_time": "16:00:00"},
+            "employee_documents": [
+                {
+                    "id": f"doc-{i}-{d}",
+                    "name": f"document-{d}.pdf",
+                    "url": f"https://storage.example.com/object/public/docs/{i}/{d}.pdf",
+                    "type": "application/pdf",
+                    "category": random.choice(["contract", "id", "certificate"]),
+                    "created_at": "2024-01-02T09:30:00+00:00",
+                }
+                for d in range(4)
+            ],
+        }
+        for i in range(n)
+    ]
+
+
+def orders_payload(n=3000):
+    """GET /orders with order_details embedded."""
+    return [
+        {
+            "order_id": f"ord-{i:08d}",
+            "customer_id": f"cus-{random.randint(1, 400):05d}",
+            "status": random.choice(["pending", "delivered", "cancelled"]),
+            "total_amount": round(random.uniform(1_000, 500_000), 2),
+            "created_at": "2025-02-11T14:03:22+00:00",
+            "order_details": [
+                {"product_id": {"name": f"Product {p}", "price": 12_500}, "quantity": random.randint(1, 9)}
+                for p in range(random.randint(1, 6))
+            ],
+        }
+        for i in range(n)
+    ]
+
+
+def stock_payload(n=400):
+    """GET /stocks with per-product BOM breakdowns."""
+    return [
+        {
+            "product_id": f"prd-{i:05d}",
+            "name": f"Product {i}",
+            "sku": f"SKU-{i:05d}",
+            "total_boxes": random.randint(0, 300),
+            "locations": {f"loc-{l}": random.randint(0, 100) for l in range(4)},
+            "components": [
+                {"component_id": f"cmp-{c:05d}", "name": f"Component {c}", "required": random.randint(1, 4),
+                 "in_stock": random.randint(0, 800)}
+                for c in range(12)
+            ],
+        }
+        for i in range(n)
+    ]
+
+
+def label_pdf_payload(size=1_500_000):
+    """POST /stocks: the label PDF as base64 (compressed PDF streams are close to random)."""
+    return {"status": "success", "pdf": base64.b64encode(os.urandom(size)).decode(), "barcodes": [f"QR-{i}" for i in range(500)]}
+
+
+def main():
+    app = Flask(__name__)
+    providers = {"stdlib": DefaultJSONProvider(app), "orjson": FastJSONProvider(app)}
+    payloads = {
+        "employees (800, embeds)": employees_payload(),
+        "orders (3000, details)": orders_payload(),
+        "stocks (400, BOM)": stock_payload(),
+        "label PDF (base64)": label_pdf_payload(),
+    }
+
+    print(f"{'payload':<26}{'stdlib':>10}{'orjson':>10}{'raw':>11}{'gzip':>11}{'brotli':>11}")
+    with app.app_context():
+        for name, payload in payloads.items():
+            timings = {}
+            for label, provider in providers.items():
+                runs = timeit.repeat(lambda: provider.response(payload), number=5, repeat=3)
+                timings[label] = min(runs) / 5 * 1e3
+            body = providers["orjson"].response(payload).get_data()
+            gzip_size = len(zlib.compress(body, compression.COMPRESS_GZIP_LEVEL))
+            if compression.brotli is not None:
+                brotli_size = f"{len(compression.brotli.compress(body, quality=compression.COMPRESS_BROTLI_QUALITY)) / 1024:>8.0f} KB"
+            else:
+                brotli_size = f"{'n/a':>11}"
+            print(f"{name:<26}{timings['stdlib']:>7.1f} ms{timings['orjson']:>7.1f} ms"
+                  f"{len(body) / 1024:>8.0f} KB{gzip_size / 1024:>8.0f} KB{brotli_size}")
+
+
+if __name__ == "__main__":
+    main()
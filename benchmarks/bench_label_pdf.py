@@ -0,0 +1,81 @@
+"""
+Benchmark: label generation, PDF (vector QR vs embedded PNG), ZPL and SVG.
+
+Renders intakes of 10, 500 and 5000 boxes with generate_barcode_pdf using
+the vector renderer (default) and the previous PNG renderer, and reports
+render time and PDF size. The "pool" rows encode the QR codes in a process
+pool of LABEL_RENDER_WORKERS, page-aligned chunks of LABEL_CHUNK_PAGES, as
+large intakes do; pool start-up is not timed. The "zpl" and "svg" rows are
+the thermal-printer and preview outputs of the same labels.
+
+    python -m benchmarks.bench_label_pdf
+"""
+import multiprocessing
+import secrets
+import string
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from api.v1.services.inventories.label_services import LABEL_CHUNK_PAGES, LABEL_RENDER_WORKERS
+from api.v1.utils.label_templates import LABEL_TEMPLATES
+from api.v1.utils import pdf_generator
+from api.v1.utils.pdf_generator import encode_qr_chunk, generate_barcode_pdf
+from api.v1.utils.svg_generator import generate_barcode_svg
+from api.v1.utils.zpl_generator import generate_barcode_zpl
+
+
+def barcodes_payload(n):
+    alphabet = string.ascii_uppercase + string.digits
+    return [
+        {"barcode": f"QR-SKU-00042-BATCH-2025-07-{''.join(secrets.choice(alphabet) for _ in range(6))}",
+         "quantity_in_box": 12}
+        for _ in range(n)
+    ]
+
+
+def render(barcodes, renderer):
+    pdf_generator.qr_runs.cache_clear()
+    pdf_generator.qr_path.cache_clear()
+    started = time.perf_counter()
+    pdf = generate_barcode_pdf(barcodes, "Office Chair", "BATCH-2025-07", len(barcodes), 12,
+                               qr_renderer=renderer)
+    return time.perf_counter() - started, len(pdf.getvalue())
+
+
+def render_text(barcodes, generator):
+    pdf_generator.qr_runs.cache_clear()
+    started = time.perf_counter()
+    document = generator(barcodes, "Office Chair", "BATCH-2025-07", len(barcodes), 12)
+    return time.perf_counter() - started, len(document.encode())
+
+
+def render_pool(barcodes, pool):
+    codes = [label["barcode"] for label in barcodes]
+    chunk_size = LABEL_CHUNK_PAGES * LABEL_TEMPLATES['letter-5'].per_page
+    started = time.perf_counter()
+    futures = [pool.submit(encode_qr_chunk, codes[start:start + chunk_size])
+               for start in range(0, len(codes), chunk_size)]
+    qr_paths = [path for future in futures for path in future.result()]
+    pdf = generate_barcode_pdf(barcodes, "Office Chair", "BATCH-2025-07", len(barcodes), 12,
+                               qr_paths=qr_paths)
+    return time.perf_counter() - started, len(pdf.getvalue())
+
+
+def main():
+    print(f"{'labels':>7}{'renderer':>10}{'time':>11}{'size':>11}   ({LABEL_RENDER_WORKERS} pool workers)")
+    with ProcessPoolExecutor(LABEL_RENDER_WORKERS, mp_context=multiprocessing.get_context('spawn')) as pool:
+        pool.submit(encode_qr_chunk, []).result()
+        for n in (10, 500, 5000):
+            barcodes = barcodes_payload(n)
+            for renderer in ('png', 'vector'):
+                elapsed, size = render(barcodes, renderer)
+                print(f"{n:>7}{renderer:>10}{elapsed * 1e3:>8.0f} ms{size / 1024:>8.0f} KB")
+            elapsed, size = render_pool(barcodes, pool)
+            print(f"{n:>7}{'pool':>10}{elapsed * 1e3:>8.0f} ms{size / 1024:>8.0f} KB")
+            for name, generator in (('zpl', generate_barcode_zpl), ('svg', generate_barcode_svg)):
+                elapsed, size = render_text(barcodes, generator)
+                print(f"{n:>7}{name:>10}{elapsed * 1e3:>8.1f} ms{size / 1024:>8.0f} KB")
+
+
+if __name__ == "__main__":
+    main()
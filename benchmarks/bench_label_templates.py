@@ -0,0 +1,43 @@
+"""
+Benchmark: PDF label sheets per template.
+
+Renders intakes of 500 and 5000 boxes on every template in LABEL_TEMPLATES
+and reports pages, render time and PDF size. QR codes are encoded once up
+front (qr_paths), as the process pool does for large intakes, so the rows
+compare page layout and assembly only.
+
+    python -m benchmarks.bench_label_templates
+"""
+import secrets
+import string
+import time
+
+from api.v1.utils.label_templates import LABEL_TEMPLATES
+from api.v1.utils.pdf_generator import encode_qr_chunk, generate_barcode_pdf
+
+
+def barcodes_payload(n):
+    alphabet = string.ascii_uppercase + string.digits
+    return [
+        {"barcode": f"QR-SKU-00042-BATCH-2025-07-{''.join(secrets.choice(alphabet) for _ in range(6))}",
+         "quantity_in_box": 12}
+        for _ in range(n)
+    ]
+
+
+def main():
+    print(f"{'labels':>7}{'template':>13}{'pages':>7}{'time':>11}{'size':>11}")
+    for n in (500, 5000):
+        barcodes = barcodes_payload(n)
+        qr_paths = encode_qr_chunk([label["barcode"] for label in barcodes])
+        for name, template in LABEL_TEMPLATES.items():
+            started = time.perf_counter()
+            pdf = generate_barcode_pdf(barcodes, "Office Chair", "BATCH-2025-07", n, 12,
+                                       qr_paths=qr_paths, template=name)
+            elapsed = time.perf_counter() - started
+            print(f"{n:>7}{name:>13}{template.pages(n):>7}{elapsed * 1e3:>8.0f} ms"
+                  f"{len(pdf.getvalue()) / 1024:>8.0f} KB")
+
+
+if __name__ == "__main__":
+    main()
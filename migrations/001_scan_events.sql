@@ -0,0 +1,22 @@
+-- Scanner events applied by POST /api/v1/stocks/scans/sync.
+--
+-- event_id is unique, so a batch re-sent by a scanner (or applied by two
+-- workers at once) cannot be applied twice: the sync inserts the events it
+-- applies here before writing boxes and stock, and a unique violation means
+-- another request applied them first. `result` is what the sync answered
+-- for the event; re-sent events get it back with status "duplicate".
+--
+-- Written by the API with the service role only.
+
+create table if not exists scan_events (
+    event_id text primary key,
+    device_id text not null,
+    barcode text not null,
+    action text not null check (action in ('scan', 'sell', 'damage')),
+    scanned_at timestamptz not null,
+    created_by uuid references employees(id),
+    result jsonb not null,
+    applied_at timestamptz not null default now()
+);
+
+alter table scan_events enable row level security;
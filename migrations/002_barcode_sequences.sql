@@ -0,0 +1,29 @@
+-- Sequence numbers of box barcodes (see
+-- api/v1/services/inventories/barcode_services.py). The API counts every box
+-- in one scope, 'box', so the sequence suffix of a barcode is unique on its
+-- own whatever SKU and batch number come before it.
+--
+-- reserve_barcode_block bumps the scope's counter under its row lock and
+-- returns the first number of the reserved block, so concurrent workers never
+-- get overlapping blocks. Until this is applied, stock intake falls back to
+-- random barcode suffixes checked against the barcodes table.
+--
+-- Called by the API with the service role only.
+
+create table if not exists barcode_sequences (
+    scope text primary key,
+    next_value bigint not null
+);
+
+alter table barcode_sequences enable row level security;
+
+create or replace function reserve_barcode_block(p_scope text, p_count int)
+returns bigint language sql as $$
+    insert into barcode_sequences (scope, next_value) values (p_scope, 1 + p_count)
+    on conflict (scope) do update
+        set next_value = barcode_sequences.next_value + p_count
+    returning next_value - p_count;
+$$;
+
+revoke execute on function reserve_barcode_block(text, int) from public, anon, authenticated;
+grant execute on function reserve_barcode_block(text, int) to service_role;
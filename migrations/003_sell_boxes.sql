@@ -0,0 +1,90 @@
+-- Sale of boxes in one Postgres transaction (POST /api/v1/stocks/sell and
+-- order allocation, see transactions.sell_stock).
+--
+-- p_items is [{"box_id": uuid, "requested_quantity": int}, ...]; the same box
+-- may appear more than once. The boxes are locked, every box is checked
+-- (readable by the caller, in_stock, holding enough), then the boxes, the
+-- stock totals (update_stock, once per product/component) and the outbound
+-- inventory transaction are written. Any failed check raises and nothing is
+-- written. Returns {"sold_boxes": [...], "total_units_sold": int,
+-- "transaction": {...}}.
+--
+-- Runs with the caller's rights, so the boxes RLS policies still apply.
+
+create or replace function sell_boxes(p_items jsonb, p_order_id uuid, p_created_by uuid)
+returns jsonb language plpgsql as $$
+declare
+    r record;
+    v_sold jsonb := '[]'::jsonb;
+    v_total bigint := 0;
+    v_boxes int := 0;
+    v_transaction inventory_transactions;
+begin
+    drop table if exists pg_temp.sale_items;
+    create temp table sale_items on commit drop as
+        select (item->>'box_id')::uuid as box_id, sum((item->>'requested_quantity')::int) as requested_quantity
+        from jsonb_array_elements(p_items) as item
+        group by 1;
+
+    -- lock in a fixed order, so concurrent sales of the same boxes queue instead of deadlocking
+    perform 1 from boxes b join sale_items i on i.box_id = b.box_id order by b.box_id for update of b;
+
+    for r in
+        select i.box_id, i.requested_quantity, b.box_id as found, b.quantity_in_box, b.status
+        from sale_items i left join boxes b on b.box_id = i.box_id
+        order by i.box_id
+    loop
+        if r.found is null or r.status <> 'in_stock' then
+            raise exception 'Box % not found or not available for sale', r.box_id;
+        end if;
+        if r.requested_quantity <= 0 then
+            raise exception 'Invalid quantity % for box %', r.requested_quantity, r.box_id;
+        end if;
+        if r.requested_quantity > r.quantity_in_box then
+            raise exception 'Requested % but only % available in box %', r.requested_quantity, r.quantity_in_box, r.box_id;
+        end if;
+
+        update boxes
+            set quantity_in_box = r.quantity_in_box - r.requested_quantity,
+                status = case when r.quantity_in_box = r.requested_quantity then 'sold' else 'in_stock' end
+            where box_id = r.box_id;
+        if not found then
+            raise exception 'Box % not found or not available for sale', r.box_id;
+        end if;
+
+        v_sold := v_sold || jsonb_build_object(
+            'box_id', r.box_id,
+            'sold_quantity', r.requested_quantity,
+            'remaining_quantity', r.quantity_in_box - r.requested_quantity,
+            'new_status', case when r.quantity_in_box = r.requested_quantity then 'sold' else 'in_stock' end
+        );
+        v_total := v_total + r.requested_quantity;
+        v_boxes := v_boxes + 1;
+    end loop;
+
+    for r in
+        select b.contents_type, b.contents_id, sum(i.requested_quantity)::int as sold
+        from sale_items i join boxes b on b.box_id = i.box_id
+        group by b.contents_type, b.contents_id
+    loop
+        perform update_stock(
+            p_contents_type => r.contents_type,
+            p_contents_id => r.contents_id,
+            p_quantity_change => -r.sold
+        );
+    end loop;
+
+    insert into inventory_transactions (type, order_id, notes, created_by)
+        values ('outbound', p_order_id, format('Sold %s units from %s box(es) for order', v_total, v_boxes), p_created_by)
+        returning * into v_transaction;
+
+    return jsonb_build_object(
+        'sold_boxes', v_sold,
+        'total_units_sold', v_total,
+        'transaction', to_jsonb(v_transaction)
+    );
+end;
+$$;
+
+revoke execute on function sell_boxes(jsonb, uuid, uuid) from public, anon;
+grant execute on function sell_boxes(jsonb, uuid, uuid) to authenticated, service_role;
@@ -0,0 +1,67 @@
+-- Stock intake in one Postgres transaction (POST /api/v1/stocks, see
+-- transactions.add_new_stock).
+--
+-- p_box holds the box columns shared by the intake (contents_id,
+-- contents_type, batch_id, quantity_in_box, status, location_id,
+-- shelf_code); one box is inserted per barcode of p_barcodes. The stock total
+-- (update_stock), the inbound inventory transaction and the barcodes rows
+-- linking every box to that transaction are written in the same
+-- transaction: if any step fails, nothing is. Returns {"boxes": [...],
+-- "transaction": {...}}.
+--
+-- intake_stock runs with the caller's rights, so the boxes RLS policies still
+-- apply. barcodes is not writable by API users, so its rows are written by
+-- record_box_barcodes, which runs with its owner's rights and only records
+-- boxes that have no barcodes row yet.
+
+create or replace function record_box_barcodes(p_box_ids uuid[], p_transaction_id uuid)
+returns void language sql security definer set search_path = public as $$
+    insert into barcodes (barcode, box_id, transaction_id)
+    select b.barcode, b.box_id, p_transaction_id
+    from boxes b
+    where b.box_id = any(p_box_ids)
+      and not exists (select 1 from barcodes x where x.box_id = b.box_id);
+$$;
+
+revoke execute on function record_box_barcodes(uuid[], uuid) from public, anon;
+grant execute on function record_box_barcodes(uuid[], uuid) to authenticated, service_role;
+
+create or replace function intake_stock(p_box jsonb, p_barcodes text[], p_created_by uuid, p_notes text)
+returns jsonb language plpgsql as $$
+declare
+    v_box boxes := jsonb_populate_record(null::boxes, p_box);
+    v_boxes jsonb;
+    v_box_ids uuid[];
+    v_transaction inventory_transactions;
+begin
+    with inserted as (
+        insert into boxes (contents_id, contents_type, batch_id, quantity_in_box, status, location_id, shelf_code, barcode)
+        select v_box.contents_id, v_box.contents_type, v_box.batch_id, v_box.quantity_in_box,
+               coalesce(v_box.status, 'in_stock'), v_box.location_id, v_box.shelf_code, barcode
+        from unnest(p_barcodes) as barcode
+        returning *
+    )
+    select jsonb_agg(to_jsonb(inserted)), array_agg(inserted.box_id) into v_boxes, v_box_ids from inserted;
+
+    if coalesce(cardinality(v_box_ids), 0) <> cardinality(p_barcodes) then
+        raise exception 'Failed to add new stock';
+    end if;
+
+    perform update_stock(
+        p_contents_type => v_box.contents_type,
+        p_contents_id => v_box.contents_id,
+        p_quantity_change => cardinality(p_barcodes) * v_box.quantity_in_box
+    );
+
+    insert into inventory_transactions (type, batch_id, notes, created_by)
+        values ('inbound', v_box.batch_id, p_notes, p_created_by)
+        returning * into v_transaction;
+
+    perform record_box_barcodes(v_box_ids, v_transaction.transaction_id);
+
+    return jsonb_build_object('boxes', v_boxes, 'transaction', to_jsonb(v_transaction));
+end;
+$$;
+
+revoke execute on function intake_stock(jsonb, text[], uuid, text) from public, anon;
+grant execute on function intake_stock(jsonb, text[], uuid, text) to authenticated, service_role;
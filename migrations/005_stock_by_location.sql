@@ -0,0 +1,31 @@
+-- Stock quantities grouped per location and item (GET /api/v1/stocks/locations
+-- and GET /api/v1/stocks/locations/<id>, see stock_services).
+--
+-- Sums quantity_in_box of the in_stock boxes per (location_id, contents_type,
+-- contents_id), and per shelf_code as well with p_by_shelf; p_location_id
+-- limits it to one location. The rows come back as one jsonb array, so the
+-- API gets every group in a single call, whatever the PostgREST max-rows.
+--
+-- Runs with the caller's rights, so the boxes RLS policies still apply.
+
+create or replace function stock_by_location(
+    p_location_id boxes.location_id%type default null,
+    p_by_shelf boolean default false
+)
+returns jsonb language sql stable as $$
+    select coalesce(jsonb_agg(grouped), '[]'::jsonb)
+    from (
+        select location_id,
+               case when p_by_shelf then shelf_code end as shelf_code,
+               contents_type,
+               contents_id,
+               sum(quantity_in_box)::bigint as quantity
+        from boxes
+        where status = 'in_stock'
+          and (p_location_id is null or location_id = p_location_id)
+        group by 1, 2, 3, 4
+    ) as grouped;
+$$;
+
+revoke execute on function stock_by_location(boxes.location_id%type, boolean) from public, anon;
+grant execute on function stock_by_location(boxes.location_id%type, boolean) to authenticated, service_role;